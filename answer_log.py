@@ -0,0 +1,154 @@
+import os
+import threading
+import uuid
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Columns of one answer event, in file order
+COLUMNS = [
+    "timestamp", "session_id", "username", "topic", "question_hash", "question_number",
+    "chosen", "correct", "is_correct", "seconds_to_answer"
+]
+# Repeated strings, read back dictionary-encoded so pandas gets categoricals without re-encoding them
+DICTIONARY_COLUMNS = ["session_id", "username", "topic", "question_hash", "chosen", "correct"]
+# Finished part files; files still being written start with "_", which readers skip
+PART_SUFFIX = ".parquet"
+
+
+def _schema():
+    import pyarrow as pa
+    return pa.schema([
+        ("timestamp", pa.timestamp("ms")),
+        ("session_id", pa.string()),
+        ("username", pa.string()),
+        ("topic", pa.string()),
+        ("question_hash", pa.string()),
+        ("question_number", pa.int16()),
+        ("chosen", pa.string()),
+        ("correct", pa.string()),
+        ("is_correct", pa.bool_()),
+        ("seconds_to_answer", pa.float32()),
+    ])
+
+
+def _partitioning():
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    return ds.partitioning(pa.schema([("day", pa.string())]), flavor="hive")
+
+
+# One answer event; `chosen` is None for a question left unanswered when the quiz was completed
+def make_event(session_id, username, topic, question_hash, question_number, chosen, correct,
+               seconds_to_answer=None, timestamp=None):
+    return {
+        "timestamp": timestamp or datetime.now(),
+        "session_id": session_id,
+        "username": username,
+        "topic": topic,
+        "question_hash": question_hash,
+        "question_number": question_number,
+        "chosen": chosen,
+        "correct": correct,
+        "is_correct": chosen is not None and chosen == correct,
+        "seconds_to_answer": seconds_to_answer
+    }
+
+
+class AnswerLog:
+    """Answer events in Parquet files under `directory`, one `day=YYYY-MM-DD` directory per day.
+
+    Each `add_many` call writes its events as a new part file named after
+    the time and a random id, so several app workers can write to the same
+    directory without coordinating.
+    `compact` merges a finished day's parts into one file. pyarrow is only
+    imported, and the directory created, on the first write or read.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.Lock()
+
+    def _day_dir(self, day):
+        return os.path.join(self.directory, f"day={day}")
+
+    def add_many(self, events):
+        import pyarrow as pa
+
+        by_day = {}
+        for event in events:
+            by_day.setdefault(event["timestamp"].strftime("%Y-%m-%d"), []).append(event)
+        for day, day_events in by_day.items():
+            table = pa.Table.from_pylist(day_events, schema=_schema())
+            self._publish(day, table, f"part-{datetime.now():%H%M%S}-{uuid.uuid4().hex[:12]}{PART_SUFFIX}")
+
+    # Write `table` under a name readers skip, then rename it into place so they only see whole files
+    def _publish(self, day, table, name):
+        import pyarrow.parquet as pq
+
+        os.makedirs(self._day_dir(day), exist_ok=True)
+        tmp_path = os.path.join(self._day_dir(day), f"_{name}.tmp")
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, os.path.join(self._day_dir(day), name))
+
+    # Days with any events, oldest first
+    def days(self):
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            name[len("day="):] for name in os.listdir(self.directory)
+            if name.startswith("day=") and os.path.isdir(os.path.join(self.directory, name))
+        )
+
+    def _parts(self, day):
+        day_dir = self._day_dir(day)
+        return sorted(os.path.join(day_dir, name) for name in os.listdir(day_dir) if name.endswith(PART_SUFFIX))
+
+    def dataset(self):
+        import pyarrow.dataset as ds
+        file_format = ds.ParquetFileFormat(read_options=ds.ParquetReadOptions(dictionary_columns=DICTIONARY_COLUMNS))
+        return ds.dataset(self.directory, format=file_format, partitioning=_partitioning(), ignore_prefixes=[".", "_"])
+
+    # Events as a pyarrow Table, limited to days in [start, end] ("YYYY-MM-DD", inclusive) and to `columns`.
+    # Only the matching day directories and columns are read.
+    def read(self, start=None, end=None, columns=None):
+        import pyarrow.dataset as ds
+
+        columns = columns or COLUMNS
+        if not self.days():
+            return _schema().empty_table().select(columns)
+        condition = None
+        if start is not None:
+            condition = ds.field("day") >= start
+        if end is not None:
+            condition = ds.field("day") <= end if condition is None else condition & (ds.field("day") <= end)
+        return self.dataset().to_table(columns=columns, filter=condition)
+
+    def compact(self, day):
+        """Merge a day's part files into one, returning the number of parts merged.
+
+        The merged file is put in place before the parts are removed, so a
+        reader running at that moment may count a day's events twice but
+        never misses any. Parts written while compacting are left for the
+        next run.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        with self._lock:
+            parts = self._parts(day)
+            if len(parts) < 2:
+                return 0
+            table = pa.concat_tables([pq.ParquetFile(part).read() for part in parts]).sort_by("timestamp")
+            name = f"part-compacted-{uuid.uuid4().hex[:12]}{PART_SUFFIX}"
+            self._publish(day, table, name)
+            for part in parts:
+                os.remove(part)
+        logger.info(f"Compacted {len(parts)} answer log parts for {day} into {name}")
+        return len(parts)
+
+    # Compact every day before `today` (default: the current date)
+    def compact_before(self, today=None):
+        today = today or datetime.now().strftime("%Y-%m-%d")
+        return {day: self.compact(day) for day in self.days() if day < today}
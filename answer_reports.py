@@ -0,0 +1,136 @@
+import argparse
+import logging
+
+import numpy as np
+import pandas as pd
+
+import config
+from answer_log import AnswerLog
+
+logger = logging.getLogger(__name__)
+
+REPORTS = ("questions", "topics", "users")
+# Answers a question is assumed to have at the average accuracy, so a question answered
+# twice doesn't rank as the hardest or easiest of all
+DIFFICULTY_PRIOR = 5
+
+
+# Answer events between two days ("YYYY-MM-DD", inclusive) as a DataFrame. Only `columns` are read,
+# and repeated strings arrive as categoricals so grouping millions of rows stays fast.
+def load_answers(log, start=None, end=None, columns=None):
+    return log.read(start, end, columns).to_pandas()
+
+
+# Per-question answer counts, accuracy, skip rate, answer time and most common wrong option,
+# hardest first. `difficulty` is one minus the accuracy, pulled towards the overall mean for
+# questions with few answers.
+def question_difficulty(answers, min_answers=1):
+    stats = answers.groupby("question_hash", observed=True).agg(
+        topic=("topic", "first"),
+        answers=("is_correct", "size"),
+        correct=("is_correct", "sum"),
+        answered=("chosen", "count"),
+        median_seconds=("seconds_to_answer", "median")
+    )
+    stats["accuracy"] = stats["correct"] / stats["answers"]
+    stats["skip_rate"] = 1 - stats["answered"] / stats["answers"]
+    mean_accuracy = answers["is_correct"].mean() if len(answers) else 0.0
+    stats["difficulty"] = 1 - (stats["correct"] + DIFFICULTY_PRIOR * mean_accuracy) / (stats["answers"] + DIFFICULTY_PRIOR)
+
+    wrong = answers.loc[~answers["is_correct"] & answers["chosen"].notna(), ["question_hash", "chosen"]]
+    counts = wrong.groupby(["question_hash", "chosen"], observed=True).size().sort_values(ascending=False)
+    top_wrong = counts.reset_index().drop_duplicates("question_hash").set_index("question_hash")["chosen"]
+    stats["common_wrong"] = top_wrong.reindex(stats.index).astype(object)
+
+    stats = stats.loc[stats["answers"] >= min_answers, [
+        "topic", "answers", "correct", "accuracy", "difficulty", "skip_rate", "median_seconds", "common_wrong"
+    ]]
+    return stats.sort_values(["difficulty", "answers"], ascending=[False, False])
+
+
+# Per-topic answer counts, accuracy, distinct users and questions and median answer time, busiest first
+def topic_accuracy(answers):
+    stats = answers.groupby("topic", observed=True).agg(
+        answers=("is_correct", "size"),
+        accuracy=("is_correct", "mean"),
+        users=("username", "nunique"),
+        questions=("question_hash", "nunique"),
+        median_seconds=("seconds_to_answer", "median")
+    )
+    return stats.sort_values("answers", ascending=False)
+
+
+# Answers and accuracy per user per period (a pandas period alias: "D", "W", "M")
+def user_accuracy_by_period(answers, freq="W"):
+    period = answers["timestamp"].dt.to_period(freq).rename("period")
+    return answers.groupby([answers["username"], period], observed=True)["is_correct"].agg(
+        answers="size", accuracy="mean"
+    )
+
+
+# Per-user totals and trend: `trend` is the least-squares slope of per-period accuracy, in accuracy
+# points per period, computed for all users at once from grouped sums
+def user_trends(answers, freq="W"):
+    per_period = user_accuracy_by_period(answers, freq).reset_index()
+    x = pd.Series(pd.PeriodIndex(per_period["period"], freq=freq).asi8, dtype="float64")
+    y = per_period["accuracy"].astype("float64")
+    sums = pd.DataFrame({
+        "username": per_period["username"], "n": 1.0, "x": x, "y": y, "xy": x * y, "xx": x * x
+    }).groupby("username", observed=True).sum()
+    denominator = sums["n"] * sums["xx"] - sums["x"] ** 2
+    trend = (sums["n"] * sums["xy"] - sums["x"] * sums["y"]) / denominator.where(denominator > 0)
+
+    totals = answers.groupby("username", observed=True).agg(
+        answers=("is_correct", "size"),
+        accuracy=("is_correct", "mean"),
+        sessions=("session_id", "nunique"),
+        last_answer=("timestamp", "max")
+    )
+    totals["periods"] = sums["n"].astype(np.int64)
+    totals["trend"] = trend
+    return totals.sort_values("answers", ascending=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reports over the per-answer log.")
+    parser.add_argument("report", choices=REPORTS + ("compact",))
+    parser.add_argument("--dir", default=config.ANSWER_LOG_DIR, help="Answer log directory")
+    parser.add_argument("--since", help="First day to include (YYYY-MM-DD)")
+    parser.add_argument("--until", help="Last day to include (YYYY-MM-DD)")
+    parser.add_argument("--freq", default="W", help="Period for user trends: D, W or M")
+    parser.add_argument("--min-answers", type=int, default=5, help="Skip questions with fewer answers")
+    parser.add_argument("--top", type=int, default=20, help="Rows to print")
+    parser.add_argument("-o", "--output", help="Write the whole report to this CSV file")
+    args = parser.parse_args(argv)
+
+    if not args.dir:
+        parser.error("no answer log: pass --dir or set ANSWER_LOG_DIR")
+    log = AnswerLog(args.dir)
+    if args.report == "compact":
+        # Today's parts are still being written to, so only earlier days are merged
+        for day, merged in log.compact_before().items():
+            print(f"{day}: merged {merged} parts")
+        return 0
+
+    columns = {
+        "questions": ["question_hash", "topic", "chosen", "is_correct", "seconds_to_answer"],
+        "topics": ["topic", "username", "question_hash", "is_correct", "seconds_to_answer"],
+        "users": ["username", "session_id", "timestamp", "is_correct"],
+    }[args.report]
+    answers = load_answers(log, args.since, args.until, columns)
+    logger.info(f"Loaded {len(answers)} answers")
+    if args.report == "questions":
+        report = question_difficulty(answers, args.min_answers)
+    elif args.report == "topics":
+        report = topic_accuracy(answers)
+    else:
+        report = user_trends(answers, args.freq)
+    if args.output:
+        report.to_csv(args.output)
+    print(report.head(args.top).to_string())
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    raise SystemExit(main())
@@ -1,132 +1,90 @@
 import gradio as gr
+import asyncio
+import functools
+import hashlib
 import json
-import os
-import pandas as pd
-from datetime import datetime
-from openai import OpenAI
 import logging
+import time
+import pandas as pd
 import config
+from metrics import handler_seconds, start_metrics_server, timed
+from quiz_core import (
+    apply_llm_feedback, atop_up_quiz, close_stores, fallback_quiz, finalize_quiz, live_streams, llm_degraded,
+    load_leaderboard, open_stores, question_bank, quiz_length, quiz_pool, record_answer, resolve_topic,
+    session_store, start_quiz_stream, sync_quiz_stream
+)
+from quiz_validation import merge_questions
+from session_store import new_session_id
 
-# Set up logging
-logging.basicConfig(level=logging.DEBUG)
+# Set up logging; LOG_LEVEL=DEBUG adds per-question and per-request detail
+logging.basicConfig(level=config.LOG_LEVEL)
 logger = logging.getLogger(__name__)
 
-# Initialize OpenAI client
-client = OpenAI(api_key=config.OPENAI_API_KEY)
+# State kept in gr.State for each browser session. `view` holds digests of what the page shows
+# now and `view_next` those of the next question, which the browser may render on its own.
+def new_client_state():
+    return {"session_id": None, "step": "start", "current_question": 0, "view": None, "view_next": None}
 
-RESULTS_FILE = "results.csv"
+# Question heading, e.g. "**Q3 of 10: ...**"; the total is a guess while the quiz is still streaming
+def question_markdown(quiz, current, streaming=False):
+    total = max(len(quiz), quiz_length()) if streaming else len(quiz)
+    return f"**Q{current+1} of {total}: {quiz[current]['question']}**"
 
-# Generate quiz questions
-def generate_quiz(topic):
-    logger.debug(f"Generating quiz for topic: {topic}")
-    prompt = """
-    Generate exactly 10 multiple-choice questions on the topic '{topic}'. Each question should have:
-    - A clear question
-    - Four answer options (labeled A, B, C, D)
-    - One correct answer
-    - A brief explanation for the correct answer
-    Format the output as a JSON array of objects, where each object contains:
-    - question: string
-    - options: object with keys A, B, C, D
-    - correct_answer: string (A, B, C, or D)
-    - explanation: string
-    Ensure the JSON is valid and properly formatted. Example:
-    [
-        {{
-            "question": "What is 2+2?",
-            "options": {{"A": "3", "B": "4", "C": "5", "D": "6"}},
-            "correct_answer": "B",
-            "explanation": "2+2 equals 4."
-        }}
-    ]
-    """.format(topic=topic)
+# Radio labels like "A: 5"; submit_answer maps them back to option keys
+def option_labels(q):
+    return [f"{key}: {value}" for key, value in q["options"].items()]
 
-    try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.7,
-            max_tokens=4000
-        )
-        quiz_json = response.choices[0].message.content
-        try:
-            questions = json.loads(quiz_json)
-            logger.debug(f"Generated questions: {json.dumps(questions, indent=2)}")
-            return questions
-        except json.JSONDecodeError as je:
-            logger.error(f"Error decoding JSON from LLM: {str(je)}")
-            logger.error(f"Received JSON string: {quiz_json}")
-            return None # Or handle as appropriate, e.g., by trying to fix the JSON or returning an error message
-    except Exception as e:
-        logger.error(f"Error generating quiz (OpenAI API or other): {str(e)}")
-        return None
+# Short digest of one output update, used to skip outputs the client already shows
+def update_digest(update, salt=None):
+    def default(value):
+        return value.to_json() if isinstance(value, pd.DataFrame) else str(value)
+    payload = json.dumps([update, salt], sort_keys=True, default=default)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
 
-# Save result to leaderboard
-def save_result(name, score, total):
-    df = pd.DataFrame([{
-        "Name": name,
-        "Score": score,
-        "Out Of": total,
-        "Timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    }])
-    if os.path.exists(RESULTS_FILE):
-        df.to_csv(RESULTS_FILE, mode='a', header=False, index=False)
-    else:
-        df.to_csv(RESULTS_FILE, index=False)
+# Replace outputs whose digest matches the previous render with no-op updates
+def diff_outputs(outputs, digests, previous):
+    if not previous or len(previous) != len(digests):
+        return tuple(outputs)
+    return tuple(gr.update() if digest == prev else output for output, digest, prev in zip(outputs, digests, previous))
 
-# Load leaderboard
-def load_leaderboard():
-    if os.path.exists(RESULTS_FILE):
-        df = pd.read_csv(RESULTS_FILE)
-        return df.sort_values(by="Score", ascending=False).head(10)
-    return pd.DataFrame()
+# Runs in the browser when an answer is submitted: checks it against the current question and,
+# if the next question is already loaded, shows it straight away. The server still scores every
+# answer itself; the submission only tells it what the browser has already displayed.
+ADVANCE_JS = """
+(answer, lookahead) => {
+    const keep = {__type__: "update"};
+    if (!answer || !lookahead) {
+        return [keep, keep, keep, {index: null, answer: answer || null, checked: false, advanced: false}, lookahead];
+    }
+    const verdict = answer === lookahead.correct ? "✅ Correct!" : `❌ The correct answer was ${lookahead.correct}.`;
+    const submitted = {index: lookahead.index, answer: answer, checked: true, advanced: Boolean(lookahead.next)};
+    if (!lookahead.next) {
+        return [keep, keep, {__type__: "update", value: verdict}, submitted, null];
+    }
+    return [
+        {__type__: "update", value: lookahead.next.question},
+        {__type__: "update", choices: lookahead.next.choices.map((label) => [label, label]), value: null},
+        {__type__: "update", value: verdict},
+        submitted,
+        null
+    ];
+}
+"""
 
-# Generate feedback
-def generate_feedback(score, total, correct_questions, incorrect_questions):
-    prompt = """
-    The user scored {score} out of {total} on a quiz. Below are the questions they answered correctly:
-    {correct_questions}
-    
-    Below are the questions they answered incorrectly, including explanations:
-    {incorrect_questions}
-    
-    Provide concise feedback (2-3 sentences) to help the user improve. Highlight their performance, praise correct answers, and suggest improvements for incorrect ones. If all answers are correct, congratulate them and encourage continued learning.
-    """.format(
-        score=score,
-        total=total,
-        correct_questions=correct_questions or "None",
-        incorrect_questions=incorrect_questions or "None"
-    )
-    
-    try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.7
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        logger.error(f"Feedback generation error: {str(e)}")
-        return "Unable to generate feedback due to an error."
+# Record how long a UI handler takes, end to end, under its function name
+def timed_handler(fn):
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        with handler_seconds.time(handler=fn.__name__):
+            return await fn(*args, **kwargs)
+    return wrapper
 
 # Main quiz application
 def main():
-    # Initialize state
-    state = {
-        "step": "start",
-        "quiz": None,
-        "current_question": 0,
-        "score": 0,
-        "user_answers": [],
-        "username": "",
-        "topic": "",
-        "message": "",
-        "option_values": {}  # To store option labels to values mapping
-    }
-
     with gr.Blocks(title="AI Quiz Generator", theme=gr.themes.Soft()) as demo:
         gr.Markdown("# 🎓 AI Quiz Generator")
-        state_component = gr.State(value=state)
+        # Holds only the session id and cursor; the quiz itself is in session_store
+        state_component = gr.State(value=new_client_state())
         output_message = gr.Markdown()
 
         # Define panels
@@ -147,8 +105,14 @@ def main():
             leaderboard_display = gr.DataFrame()
             restart_btn = gr.Button("Restart Quiz")
 
-        # Update interface based on state
-        def update_interface(state):
+        # Current answer and next question, so the browser can check and advance without a round trip
+        lookahead = gr.JSON(value=None, visible=False)
+        # What the browser did with the last submitted answer, read by submit_answer
+        submitted = gr.JSON(value=None, visible=False)
+
+        # Update interface based on the client state and its server-side session. This is a pure
+        # view: results pages come ready-made from finalize_quiz, so re-rendering costs nothing.
+        def update_interface(state, session, message=""):
             if state["step"] == "start":
                 return (
                     gr.update(visible=True),  # start_panel
@@ -156,80 +120,30 @@ def main():
                     gr.update(visible=False),  # results_panel
                     gr.update(value=""),  # question_display
                     gr.update(choices=[], value=None),  # answer
-                    gr.update(value=state["message"]),  # output_message
+                    gr.update(value=message),  # output_message
                     gr.update(value=""),  # results_display
                     gr.update(value=None)  # leaderboard_display
                 )
-            elif state["step"] == "quiz" and state["current_question"] < len(state["quiz"]):
-                quiz = state["quiz"]
+            elif state["step"] == "quiz" and state["current_question"] < len(session["quiz"]):
+                quiz = session["quiz"]
                 current = state["current_question"]
                 q = quiz[current]
-                question_text = f"**Q{current+1} of {len(quiz)}: {q['question']}**"
-                # Create display labels like "A: 5" and map to option keys
-                option_labels = [f"{key}: {value}" for key, value in q["options"].items()]
-                # Store mapping of display labels to option keys (A, B, C, D)
-                state["option_values"] = {f"{key}: {value}": key for key, value in q["options"].items()}
+                streaming = live_streams.get(state["session_id"]) is not None
                 return (
                     gr.update(visible=False),  # start_panel
                     gr.update(visible=True),  # quiz_panel
                     gr.update(visible=False),  # results_panel
-                    gr.update(value=question_text),  # question_display
-                    gr.update(choices=option_labels, value=None),  # answer
-                    gr.update(value=state["message"]),  # output_message
+                    gr.update(value=question_markdown(quiz, current, streaming)),  # question_display
+                    gr.update(choices=option_labels(q), value=None),  # answer
+                    gr.update(value=message),  # output_message
                     gr.update(value=""),  # results_display
                     gr.update(value=None)  # leaderboard_display
                 )
             else:  # results
-                quiz = state["quiz"]
-                score = state["score"]
-                total = len(quiz)
-                correct_questions = []
-                incorrect_questions = []
-                
-                for i, q in enumerate(quiz):
-                    user_answer = state["user_answers"][i]
-                    correct_answer = q["correct_answer"].upper()
-                    if user_answer and user_answer == correct_answer:
-                        correct_questions.append({
-                            "question": q["question"],
-                            "user_answer": user_answer,
-                            "correct_answer": correct_answer,
-                            "explanation": q["explanation"]
-                        })
-                    else:
-                        incorrect_questions.append({
-                            "question": q["question"],
-                            "user_answer": user_answer if user_answer else "Not answered",
-                            "correct_answer": correct_answer,
-                            "explanation": q["explanation"]
-                        })
-                
-                correct_text = "\n".join([
-                    f"Question: {q['question']}\nYour answer: {q['user_answer']}\nCorrect answer: {q['correct_answer']}\nExplanation: {q['explanation']}\n"
-                    for q in correct_questions
-                ])
-                incorrect_text = "\n".join([
-                    f"Question: {q['question']}\nYour answer: {q['user_answer']}\nCorrect answer: {q['correct_answer']}\nExplanation: {q['explanation']}\n"
-                    for q in incorrect_questions
-                ])
-                
-                feedback = generate_feedback(score, total, correct_text, incorrect_text)
-                save_result(state["username"], score, total)
-                
-                results_text = f"## 🎉 Quiz Complete!\n**Final Score: {score}/{total} ({(score/total)*100:.1f}%)**\n\n### Feedback\n{feedback}"
-                if correct_questions:
-                    results_text += "\n\n### Correct Answers\n" + "\n".join([
-                        f"- **Question**: {q['question']}\n  - **Your Answer**: {q['user_answer']} (Correct)\n  - **Explanation**: {q['explanation']}"
-                        for q in correct_questions
-                    ])
-                if incorrect_questions:
-                    results_text += "\n\n### Incorrect Answers\n" + "\n".join([
-                        f"- **Question**: {q['question']}\n  - **Your Answer**: {q['user_answer']}\n  - **Correct Answer**: {q['correct_answer']}\n  - **Explanation**: {q['explanation']}"
-                        for q in incorrect_questions
-                    ])
-                
-                leaderboard = load_leaderboard()
-                leaderboard_output = leaderboard if not leaderboard.empty else "No quiz attempts yet."
+                # finalize_quiz has already scored the quiz and rendered its results
+                results_text = session["result"]["text"]
+                leaderboard_df = load_leaderboard()
+                leaderboard_output = leaderboard_df if not leaderboard_df.empty else "No quiz attempts yet."
                 
                 return (
                     gr.update(visible=False),  # start_panel
@@ -237,74 +151,189 @@ def main():
                     gr.update(visible=True),  # results_panel
                     gr.update(value=""),  # question_display
                     gr.update(choices=[], value=None),  # answer
-                    gr.update(value=state["message"]),  # output_message
+                    gr.update(value=message),  # output_message
                     gr.update(value=results_text),  # results_display
                     gr.update(value=leaderboard_output)  # leaderboard_display
                 )
 
+        # Render a state, sending only outputs that differ from what the page already shows.
+        # `previous` defaults to the state's own view; `client_advanced` means the browser has
+        # already switched to the next question and `client_checked` that it shows a verdict.
+        async def render(state, session, message="", previous=None, client_advanced=False, client_checked=False):
+            with timed("render"):
+                outputs = update_interface(state, session, message)
+                # The answer radio is reset per question even when two questions share the same options
+                salt = [None] * len(outputs)
+                salt[4] = (state["step"], state["current_question"])
+                digests = [update_digest(output, s) for output, s in zip(outputs, salt)]
+            previous = list(previous if previous is not None else state.get("view") or [])
+            if previous and client_advanced and state.get("view_next"):
+                previous[3], previous[4] = state["view_next"]
+            if previous and client_checked and not message:
+                # Leave the browser's verdict up rather than clearing it with an empty message
+                previous[5] = digests[5]
+            new_state = dict(state, view=digests, view_next=None)
+            ahead = None
+            if config.CLIENT_ANSWER_CHECK and session and state["step"] == "quiz" and state["current_question"] < len(session["quiz"]):
+                quiz = session["quiz"]
+                current = state["current_question"]
+                q = quiz[current]
+                ahead = {"index": current, "correct": f"{q['correct_answer']}: {q['options'][q['correct_answer']]}"}
+                if current + 1 < len(quiz):
+                    streaming = live_streams.get(state["session_id"]) is not None
+                    ahead["next"] = {
+                        "question": question_markdown(quiz, current + 1, streaming),
+                        "choices": option_labels(quiz[current + 1])
+                    }
+                    new_state["view_next"] = [
+                        update_digest(gr.update(value=ahead["next"]["question"])),
+                        update_digest(gr.update(choices=ahead["next"]["choices"], value=None), ("quiz", current + 1))
+                    ]
+            return (new_state, *diff_outputs(outputs, digests, previous), ahead)
+
+        # The server-side session for a client state, or None if it expired or was evicted
+        def load_session(state):
+            if not state.get("session_id"):
+                return None
+            with timed("session_load"):
+                return session_store.get(state["session_id"])
+
+        async def session_expired(state):
+            message = "Your quiz session has expired. Please start a new quiz."
+            return await render(new_client_state(), None, message, previous=state.get("view"))
+
+        # Drop a session and any stream still filling it
+        def end_session(state):
+            if state.get("session_id"):
+                session_store.delete(state["session_id"])
+                live_streams.delete(state["session_id"])
+
         # Button actions
-        def start_quiz(username, topic, state):
-            new_state = state.copy()
+        @timed_handler
+        async def start_quiz(username, topic, state):
+            end_session(state)
+            new_state = new_client_state()
             if not username:
-                new_state["message"] = "Please enter your name."
-                return (new_state, *update_interface(new_state))
-            new_state["username"] = username
-            new_state["topic"] = topic
-            quiz = generate_quiz(topic)
-            if quiz is None:
-                new_state["message"] = "Failed to generate quiz. Please try again."
-                return (new_state, *update_interface(new_state))
-            new_state["quiz"] = quiz
-            new_state["step"] = "quiz"
-            new_state["current_question"] = 0
-            new_state["score"] = 0
-            new_state["user_answers"] = [None] * len(quiz)
-            new_state["message"] = ""
-            new_state["option_values"] = {}
-            return (new_state, *update_interface(new_state))
+                return await render(new_state, None, "Please enter your name.", previous=state.get("view"))
+            session_id = new_session_id()
+            topic = resolve_topic(topic)
+            length = quiz_length()
+            # Questions this user hasn't seen; the LLM is only asked for what the bank can't cover
+            with timed("bank_assemble"):
+                quiz = question_bank.assemble(topic, length, username)
+            if len(quiz) < length:
+                pooled = quiz_pool.pop(topic)
+                if pooled:
+                    quiz = merge_questions(quiz, question_bank.unseen(username, pooled))[:length]
+            else:
+                # Taking a pooled quiz here would only throw it away and pay for its refill
+                quiz_pool.touch(topic)
+            if len(quiz) < length and llm_degraded():
+                # The LLM keeps failing, so don't wait on it: fill up with stored questions
+                quiz = fallback_quiz(topic, quiz)
+            elif len(quiz) < length:
+                avoid = question_bank.seen_questions(topic, username)
+                if config.QUIZ_STREAMING:
+                    # Start with the banked questions, or the first streamed one; the rest keep arriving
+                    stream = start_quiz_stream(topic, quiz, avoid)
+                    live_streams.put(session_id, stream)
+                    await asyncio.to_thread(stream.wait_for, 1, config.QUIZ_STREAM_TIMEOUT)
+                    quiz = list(stream.questions)
+                else:
+                    quiz = await atop_up_quiz(topic, quiz, avoid)
+            if not quiz:
+                # Generation failed outright; questions the user has seen beat an error
+                quiz = fallback_quiz(topic)
+            if not quiz:
+                live_streams.delete(session_id)
+                message = "Failed to generate quiz. Please try again."
+                return await render(new_state, None, message, previous=state.get("view"))
+            session = {
+                "username": username,
+                "topic": topic,
+                "quiz": quiz,
+                "user_answers": [None] * len(quiz),
+                "score": 0,
+                "result": None,  # Set once by finalize_quiz
+                "shown_at": time.time()  # When the current question appeared, for answer timings
+            }
+            session_store.put(session_id, session)
+            new_state = dict(new_state, session_id=session_id, step="quiz")
+            return await render(new_state, session, previous=state.get("view"))
 
-        def submit_answer(answer, state):
-            new_state = state.copy()
+        @timed_handler
+        async def submit_answer(submission, state):
+            session = load_session(state)
+            if session is None:
+                return await session_expired(state)
+            if state["step"] != "quiz":
+                # A late click after the quiz has already moved on to the results
+                return (state, *[gr.update()] * 8, None)
+            submission = submission or {}
+            answer = submission.get("answer")
             if not answer:
-                new_state["message"] = "Please select an answer."
-                return (new_state, *update_interface(new_state))
-            quiz = new_state["quiz"]
-            current = new_state["current_question"]
+                return await render(state, session, "Please select an answer.")
+            current = state["current_question"]
+            if submission.get("index") not in (None, current):
+                # A repeated click for a question that was already answered
+                return await render(state, session)
+            q = session["quiz"][current]
             # Map the selected label (e.g., "A: 5") back to the option key (e.g., "A")
-            selected_option = new_state["option_values"].get(answer)
+            selected_option = {f"{key}: {value}": key for key, value in q["options"].items()}.get(answer)
             if not selected_option:
-                new_state["message"] = "Invalid selection. Please try again."
-                return (new_state, *update_interface(new_state))
-            new_state["user_answers"][current] = selected_option.upper()
-            correct_answer = quiz[current]["correct_answer"].upper()
+                return await render(state, session, "Invalid selection. Please try again.")
+            session["user_answers"][current] = selected_option.upper()
+            record_answer(state["session_id"], session, current, selected_option.upper())
+            correct_answer = q["correct_answer"].upper()
             logger.debug(f"Q{current+1}: User answer = {selected_option}, Correct answer = {correct_answer}")
             if selected_option.upper() == correct_answer:
-                new_state["score"] += 1
-            new_state["current_question"] += 1
-            new_state["message"] = ""
-            new_state["option_values"] = {}
-            return (new_state, *update_interface(new_state))
+                session["score"] += 1
+            new_state = dict(state, current_question=current + 1)
+            await asyncio.to_thread(sync_quiz_stream, state["session_id"], session, new_state["current_question"])
+            if new_state["current_question"] >= len(session["quiz"]):
+                new_state["step"] = "results"
+                await finalize_quiz(state["session_id"], session)
+            outputs = await render(
+                new_state, session,
+                client_advanced=bool(submission.get("advanced")),
+                client_checked=bool(submission.get("checked"))
+            )
+            session_store.put(state["session_id"], session)
+            return outputs
 
-        def complete_quiz(state):
-            new_state = state.copy()
-            new_state["step"] = "results"
-            new_state["message"] = ""
-            new_state["option_values"] = {}
-            return (new_state, *update_interface(new_state))
+        @timed_handler
+        async def complete_quiz(state):
+            session = load_session(state)
+            if session is None:
+                return await session_expired(state)
+            new_state = dict(state, step="results")
+            await asyncio.to_thread(sync_quiz_stream, state["session_id"], session)
+            await finalize_quiz(state["session_id"], session)
+            outputs = await render(new_state, session)
+            session_store.put(state["session_id"], session)
+            return outputs
 
-        def restart(state):
-            new_state = {
-                "step": "start",
-                "quiz": None,
-                "current_question": 0,
-                "score": 0,
-                "user_answers": [],
-                "username": "",
-                "topic": "",
-                "message": "",
-                "option_values": {}
-            }
-            return (new_state, *update_interface(new_state))
+        @timed_handler
+        async def restart(state):
+            end_session(state)
+            return await render(new_client_state(), None, previous=state.get("view"))
+
+        # Replace the instant local feedback with LLM feedback once the results page is showing
+        @timed_handler
+        async def fill_feedback(state):
+            if state["step"] != "results":
+                return gr.update()
+            session = load_session(state)
+            result = session.get("result") if session else None
+            if not result or not result["feedback_pending"]:
+                return gr.update()
+            result["feedback_pending"] = False
+            session_store.put(state["session_id"], session)
+            if not await apply_llm_feedback(session, result):
+                return gr.update()
+            # Keep the LLM feedback in the cached results page for any later render
+            session_store.put(state["session_id"], session)
+            return gr.update(value=result["text"])
 
         # Bind button actions
         generate_btn.click(
@@ -319,13 +348,20 @@ def main():
                 answer,
                 output_message,
                 results_display,
-                leaderboard_display
+                leaderboard_display,
+                lookahead
             ]
         )
 
+        # Check the answer and show the next question in the browser first, then record it on the server
         submit_btn.click(
+            fn=None,
+            inputs=[answer, lookahead],
+            outputs=[question_display, answer, output_message, submitted, lookahead],
+            js=ADVANCE_JS
+        ).then(
             fn=submit_answer,
-            inputs=[answer, state_component],
+            inputs=[submitted, state_component],
             outputs=[
                 state_component,
                 start_panel,
@@ -335,8 +371,13 @@ def main():
                 answer,
                 output_message,
                 results_display,
-                leaderboard_display
+                leaderboard_display,
+                lookahead
             ]
+        ).then(
+            fn=fill_feedback,
+            inputs=[state_component],
+            outputs=[results_display]
         )
 
         complete_btn.click(
@@ -351,8 +392,13 @@ def main():
                 answer,
                 output_message,
                 results_display,
-                leaderboard_display
+                leaderboard_display,
+                lookahead
             ]
+        ).then(
+            fn=fill_feedback,
+            inputs=[state_component],
+            outputs=[results_display]
         )
 
         restart_btn.click(
@@ -367,12 +413,25 @@ def main():
                 answer,
                 output_message,
                 results_display,
-                leaderboard_display
+                leaderboard_display,
+                lookahead
             ]
         )
 
     return demo
 
 if __name__ == "__main__":
+    # Fail fast at startup rather than on the first quiz if the key is missing
+    config.get_settings().require_api_key()
     logger.info("Starting Gradio application...")
-    main().launch()
\ No newline at end of file
+    # Open the stores and load the leaderboard before serving rather than on the first requests
+    open_stores()
+    if config.METRICS_PORT:
+        start_metrics_server(config.METRICS_PORT, config.METRICS_HOST)
+    quiz_pool.start(config.QUIZ_POOL_WARMUP_TOPICS)
+    try:
+        # Async handlers share one event loop, so allow many events to run at once
+        main().queue(default_concurrency_limit=config.UI_CONCURRENCY_LIMIT).launch()
+    finally:
+        quiz_pool.stop()
+        close_stores()
\ No newline at end of file
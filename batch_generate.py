@@ -0,0 +1,152 @@
+import argparse
+import json
+import os
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import config
+from quiz_cache import is_valid_quiz, normalize_topic
+
+logger = logging.getLogger(__name__)
+
+
+# Read one topic per line, skipping blanks and "#" comments
+def read_topics(path):
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.strip().startswith("#")]
+
+
+# Topics already written to an output JSONL file; a partial last line is ignored
+def load_checkpoint(path):
+    done = set()
+    if not path or not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                done.add(normalize_topic(json.loads(line)["topic"]))
+            except (json.JSONDecodeError, KeyError, TypeError):
+                continue
+    return done
+
+
+# Generate one topic, retrying with exponential backoff until a valid quiz comes back
+def _generate_with_retries(topic, generate_fn, retries, backoff, validate):
+    for attempt in range(retries + 1):
+        try:
+            questions = generate_fn(topic)
+        except Exception as e:
+            logger.error(f"Batch generation error for topic {topic}: {str(e)}")
+            questions = None
+        if questions is not None and validate(questions):
+            return questions
+        if attempt < retries:
+            time.sleep(backoff * (2 ** attempt))
+    return None
+
+
+def generate_batch(topics, generate_fn, output_path=None, sink=None, concurrency=4, retries=2,
+                   backoff=1.0, resume=True, validate=is_valid_quiz):
+    """Generate quizzes for many topics with bounded parallelism.
+
+    Each valid quiz is appended to `output_path` as one JSONL line as soon as
+    it is ready, and/or passed to `sink(topic, questions)`. With `resume`,
+    topics already present in `output_path` are skipped, so an interrupted
+    run can be restarted with the same arguments. Returns a summary dict.
+    """
+    done = load_checkpoint(output_path) if resume else set()
+    pending = []
+    seen = set()
+    for topic in topics:
+        key = normalize_topic(topic)
+        if key and key not in done and key not in seen:
+            seen.add(key)
+            pending.append(topic)
+    summary = {"generated": 0, "skipped": len(topics) - len(pending), "failed": []}
+    write_lock = threading.Lock()
+    output = None
+    if output_path:
+        needs_newline = False
+        if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+            with open(output_path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                needs_newline = f.read(1) != b"\n"
+        output = open(output_path, "a", encoding="utf-8")
+        if needs_newline:
+            # Terminate a line cut short by an interrupted run so new records start cleanly
+            output.write("\n")
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="batch-generate") as executor:
+            futures = {
+                executor.submit(_generate_with_retries, topic, generate_fn, retries, backoff, validate): topic
+                for topic in pending
+            }
+            for future in as_completed(futures):
+                topic = futures[future]
+                questions = future.result()
+                if questions is None:
+                    summary["failed"].append(topic)
+                    logger.warning(f"Giving up on topic after {retries + 1} attempts: {topic}")
+                    continue
+                with write_lock:
+                    if output is not None:
+                        output.write(json.dumps({"topic": topic, "questions": questions}, ensure_ascii=False) + "\n")
+                        output.flush()
+                    if sink is not None:
+                        sink(topic, questions)
+                    summary["generated"] += 1
+                logger.info(f"Generated quiz for topic {topic} ({summary['generated']}/{len(pending)})")
+    finally:
+        if output is not None:
+            output.close()
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate quizzes for many topics without the UI.")
+    parser.add_argument("topics", nargs="+", help="Topics, or a path to a file with one topic per line")
+    parser.add_argument("-o", "--output", help="JSONL file to append quizzes to (also the resume checkpoint)")
+    parser.add_argument("--cache", action="store_true", help="Also store quizzes in the app's quiz cache")
+    parser.add_argument("-c", "--concurrency", type=int, default=4)
+    parser.add_argument("-r", "--retries", type=int, help="Retries per LLM call (default: LLM_RETRIES)")
+    parser.add_argument("--backoff", type=float, help="Base retry delay in seconds (default: LLM_BACKOFF)")
+    parser.add_argument("--no-resume", action="store_true", help="Regenerate topics already in the output file")
+    args = parser.parse_args(argv)
+
+    if not args.output and not args.cache:
+        parser.error("nothing to write to: pass --output and/or --cache")
+    topics = read_topics(args.topics[0]) if len(args.topics) == 1 and os.path.isfile(args.topics[0]) else args.topics
+
+    config.get_settings().require_api_key()
+    # Imported here so --help and argument errors don't pay for the quiz core import
+    import quiz_core
+
+    # quiz_core retries failed LLM calls with backoff itself, so the options tune that instead of
+    # wrapping it in a second retry loop
+    if args.retries is not None:
+        quiz_core.quiz_caller.retries = args.retries
+    if args.backoff is not None:
+        quiz_core.quiz_caller.backoff = args.backoff
+    sink = None
+    if args.cache:
+        sink = lambda topic, questions: quiz_core.quiz_cache.store(
+            topic, questions, quiz_core.MODEL, quiz_core.TEMPERATURE, quiz_core.quiz_variant()
+        )
+    summary = generate_batch(
+        topics,
+        quiz_core.generate_quiz,
+        output_path=args.output,
+        sink=sink,
+        concurrency=args.concurrency,
+        retries=0,
+        resume=not args.no_resume
+    )
+    print(json.dumps(summary, indent=2))
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    raise SystemExit(main())
@@ -0,0 +1,295 @@
+import argparse
+import asyncio
+import importlib
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from fake_llm_server import FakeLLM, start_server
+
+logger = logging.getLogger(__name__)
+
+SCENARIOS = ("generate_quiz", "generate_feedback", "leaderboard", "quiz_flow")
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+TOPICS = ("Python", "World History", "Astronomy", "Cooking", "Music Theory")
+
+
+# Linearly interpolated percentile of an already sorted list
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    rank = (len(sorted_values) - 1) * p / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+# Latency percentiles (in milliseconds) and throughput for one set of timed calls
+def summarize(latencies, errors, elapsed):
+    values = sorted(latencies)
+    ms = lambda v: None if v is None else round(v * 1000, 2)
+    return {
+        "requests": len(values) + errors,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "rps": round(len(values) / elapsed, 2) if elapsed > 0 else None,
+        "mean_ms": ms(sum(values) / len(values)) if values else None,
+        "p50_ms": ms(percentile(values, 50)),
+        "p95_ms": ms(percentile(values, 95)),
+        "p99_ms": ms(percentile(values, 99)),
+        "max_ms": ms(values[-1]) if values else None
+    }
+
+
+class Timings:
+    """Latencies of successful calls and a count of failed ones, safe to share between threads."""
+
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds=None, ok=True):
+        with self._lock:
+            if ok:
+                self.latencies.append(seconds)
+            else:
+                self.errors += 1
+
+
+# Call `fn(user, i)` `requests` times for each of `users` threads at once; a falsy result counts as an error
+def run_threads(fn, users, requests):
+    timings = Timings()
+
+    def user_loop(user):
+        for i in range(requests):
+            start = time.perf_counter()
+            try:
+                ok = bool(fn(user, i))
+            except Exception as e:
+                logger.warning(f"Benchmark call failed: {str(e)}")
+                ok = False
+            timings.record(time.perf_counter() - start, ok)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as executor:
+        list(executor.map(user_loop, range(users)))
+    return summarize(timings.latencies, timings.errors, time.perf_counter() - start)
+
+
+def bench_generate_quiz(core, users, requests):
+    return run_threads(lambda user, i: core.generate_quiz(TOPICS[(user + i) % len(TOPICS)]), users, requests)
+
+
+def bench_generate_feedback(core, users, requests):
+    incorrect = [{"question": "What is 3+3?", "user_answer": "C", "correct_answer": "A", "explanation": "3+3 equals 6."}]
+
+    def call(user, i):
+        return core.generate_feedback(1, 2, incorrect) != core.FEEDBACK_ERROR
+
+    return run_threads(call, users, requests)
+
+
+def bench_leaderboard(core, users, requests):
+    def call(user, i):
+        core.save_result(f"user{user}", (user + i) % 11, 10, TOPICS[user % len(TOPICS)])
+        return core.load_leaderboard() is not None
+
+    return run_threads(call, users, requests)
+
+
+async def _quiz_flow(fns, app, user, answers, steps):
+    state = app.new_client_state()
+    topic = TOPICS[user % len(TOPICS)]
+
+    async def step(name, *args):
+        start = time.perf_counter()
+        outputs = await fns[name](*args)
+        steps.setdefault(name, Timings()).record(time.perf_counter() - start)
+        return outputs
+
+    state = (await step("start_quiz", f"user{user}", topic, state))[0]
+    if state["step"] != "quiz":
+        return False
+    for _ in range(answers):
+        session = app.session_store.get(state["session_id"])
+        if state["step"] != "quiz" or session is None:
+            break
+        q = session["quiz"][state["current_question"]]
+        label = next(f"{key}: {value}" for key, value in q["options"].items())
+        submission = {"index": state["current_question"], "answer": label}
+        state = (await step("submit_answer", submission, state))[0]
+    state = (await step("complete_quiz", state))[0]
+    await step("fill_feedback", state)
+    return state["step"] == "results"
+
+
+# Simulated users taking whole quizzes through the Gradio handlers: start, answer, complete, feedback
+def bench_quiz_flow(app, users, requests, answers=5):
+    demo = app.main()
+    fns = {fn.name: fn.fn for fn in demo.fns.values()}
+    timings = Timings()
+    steps = {}
+
+    async def user_loop(user):
+        for _ in range(requests):
+            start = time.perf_counter()
+            try:
+                ok = await _quiz_flow(fns, app, user, answers, steps)
+            except Exception as e:
+                logger.warning(f"Quiz flow failed: {str(e)}")
+                ok = False
+            timings.record(time.perf_counter() - start, ok)
+
+    async def run():
+        await asyncio.gather(*(user_loop(user) for user in range(users)))
+
+    start = time.perf_counter()
+    asyncio.run(run())
+    result = summarize(timings.latencies, timings.errors, time.perf_counter() - start)
+    result["steps"] = {
+        name: summarize(t.latencies, t.errors, result["seconds"]) for name, t in sorted(steps.items())
+    }
+    return result
+
+
+# Point the app at the fake server and keep its databases in `workdir`
+def configure_env(base_url, workdir):
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+    for name, filename in (
+        ("QUIZ_CACHE_FILE", "quiz_cache.db"), ("QUESTION_BANK_FILE", "question_bank.db"),
+        ("RESULTS_PATH", "results.db"), ("SESSION_PATH", "sessions.db"), ("KV_PATH", "kv.db"),
+        ("ANSWER_LOG_DIR", "answer_log")
+    ):
+        os.environ[name] = os.path.join(workdir, filename)
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    # The legacy results.csv import reads from the working directory
+    os.chdir(workdir)
+
+
+# Seconds a fresh interpreter takes to import `module`, so modules this process already loaded don't hide the cost
+def cold_import_seconds(module):
+    code = (
+        f"import sys, time; sys.path.insert(0, {REPO_DIR!r}); start = time.perf_counter(); "
+        f"import {module}; print(time.perf_counter() - start)"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return round(float(result.stdout.split()[-1]), 3)
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=REPO_DIR, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Print how p50/p95/p99 and throughput moved against an earlier report
+def compare(report, baseline):
+    lines = []
+    for name, result in report["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        for key in ("p50_ms", "p95_ms", "p99_ms", "rps"):
+            old, new = before.get(key), result.get(key)
+            if old and new is not None:
+                lines.append(f"{name:18} {key:7} {old:>10} -> {new:>10} ({(new - old) / old * 100:+.1f}%)")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the quiz app against a local fake LLM server.")
+    parser.add_argument("--users", type=int, default=10, help="Concurrent simulated users")
+    parser.add_argument("--requests", type=int, default=5, help="Calls (or whole quizzes) per user")
+    parser.add_argument("--answers", type=int, default=5, help="Questions answered per quiz before completing it")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake LLM mean seconds to first byte")
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--chunk-delay", type=float, default=0.005, help="Fake LLM seconds between streamed chunks")
+    parser.add_argument("--malformed-rate", type=float, default=0.05, help="Share of quiz replies cut off part way")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of fake LLM requests that fail with a 500")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="Share of fake LLM requests delayed by --slow-delay")
+    parser.add_argument("--slow-delay", type=float, default=5.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("-o", "--output", default="benchmark.json", help="JSON report to write")
+    parser.add_argument("--compare", help="Earlier JSON report to compare against")
+    args = parser.parse_args(argv)
+
+    output = os.path.abspath(args.output)
+    baseline_path = os.path.abspath(args.compare) if args.compare else None
+    llm = FakeLLM(
+        args.latency, args.jitter, args.chunk_delay, malformed_rate=args.malformed_rate, seed=args.seed,
+        error_rate=args.error_rate, slow_rate=args.slow_rate, slow_delay=args.slow_delay
+    )
+    server, base_url = start_server(llm)
+    with tempfile.TemporaryDirectory(prefix="quiz-bench-") as workdir:
+        cwd = os.getcwd()
+        try:
+            configure_env(base_url, workdir)
+            import_seconds = {module: cold_import_seconds(module) for module in ("config", "quiz_core", "app")}
+            core = importlib.import_module("quiz_core")
+            # Like app.py, open the stores before serving so no scenario times their first use
+            core.open_stores()
+            benches = {
+                "generate_quiz": bench_generate_quiz,
+                "generate_feedback": bench_generate_feedback,
+                "leaderboard": bench_leaderboard,
+                # Only the quiz flow goes through the Gradio UI, so only it imports the app module
+                "quiz_flow": lambda core, users, requests: bench_quiz_flow(
+                    importlib.import_module("app"), users, requests, args.answers
+                ),
+            }
+            scenarios = {}
+            for name in args.scenarios:
+                logger.info(f"Running {name} with {args.users} users x {args.requests} requests")
+                scenarios[name] = benches[name](core, args.users, args.requests)
+            core.close_stores()
+        finally:
+            os.chdir(cwd)
+    server.should_exit = True
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "settings": vars(args),
+        "import_seconds": import_seconds,
+        "fake_llm": llm.stats,
+        # Retries, hedged requests and calls refused by the circuit breaker, by call
+        "llm_events": {".".join(label for _, label in key): count for _, key, count in core.llm_events.samples()},
+        "scenarios": scenarios,
+        # The app's own per-stage timings across all scenarios
+        "stages": {
+            stage: {"count": count, "mean_ms": round(total / count * 1000, 2)}
+            for (stage,), (count, total) in sorted(core.stage_seconds.series().items()) if count
+        }
+    }
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    for name, result in scenarios.items():
+        print(f"{name:18} rps {result['rps']!s:>8}  p50 {result['p50_ms']!s:>9} ms  "
+              f"p95 {result['p95_ms']!s:>9} ms  p99 {result['p99_ms']!s:>9} ms  errors {result['errors']}")
+    if baseline_path:
+        with open(baseline_path, encoding="utf-8") as f:
+            print(compare(report, json.load(f)))
+    return 0
+
+
+if __name__ == "__main__":
+    # Keep the app and HTTP client logs quiet so logging doesn't skew the timings
+    logging.basicConfig(level=logging.WARNING)
+    logger.setLevel(logging.INFO)
+    raise SystemExit(main())
@@ -1,9 +1,197 @@
 import os
-from dotenv import load_dotenv
+import threading
 
-load_dotenv()
+API_KEY_MISSING = "OPENAI_API_KEY not found in environment variables. Please set it in a .env file or as an environment variable."
 
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
-if OPENAI_API_KEY is None:
-    raise ValueError("OPENAI_API_KEY not found in environment variables. Please set it in a .env file or as an environment variable.")
\ No newline at end of file
+def _int(env, name, default):
+    value = env.get(name)
+    if value is None or value.strip() == "":
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer, got {value!r}") from None
+
+
+def _float(env, name, default):
+    value = env.get(name)
+    if value is None or value.strip() == "":
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a number, got {value!r}") from None
+
+
+def _bool(env, name, default):
+    value = env.get(name)
+    if value is None or value.strip() == "":
+        return default
+    value = value.strip().lower()
+    if value in ("true", "1", "yes", "on"):
+        return True
+    if value in ("false", "0", "no", "off"):
+        return False
+    raise ValueError(f"{name} must be true or false, got {value!r}")
+
+
+def _choice(env, name, default, choices):
+    value = env.get(name, "").strip().lower() or default
+    if value not in choices:
+        raise ValueError(f"{name} must be one of {', '.join(choices)}, got {value!r}")
+    return value
+
+
+# Comma-separated list, skipping blanks
+def _list(env, name, default):
+    return [item.strip() for item in env.get(name, default).split(",") if item.strip()]
+
+
+class Settings:
+    """App settings parsed from environment variables.
+
+    Every setting is an upper-case attribute holding a value of its final
+    type; a malformed number or flag fails here, naming the variable.
+    Nothing is required up front: code that calls the LLM asks for the API
+    key with `require_api_key()`.
+    """
+
+    def __init__(self, env=None):
+        env = os.environ if env is None else env
+        self.OPENAI_API_KEY = env.get("OPENAI_API_KEY")
+
+        # Quiz cache settings; the cache is kept in a SQLite file ("sqlite") or in the shared KV store ("kv")
+        self.QUIZ_CACHE_BACKEND = _choice(env, "QUIZ_CACHE_BACKEND", "sqlite", ("sqlite", "kv"))
+        self.QUIZ_CACHE_FILE = env.get("QUIZ_CACHE_FILE", "quiz_cache.db")
+        self.QUIZ_CACHE_TTL = _int(env, "QUIZ_CACHE_TTL", 7 * 24 * 3600)
+        self.QUIZ_CACHE_MAX_ENTRIES = _int(env, "QUIZ_CACHE_MAX_ENTRIES", 1000)
+        # Keep generating fresh quizzes until a topic has this many stored sets
+        self.QUIZ_CACHE_MIN_POOL = _int(env, "QUIZ_CACHE_MIN_POOL", 3)
+        # Per-question store that quizzes are assembled from: "sqlite" or "kv" (the shared KV store)
+        self.QUESTION_BANK_BACKEND = _choice(env, "QUESTION_BANK_BACKEND", "sqlite", ("sqlite", "kv"))
+        self.QUESTION_BANK_FILE = env.get("QUESTION_BANK_FILE", "question_bank.db")
+        # Cosine similarity a new topic needs to reuse the quizzes of an already known topic
+        self.TOPIC_MATCH_THRESHOLD = _float(env, "TOPIC_MATCH_THRESHOLD", 0.8)
+
+        # Background quiz pre-generation settings
+        self.QUIZ_POOL_SIZE = _int(env, "QUIZ_POOL_SIZE", 2)
+        self.QUIZ_POOL_WORKERS = _int(env, "QUIZ_POOL_WORKERS", 2)
+        self.QUIZ_POOL_MAX_TOPICS = _int(env, "QUIZ_POOL_MAX_TOPICS", 20)
+        self.QUIZ_POOL_REFILL_INTERVAL = _int(env, "QUIZ_POOL_REFILL_INTERVAL", 30)
+        self.QUIZ_POOL_WARMUP_TOPICS = _list(env, "QUIZ_POOL_WARMUP_TOPICS", "Python")
+
+        # Stream quiz generation so the first question shows before the whole quiz exists
+        self.QUIZ_STREAMING = _bool(env, "QUIZ_STREAMING", True)
+        self.QUIZ_STREAM_TIMEOUT = _float(env, "QUIZ_STREAM_TIMEOUT", 60)
+
+        # LLM call limits
+        self.LLM_MAX_IN_FLIGHT = _int(env, "LLM_MAX_IN_FLIGHT", 8)
+        self.LLM_MAX_CONNECTIONS = _int(env, "LLM_MAX_CONNECTIONS", 20)
+        self.LLM_TIMEOUT = _float(env, "LLM_TIMEOUT", 60)
+        # How long a call may wait for a free in-flight slot before giving up
+        self.LLM_QUEUE_TIMEOUT = _float(env, "LLM_QUEUE_TIMEOUT", 30)
+        self.UI_CONCURRENCY_LIMIT = _int(env, "UI_CONCURRENCY_LIMIT", 64)
+
+        # LLM call resilience: retries with backoff, a time limit per attempt and for the whole call
+        # (including retries), hedged duplicate requests and a circuit breaker
+        self.LLM_RETRIES = _int(env, "LLM_RETRIES", 2)
+        self.LLM_ATTEMPT_TIMEOUT = _float(env, "LLM_ATTEMPT_TIMEOUT", 20)
+        self.LLM_DEADLINE = _float(env, "LLM_DEADLINE", 45)
+        self.LLM_BACKOFF = _float(env, "LLM_BACKOFF", 0.5)
+        self.LLM_BACKOFF_MAX = _float(env, "LLM_BACKOFF_MAX", 4)
+        # Send a duplicate request once one has run past the recent p95 latency (costs extra tokens)
+        self.LLM_HEDGE = _bool(env, "LLM_HEDGE", False)
+        self.LLM_HEDGE_MIN_DELAY = _float(env, "LLM_HEDGE_MIN_DELAY", 1.0)
+        # Failures in a row that open the breaker, and seconds before it lets a trial call through
+        self.LLM_BREAKER_THRESHOLD = _int(env, "LLM_BREAKER_THRESHOLD", 5)
+        self.LLM_BREAKER_RESET = _float(env, "LLM_BREAKER_RESET", 30)
+
+        # Leaderboard storage: "sqlite" (default), the legacy "csv" file or "kv" (the shared KV store)
+        self.RESULTS_BACKEND = _choice(env, "RESULTS_BACKEND", "sqlite", ("sqlite", "csv", "kv"))
+        self.RESULTS_PATH = env.get("RESULTS_PATH", "results.csv" if self.RESULTS_BACKEND == "csv" else "results.db")
+
+        # Write-behind batching for leaderboard results
+        self.RESULTS_BATCH_SIZE = _int(env, "RESULTS_BATCH_SIZE", 50)
+        self.RESULTS_FLUSH_INTERVAL = _float(env, "RESULTS_FLUSH_INTERVAL", 1.0)
+        self.RESULTS_MAX_PENDING = _int(env, "RESULTS_MAX_PENDING", 10000)
+
+        # Feedback: "local" (templates only), "llm" (blocking LLM call) or "async" (local first, LLM filled in)
+        self.FEEDBACK_MODE = _choice(env, "FEEDBACK_MODE", "async", ("local", "llm", "async"))
+        self.FEEDBACK_CACHE_SIZE = _int(env, "FEEDBACK_CACHE_SIZE", 1000)
+
+        # Let the browser check answers and show the next loaded question before the server replies.
+        # The correct answer of the current question is then sent to the page.
+        self.CLIENT_ANSWER_CHECK = _bool(env, "CLIENT_ANSWER_CHECK", True)
+
+        # Key-value store shared by workers: "memory" (one process), "sqlite" (one host) or "redis" (any host).
+        # It holds sessions and once-only claims, and whichever of the stores above are set to "kv".
+        self.KV_BACKEND = _choice(env, "KV_BACKEND", "memory", ("memory", "sqlite", "redis"))
+        self.KV_PATH = env.get("KV_PATH", "kv.db")
+        self.KV_URL = env.get("KV_URL", "redis://localhost:6379/0")
+
+        # Reload the leaderboard from the results store this often, in seconds, to include other
+        # workers' results (0 = never)
+        self.LEADERBOARD_REFRESH_INTERVAL = _float(env, "LEADERBOARD_REFRESH_INTERVAL", 0)
+
+        # Server-side quiz sessions: "memory" (LRU with idle TTL), "sqlite" or "kv" (the shared KV store)
+        self.SESSION_BACKEND = _choice(env, "SESSION_BACKEND", "memory", ("memory", "sqlite", "kv"))
+        self.SESSION_PATH = env.get("SESSION_PATH", "sessions.db")
+        self.SESSION_MAX_SESSIONS = _int(env, "SESSION_MAX_SESSIONS", 10000)
+        self.SESSION_TTL = _int(env, "SESSION_TTL", 2 * 3600)
+
+        # Questions per quiz and how hard they should be: "easy", "medium" or "hard"
+        self.QUIZ_LENGTH = _int(env, "QUIZ_LENGTH", 10)
+        if self.QUIZ_LENGTH < 1:
+            raise ValueError(f"QUIZ_LENGTH must be at least 1, got {self.QUIZ_LENGTH}")
+        self.QUIZ_DIFFICULTY = _choice(env, "QUIZ_DIFFICULTY", "medium", ("easy", "medium", "hard"))
+
+        # Per-answer event log for analytics (Parquet files, one directory per day; "" = off),
+        # written in batches like the results
+        self.ANSWER_LOG_DIR = env.get("ANSWER_LOG_DIR", "answer_log")
+        self.ANSWER_LOG_BATCH_SIZE = _int(env, "ANSWER_LOG_BATCH_SIZE", 1000)
+        self.ANSWER_LOG_FLUSH_INTERVAL = _float(env, "ANSWER_LOG_FLUSH_INTERVAL", 30)
+
+        # Follow-up calls allowed to replace questions lost from a truncated or partly invalid reply
+        self.QUIZ_REPAIR_ATTEMPTS = _int(env, "QUIZ_REPAIR_ATTEMPTS", 1)
+
+        # Log level; DEBUG adds per-question and per-request detail at a noticeable cost
+        self.LOG_LEVEL = env.get("LOG_LEVEL", "INFO").upper()
+
+        # Prometheus metrics at http://METRICS_HOST:METRICS_PORT/metrics; off unless a port is set.
+        # The endpoint has no authentication.
+        self.METRICS_PORT = _int(env, "METRICS_PORT", 0)
+        self.METRICS_HOST = env.get("METRICS_HOST", "127.0.0.1")
+
+    def require_api_key(self):
+        if not self.OPENAI_API_KEY:
+            raise ValueError(API_KEY_MISSING)
+        return self.OPENAI_API_KEY
+
+
+_settings = None
+_lock = threading.Lock()
+
+
+# The process-wide settings, read from the environment and any .env file on first use
+def get_settings():
+    global _settings
+    if _settings is None:
+        with _lock:
+            if _settings is None:
+                from dotenv import load_dotenv
+                load_dotenv()
+                settings = Settings()
+                # Copy them onto this module so later `config.NAME` reads are plain lookups
+                globals().update(vars(settings))
+                _settings = settings
+    return _settings
+
+
+# `config.NAME` loads the settings the first time any of them is read
+def __getattr__(name):
+    if name.isupper() and name != "API_KEY_MISSING":
+        settings = get_settings()
+        if hasattr(settings, name):
+            return getattr(settings, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
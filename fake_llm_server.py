@@ -0,0 +1,182 @@
+import argparse
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+import uuid
+import logging
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+logger = logging.getLogger(__name__)
+
+QUIZ_PROMPT_PATTERN = re.compile(r"Generate exactly (\d+) multiple-choice questions on the topic '(.*?)'", re.S)
+
+
+# Rough token count, close enough for benchmark accounting
+def count_tokens(text):
+    return max(1, len(text) // 4)
+
+
+# A unique, valid quiz question; the random id keeps the question bank from deduplicating it away
+def fake_question(topic, rng):
+    numbers = rng.sample(range(1, 100), 4)
+    correct = rng.choice("ABCD")
+    return {
+        "question": f"[{topic}] Which option is {numbers['ABCD'.index(correct)]}? ({uuid.uuid4().hex[:8]})",
+        "options": dict(zip("ABCD", (str(n) for n in numbers))),
+        "correct_answer": correct,
+        "explanation": f"Option {correct} holds the number asked for."
+    }
+
+
+class FakeLLM:
+    """Answers OpenAI chat completion requests with made-up quizzes and feedback.
+
+    Every reply waits `latency` seconds (normally distributed with `jitter`)
+    before the first byte, then `chunk_delay` per streamed chunk; unstreamed
+    replies wait for the whole generation. A `malformed_rate` share of quiz
+    replies is cut off part way, like a reply that hit the token limit. An
+    `error_rate` share of requests fails with a 500, and a `slow_rate` share
+    waits `slow_delay` seconds longer, to exercise retries and hedging.
+    """
+
+    def __init__(self, latency=0.5, jitter=0.1, chunk_delay=0.01, chunk_size=40, malformed_rate=0.0, seed=None,
+                 error_rate=0.0, slow_rate=0.0, slow_delay=5.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.chunk_delay = chunk_delay
+        self.chunk_size = chunk_size
+        self.malformed_rate = malformed_rate
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.slow_delay = slow_delay
+        self.rng = random.Random(seed)
+        self.stats = {"requests": 0, "streamed": 0, "malformed": 0, "errors": 0, "slow": 0}
+
+    def reply_text(self, prompt):
+        match = QUIZ_PROMPT_PATTERN.search(prompt)
+        if match is None:
+            return "Good effort! Review the explanations for the questions you missed and try again."
+        count, topic = int(match.group(1)), match.group(2)
+        text = json.dumps([fake_question(topic, self.rng) for _ in range(count)], indent=2)
+        if self.rng.random() < self.malformed_rate:
+            self.stats["malformed"] += 1
+            text = text[:self.rng.randint(len(text) // 2, len(text) - 2)]
+        return text
+
+    def first_byte_delay(self):
+        delay = max(0.0, self.rng.gauss(self.latency, self.jitter))
+        if self.rng.random() < self.slow_rate:
+            self.stats["slow"] += 1
+            delay += self.slow_delay
+        return delay
+
+    def chunks(self, text):
+        return [text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)]
+
+    async def chat_completions(self, request):
+        body = await request.json()
+        if self.rng.random() < self.error_rate:
+            self.stats["errors"] += 1
+            await asyncio.sleep(self.first_byte_delay())
+            return JSONResponse(
+                {"error": {"message": "The server had an error processing your request.", "type": "server_error"}},
+                status_code=500
+            )
+        prompt = "\n".join(str(m.get("content", "")) for m in body.get("messages", []))
+        text = self.reply_text(prompt)
+        self.stats["requests"] += 1
+        model = body.get("model", "fake")
+        usage = {
+            "prompt_tokens": count_tokens(prompt),
+            "completion_tokens": count_tokens(text),
+            "total_tokens": count_tokens(prompt) + count_tokens(text)
+        }
+        delay = self.first_byte_delay()
+        if body.get("stream"):
+            self.stats["streamed"] += 1
+            include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+            return StreamingResponse(
+                self._stream(text, model, delay, usage if include_usage else None), media_type="text/event-stream"
+            )
+        await asyncio.sleep(delay + self.chunk_delay * len(self.chunks(text)))
+        return JSONResponse({
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": usage
+        })
+
+    async def _stream(self, text, model, delay, usage):
+        chunk_id = f"chatcmpl-{uuid.uuid4().hex}"
+
+        def event(choices, **extra):
+            payload = {
+                "id": chunk_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                "model": model, "choices": choices, **extra
+            }
+            return f"data: {json.dumps(payload)}\n\n"
+
+        await asyncio.sleep(delay)
+        for i, piece in enumerate(self.chunks(text)):
+            if i:
+                await asyncio.sleep(self.chunk_delay)
+            delta = {"content": piece} if i else {"role": "assistant", "content": piece}
+            yield event([{"index": 0, "delta": delta, "finish_reason": None}])
+        yield event([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+        if usage is not None:
+            yield event([], usage=usage)
+        yield "data: [DONE]\n\n"
+
+
+def create_app(llm):
+    return Starlette(routes=[Route("/v1/chat/completions", llm.chat_completions, methods=["POST"])])
+
+
+# Run the fake server in a background thread; returns the uvicorn server and its base URL for OpenAI clients
+def start_server(llm, host="127.0.0.1", port=0):
+    server = uvicorn.Server(uvicorn.Config(create_app(llm), host=host, port=port, log_level="warning"))
+    threading.Thread(target=server.run, name="fake-llm", daemon=True).start()
+    deadline = time.monotonic() + 10
+    while not server.started:
+        if time.monotonic() > deadline:
+            raise RuntimeError("Fake LLM server did not start")
+        time.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    return server, f"http://{host}:{port}/v1"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve an OpenAI-compatible stand-in for benchmarks.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.5, help="Mean seconds before the first byte")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Standard deviation of the latency")
+    parser.add_argument("--chunk-delay", type=float, default=0.01, help="Seconds between streamed chunks")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="Share of quiz replies cut off part way")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests that fail with a 500")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="Share of requests delayed by --slow-delay")
+    parser.add_argument("--slow-delay", type=float, default=5.0)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+
+    llm = FakeLLM(
+        args.latency, args.jitter, args.chunk_delay, malformed_rate=args.malformed_rate, seed=args.seed,
+        error_rate=args.error_rate, slow_rate=args.slow_rate, slow_delay=args.slow_delay
+    )
+    logger.info(f"Point the app at it with OPENAI_BASE_URL=http://{args.host}:{args.port}/v1")
+    uvicorn.run(create_app(llm), host=args.host, port=args.port)
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    raise SystemExit(main())
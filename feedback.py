@@ -0,0 +1,78 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+
+# Stable id for a quiz's content, used to key cached feedback
+def quiz_id(quiz):
+    payload = json.dumps(quiz, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def _shorten(text, limit=80):
+    text = " ".join(str(text).split())
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+
+# Build 2-3 sentences of feedback from the per-question results, without any network call
+def local_feedback(score, total, correct_questions, incorrect_questions):
+    if total == 0:
+        return "No questions were answered, so there is nothing to review yet."
+    ratio = score / total
+    if score == total:
+        return (
+            f"Perfect score: you answered all {total} questions correctly! "
+            "Keep the momentum going by trying a harder or related topic."
+        )
+    if ratio >= 0.8:
+        sentences = [f"Excellent work: {score} of {total} correct."]
+    elif ratio >= 0.5:
+        sentences = [f"Good effort: {score} of {total} correct, with a solid base to build on."]
+    else:
+        sentences = [f"You got {score} of {total} this time, so there is plenty of room to grow."]
+    if correct_questions:
+        sentences.append(f"You handled questions like \"{_shorten(correct_questions[0]['question'])}\" well.")
+    unanswered = [q for q in incorrect_questions if q["user_answer"] == "Not answered"]
+    missed = [q for q in incorrect_questions if q["user_answer"] != "Not answered"]
+    if missed:
+        sentences.append(f"To improve, review this point: {_shorten(missed[0]['explanation'], 160)}")
+    elif unanswered:
+        sentences.append(f"You left {len(unanswered)} question(s) unanswered; attempting every question gives you more to learn from.")
+    return " ".join(sentences)
+
+
+class FeedbackCache:
+    """Bounded LRU cache of LLM feedback keyed by (quiz id, answer vector)."""
+
+    def __init__(self, max_entries=1000):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(quiz, user_answers):
+        return (quiz_id(quiz), tuple(user_answers))
+
+    def get(self, key):
+        with self._lock:
+            feedback = self._entries.get(key)
+            if feedback is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return feedback
+
+    def put(self, key, feedback):
+        with self._lock:
+            self._entries[key] = feedback
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
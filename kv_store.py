@@ -0,0 +1,338 @@
+import abc
+import json
+import sqlite3
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class KeyValueStore(abc.ABC):
+    """Interface for the key-value backend shared by app workers.
+
+    Values must be JSON-serializable. `ttl` is in seconds; keys without a
+    ttl never expire. `add` only sets a key that does not exist yet and
+    returns whether it did, so workers can use it to claim work. `touch`
+    restarts a live key's ttl without rewriting its value and returns
+    whether the key was there.
+
+    A key can instead hold an integer counter, changed with `incr`, or a
+    list that only grows, written with `append` and read by index with
+    `items`. Use each key for one kind of value. Lists never expire.
+    """
+
+    @abc.abstractmethod
+    def get(self, key):
+        pass
+
+    @abc.abstractmethod
+    def set(self, key, value, ttl=None):
+        pass
+
+    @abc.abstractmethod
+    def add(self, key, value, ttl=None):
+        pass
+
+    @abc.abstractmethod
+    def touch(self, key, ttl):
+        pass
+
+    @abc.abstractmethod
+    def delete(self, key):
+        pass
+
+    # Add `amount` to the counter at `key` (a missing key counts as 0) and return the new value
+    @abc.abstractmethod
+    def incr(self, key, amount=1):
+        pass
+
+    # Add `value` to the end of the list at `key` and return the list's new length
+    @abc.abstractmethod
+    def append(self, key, value):
+        pass
+
+    # Values of the list at `key` from index `start` up to, not including, `stop`
+    @abc.abstractmethod
+    def items(self, key, start=0, stop=None):
+        pass
+
+    @abc.abstractmethod
+    def length(self, key):
+        pass
+
+    def close(self):
+        pass
+
+
+class MemoryKeyValueStore(KeyValueStore):
+    """In-process store for a single worker.
+
+    Expired keys are dropped when read, and all expired keys are purged
+    every `prune_every` writes, so keys that are never read again (such as
+    once-only claims) don't pile up.
+    """
+
+    def __init__(self, prune_every=500):
+        self.prune_every = prune_every
+        self._writes = 0
+        self._entries = {}
+        self._lists = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _live(self, key, now):
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= now:
+            del self._entries[key]
+            return None
+        return entry
+
+    def _written(self, now):
+        self._writes += 1
+        if self._writes % self.prune_every == 0:
+            expired = [key for key, (_, expires_at) in self._entries.items() if expires_at is not None and expires_at <= now]
+            for key in expired:
+                del self._entries[key]
+
+    def get(self, key):
+        with self._lock:
+            entry = self._live(key, time.time())
+            return None if entry is None else json.loads(entry[0])
+
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        with self._lock:
+            self._entries[key] = (json.dumps(value), now + ttl if ttl else None)
+            self._written(now)
+
+    def add(self, key, value, ttl=None):
+        now = time.time()
+        with self._lock:
+            if self._live(key, now) is not None:
+                return False
+            self._entries[key] = (json.dumps(value), now + ttl if ttl else None)
+            self._written(now)
+            return True
+
+    def touch(self, key, ttl):
+        now = time.time()
+        with self._lock:
+            entry = self._live(key, now)
+            if entry is None:
+                return False
+            self._entries[key] = (entry[0], now + ttl)
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._lists.pop(key, None)
+
+    def incr(self, key, amount=1):
+        now = time.time()
+        with self._lock:
+            entry = self._live(key, now)
+            value = (json.loads(entry[0]) if entry else 0) + amount
+            self._entries[key] = (json.dumps(value), entry[1] if entry else None)
+            self._written(now)
+            return value
+
+    def append(self, key, value):
+        with self._lock:
+            values = self._lists.setdefault(key, [])
+            values.append(json.dumps(value))
+            return len(values)
+
+    def items(self, key, start=0, stop=None):
+        with self._lock:
+            values = self._lists.get(key, [])[start:stop]
+        return [json.loads(value) for value in values]
+
+    def length(self, key):
+        with self._lock:
+            return len(self._lists.get(key, ()))
+
+
+class SQLiteKeyValueStore(KeyValueStore):
+    """Store in a SQLite file, shared by every worker on the same host.
+
+    Expired rows are purged every `prune_every` writes.
+    """
+
+    def __init__(self, path, prune_every=500):
+        self.path = path
+        self.prune_every = prune_every
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS kv (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    expires_at REAL
+                )
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS kv_lists (
+                    key TEXT NOT NULL,
+                    idx INTEGER NOT NULL,
+                    value TEXT NOT NULL,
+                    PRIMARY KEY (key, idx)
+                )
+                """
+            )
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM kv WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)", (key, time.time())
+            ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def _written(self, now):
+        self._writes += 1
+        if self._writes % self.prune_every == 0:
+            self._conn.execute("DELETE FROM kv WHERE expires_at <= ?", (now,))
+
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), now + ttl if ttl else None),
+            )
+            self._written(now)
+
+    def add(self, key, value, ttl=None):
+        now = time.time()
+        with self._lock, self._conn:
+            # An expired row doesn't count as present
+            self._conn.execute("DELETE FROM kv WHERE key = ? AND expires_at <= ?", (key, now))
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), now + ttl if ttl else None),
+            )
+            self._written(now)
+            return cursor.rowcount == 1
+
+    def touch(self, key, ttl):
+        now = time.time()
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE kv SET expires_at = ? WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (now + ttl, key, now),
+            )
+            return cursor.rowcount == 1
+
+    def delete(self, key):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM kv WHERE key = ?", (key,))
+            self._conn.execute("DELETE FROM kv_lists WHERE key = ?", (key,))
+
+    # Each of these is one write transaction, so workers sharing the file can't interleave them
+    def incr(self, key, amount=1):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM kv WHERE key = ? AND expires_at <= ?", (key, now))
+            self._conn.execute(
+                """
+                INSERT INTO kv (key, value, expires_at) VALUES (?, ?, NULL)
+                ON CONFLICT (key) DO UPDATE SET value = CAST(value AS INTEGER) + CAST(excluded.value AS INTEGER)
+                """,
+                (key, str(amount)),
+            )
+            return int(self._conn.execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()[0])
+
+    def append(self, key, value):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO kv_lists (key, idx, value) SELECT ?, COALESCE(MAX(idx), -1) + 1, ? FROM kv_lists WHERE key = ?",
+                (key, json.dumps(value), key),
+            )
+            return self._conn.execute("SELECT MAX(idx) + 1 FROM kv_lists WHERE key = ?", (key,)).fetchone()[0]
+
+    def items(self, key, start=0, stop=None):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT value FROM kv_lists WHERE key = ? AND idx >= ? AND (? IS NULL OR idx < ?) ORDER BY idx",
+                (key, start, stop, stop),
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def length(self, key):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM kv_lists WHERE key = ?", (key,)).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class RedisKeyValueStore(KeyValueStore):
+    """Store on a Redis server, shared by workers on any host.
+
+    Pass `client` to use an existing (or stand-in) client exposing Redis'
+    `get`, `set(..., ex=, nx=)`, `expire`, `delete`, `incrby`, `rpush`,
+    `lrange` and `llen`; otherwise one is created from
+    `url`, which needs the optional `redis` package. Keys are namespaced
+    with `prefix`.
+    """
+
+    def __init__(self, url=None, client=None, prefix="quizcraft:"):
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url)
+        self._client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self._client.get(self.prefix + key)
+        return None if value is None else json.loads(value)
+
+    def set(self, key, value, ttl=None):
+        self._client.set(self.prefix + key, json.dumps(value), ex=int(ttl) if ttl else None)
+
+    def add(self, key, value, ttl=None):
+        return bool(self._client.set(self.prefix + key, json.dumps(value), ex=int(ttl) if ttl else None, nx=True))
+
+    def touch(self, key, ttl):
+        return bool(self._client.expire(self.prefix + key, int(ttl)))
+
+    def delete(self, key):
+        self._client.delete(self.prefix + key)
+
+    def incr(self, key, amount=1):
+        return self._client.incrby(self.prefix + key, amount)
+
+    def append(self, key, value):
+        return self._client.rpush(self.prefix + key, json.dumps(value))
+
+    def items(self, key, start=0, stop=None):
+        if stop is not None and stop <= start:
+            return []
+        values = self._client.lrange(self.prefix + key, start, -1 if stop is None else stop - 1)
+        return [json.loads(value) for value in values]
+
+    def length(self, key):
+        return self._client.llen(self.prefix + key)
+
+    def close(self):
+        self._client.close()
+
+
+def create_kv_store(backend, path=None, url=None):
+    if backend == "memory":
+        return MemoryKeyValueStore()
+    if backend == "sqlite":
+        return SQLiteKeyValueStore(path)
+    if backend == "redis":
+        return RedisKeyValueStore(url)
+    raise ValueError(f"Unknown key-value backend: {backend}")
@@ -0,0 +1,50 @@
+import threading
+
+
+class Lazy:
+    """Stands in for an object that is built by `factory` on first use.
+
+    Attribute reads and writes are forwarded to the real object, so callers
+    use it as usual; building it (importing a library, opening a file, starting a
+    thread) waits until the first call.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._target = None
+        self._lock = threading.Lock()
+
+    def _get(self):
+        if self._target is None:
+            with self._lock:
+                if self._target is None:
+                    self._target = self._factory()
+        return self._target
+
+    def __getattr__(self, name):
+        # Probes for special or private attributes (copy, mock, asyncio) shouldn't build the object
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self._get(), name)
+
+    def __setattr__(self, name, value):
+        if name.startswith("_"):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._get(), name, value)
+
+    def __delattr__(self, name):
+        if name.startswith("_"):
+            object.__delattr__(self, name)
+        else:
+            delattr(self._get(), name)
+
+
+# Whether `obj` is ready to use without building anything: a plain object, or a Lazy already built
+def is_built(obj):
+    return not isinstance(obj, Lazy) or obj._target is not None
+
+
+# The object behind `obj`, building it now if it is a Lazy that hasn't been used yet
+def build(obj):
+    return obj._get() if isinstance(obj, Lazy) else obj
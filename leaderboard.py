@@ -0,0 +1,167 @@
+import heapq
+import itertools
+import threading
+import time
+import logging
+from datetime import datetime, timedelta
+
+from quiz_cache import normalize_topic
+
+logger = logging.getLogger(__name__)
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+WINDOWS = ("daily", "weekly")
+
+
+# Start of the window containing `now`, as a store timestamp string
+def window_start(window, now=None):
+    now = now or datetime.now()
+    start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    if window == "weekly":
+        start -= timedelta(days=start.weekday())
+    elif window != "daily":
+        raise ValueError(f"Unknown leaderboard window: {window}")
+    return start.strftime(TIMESTAMP_FORMAT)
+
+
+class TopK:
+    """Bounded min-heap holding the k best rows; adding a row is O(log k).
+
+    Higher scores win, then earlier timestamps, then earlier insertions.
+    """
+
+    def __init__(self, k):
+        self.k = k
+        self._heap = []
+        self._seq = itertools.count()
+
+    def add(self, row):
+        timestamp = int("".join(ch for ch in row["Timestamp"] if ch.isdigit()) or 0)
+        entry = (row["Score"], -timestamp, -next(self._seq), row)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry[:3] > self._heap[0][:3]:
+            heapq.heapreplace(self._heap, entry)
+
+    def rows(self):
+        return [entry[3] for entry in sorted(self._heap, key=lambda e: e[:3], reverse=True)]
+
+
+class Leaderboard:
+    """In-memory leaderboards kept current by `add`, so reads never touch disk.
+
+    Holds an all-time board, one board per topic and one per daily/weekly
+    window. Only the current window of each kind is kept; a new day or week
+    starts an empty board. `refresh` adds rows that reached the store from
+    elsewhere, such as other workers, reading only rows newer than the last
+    one it has seen; `start_refresh` runs it on a background thread.
+    """
+
+    def __init__(self, k=10):
+        self.k = k
+        self.last_id = 0
+        self._lock = threading.Lock()
+        self._all = TopK(k)
+        self._topics = {}
+        self._windows = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    # Seed the boards from the results store using its indexed top-k queries
+    def load(self, store, now=None):
+        # Read first: rows added during the queries below are picked up again by refresh, which skips
+        # any already on a board
+        last_id = store.last_id()
+        with self._lock:
+            self.last_id = last_id
+            self._all = TopK(self.k)
+            self._topics = {}
+            self._windows = {}
+            for row in store.top(self.k):
+                self._all.add(row)
+            for topic, rows in store.top_per_topic(self.k).items():
+                board = self._topics.setdefault(topic, TopK(self.k))
+                for row in rows:
+                    board.add(row)
+            for window in WINDOWS:
+                start = window_start(window, now)
+                board = self._windows[window] = (start, TopK(self.k))
+                for row in store.top(self.k, since=start):
+                    board[1].add(row)
+
+    def add(self, row):
+        with self._lock:
+            self._add(row)
+
+    def _add(self, row):
+        self._all.add(row)
+        if row.get("Topic"):
+            self._topics.setdefault(normalize_topic(row["Topic"]), TopK(self.k)).add(row)
+        for window in WINDOWS:
+            start = window_start(window)
+            if row["Timestamp"] >= start:
+                self._window_board(window, start).add(row)
+
+    # Add rows written to `store` since the last load or refresh and return how many were read.
+    # Rows that `store` marks as its own were written by this process and are already on the boards.
+    def refresh(self, store, batch_size=1000):
+        read = 0
+        while True:
+            rows = store.rows_after(self.last_id, batch_size)
+            with self._lock:
+                for _, row, own in rows:
+                    if not own:
+                        self._add(row)
+                if rows:
+                    self.last_id = rows[-1][0]
+            read += len(rows)
+            if len(rows) < batch_size:
+                return read
+
+    # Call refresh(store) every `interval` seconds on a background thread, then on_refresh(rows, seconds)
+    def start_refresh(self, store, interval, on_refresh=None):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._refresh_loop, args=(store, interval, on_refresh), name="leaderboard-refresh", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def _refresh_loop(self, store, interval, on_refresh):
+        while not self._stop.wait(interval):
+            start = time.perf_counter()
+            try:
+                read = self.refresh(store)
+            except Exception as e:
+                logger.error(f"Leaderboard refresh failed: {str(e)}")
+                continue
+            if on_refresh is not None:
+                on_refresh(read, time.perf_counter() - start)
+
+    def stop_refresh(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def _window_board(self, window, start):
+        current = self._windows.get(window)
+        if current is None or current[0] != start:
+            current = self._windows[window] = (start, TopK(self.k))
+        return current[1]
+
+    # Best rows overall, for one topic, or for the current daily or weekly window
+    def top(self, topic=None, window=None, now=None):
+        if topic is not None and window is not None:
+            raise ValueError("Leaderboards are kept per topic or per window, not both")
+        with self._lock:
+            if window is not None:
+                current = self._windows.get(window)
+                if current is None or current[0] != window_start(window, now):
+                    return []
+                return current[1].rows()
+            if topic is not None:
+                board = self._topics.get(normalize_topic(topic))
+                return board.rows() if board else []
+            return self._all.rows()
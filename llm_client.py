@@ -0,0 +1,339 @@
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, asynccontextmanager
+
+from lazy import Lazy
+
+
+class InFlightLimiter:
+    """Caps the number of LLM calls in flight across threads and the event loop.
+
+    Background workers use the blocking `slot()`; async Gradio handlers use
+    `async_slot()`, which polls instead of parking a thread so a saturated
+    limiter never blocks the event loop.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self._semaphore = threading.BoundedSemaphore(limit)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+
+    def _acquired(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+        self._semaphore.release()
+
+    def acquire(self, timeout=None):
+        if not self._semaphore.acquire(timeout=timeout):
+            raise TimeoutError(f"Timed out waiting for one of {self.limit} LLM call slots")
+        self._acquired()
+
+    async def acquire_async(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        delay = 0.005
+        while not self._semaphore.acquire(blocking=False):
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"Timed out waiting for one of {self.limit} LLM call slots")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.05)
+        self._acquired()
+
+    @contextmanager
+    def slot(self, timeout=None):
+        self.acquire(timeout)
+        try:
+            yield
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def async_slot(self, timeout=None):
+        await self.acquire_async(timeout)
+        try:
+            yield
+        finally:
+            self.release()
+
+
+class LazyClient(Lazy):
+    """An LLM client built on first use, so openai is only imported when the first call is made."""
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the LLM while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Stops calling an upstream that keeps failing.
+
+    After `threshold` failures in a row the circuit opens and calls are
+    refused for `reset_timeout` seconds. Then a single trial call is let
+    through (half-open): success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, threshold=5, reset_timeout=30, clock=time.monotonic):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+
+    def _state(self):
+        if self.opened_at is None:
+            return "closed"
+        if self._clock() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    # The state a call was admitted in, or None if it must not be made
+    def allow(self):
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return state
+            if state == "half-open" and not self._trial:
+                self._trial = True
+                return state
+            return None
+
+    def success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.threshold:
+                self.opened_at = self._clock()
+            self._trial = False
+
+    # A trial call ended without an answer either way, e.g. it was cancelled; let another one try
+    def abandon(self):
+        with self._lock:
+            self._trial = False
+
+
+# Errors worth another attempt: timeouts, dropped connections, rate limits and server errors.
+# openai's connection and timeout errors carry no status code, so they are matched by name.
+def is_retryable(error):
+    if isinstance(error, CircuitOpenError):
+        return False
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    status = getattr(error, "status_code", None)
+    if isinstance(status, int):
+        return status in (408, 409, 429) or status >= 500
+    return any(cls.__name__ == "APIConnectionError" for cls in type(error).__mro__)
+
+
+class ResilientCaller:
+    """Makes one kind of LLM request with retries, deadlines, hedging and a circuit breaker.
+
+    `request(timeout)` makes a single attempt that gives up after `timeout`
+    seconds. Attempts that failed in a retryable way are repeated after an
+    exponential backoff with full jitter, and every attempt and wait fits in
+    `deadline` seconds. With `hedge` on, `acall` starts a duplicate attempt
+    once the first has taken longer than the recent p95 latency and keeps
+    whichever answers first. The breaker is usually shared by all callers of
+    one upstream; `on_event` is called with "retry", "hedge" or "rejected".
+    """
+
+    def __init__(self, breaker, limiter=None, retries=2, attempt_timeout=20, deadline=45, backoff=0.5,
+                 max_backoff=4, hedge=False, min_hedge_delay=1.0, queue_timeout=None, on_event=None, rng=None):
+        self.breaker = breaker
+        self.limiter = limiter
+        self.retries = retries
+        self.attempt_timeout = attempt_timeout
+        self.deadline = deadline
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.hedge = hedge
+        self.min_hedge_delay = min_hedge_delay
+        self.queue_timeout = queue_timeout
+        self.on_event = on_event
+        self._rng = rng or random.Random()
+        # Latencies of recent successful attempts, for the hedging threshold
+        self._latencies = deque(maxlen=200)
+
+    def _event(self, name):
+        if self.on_event is not None:
+            self.on_event(name)
+
+    # p95 of recent attempt latencies, or None until there are enough to go on
+    def p95(self):
+        latencies = sorted(self._latencies)
+        if len(latencies) < 20:
+            return None
+        return latencies[int(len(latencies) * 0.95) - 1]
+
+    # Seconds to wait for the first attempt before hedging, or None not to hedge
+    def hedge_delay(self):
+        p95 = self.p95() if self.hedge else None
+        return None if p95 is None else max(self.min_hedge_delay, p95)
+
+    # Seconds to wait before retry number `attempt`, or None if the deadline leaves no time for it
+    def _retry_delay(self, error, attempt, deadline):
+        if attempt > self.retries or not is_retryable(error):
+            return None
+        delay = self._rng.uniform(0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1)))
+        if time.monotonic() + delay >= deadline:
+            return None
+        self._event("retry")
+        return delay
+
+    # Time an attempt may queue for an in-flight slot; never past the deadline
+    def _queue_timeout(self, deadline):
+        remaining = max(0, deadline - time.monotonic())
+        return remaining if self.queue_timeout is None else min(self.queue_timeout, remaining)
+
+    def _admit(self, deadline):
+        timeout = min(self.attempt_timeout, deadline - time.monotonic())
+        if timeout <= 0:
+            raise TimeoutError("LLM call deadline passed")
+        admitted = self.breaker.allow()
+        if admitted is None:
+            self._event("rejected")
+            raise CircuitOpenError("LLM circuit breaker is open")
+        return admitted, timeout
+
+    # Tell the breaker how an attempt went; non-retryable errors mean the upstream did answer
+    def _record(self, error, start):
+        if error is None:
+            self._latencies.append(time.monotonic() - start)
+            self.breaker.success()
+        elif is_retryable(error):
+            self.breaker.failure()
+        else:
+            self.breaker.success()
+
+    def _attempt(self, request, deadline):
+        admitted, timeout = self._admit(deadline)
+        start = time.monotonic()
+        try:
+            result = request(timeout)
+        except Exception as e:
+            self._record(e, start)
+            raise
+        except BaseException:
+            if admitted == "half-open":
+                self.breaker.abandon()
+            raise
+        self._record(None, start)
+        return result
+
+    def call(self, request):
+        deadline = time.monotonic() + self.deadline
+        attempt = 0
+        while True:
+            try:
+                if self.limiter is None:
+                    return self._attempt(request, deadline)
+                with self.limiter.slot(self._queue_timeout(deadline)):
+                    return self._attempt(request, deadline)
+            except Exception as e:
+                attempt += 1
+                delay = self._retry_delay(e, attempt, deadline)
+                if delay is None:
+                    raise
+            time.sleep(delay)
+
+    async def _aattempt(self, request, deadline):
+        if self.limiter is not None:
+            async with self.limiter.async_slot(self._queue_timeout(deadline)):
+                return await self._aattempt_now(request, deadline)
+        return await self._aattempt_now(request, deadline)
+
+    async def _aattempt_now(self, request, deadline):
+        admitted, timeout = self._admit(deadline)
+        start = time.monotonic()
+        try:
+            # The client timeout bounds each read; wait_for bounds the whole attempt
+            result = await asyncio.wait_for(request(timeout), timeout)
+        except Exception as e:
+            self._record(e, start)
+            raise
+        except BaseException:
+            if admitted == "half-open":
+                self.breaker.abandon()
+            raise
+        self._record(None, start)
+        return result
+
+    # One attempt, plus a duplicate if it runs past the hedging delay; the first answer wins
+    async def _ahedged(self, request, deadline):
+        delay = self.hedge_delay()
+        if delay is None:
+            return await self._aattempt(request, deadline)
+        first = asyncio.ensure_future(self._aattempt(request, deadline))
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done:
+            return first.result()
+        self._event("hedge")
+        pending = {first, asyncio.ensure_future(self._aattempt(request, deadline))}
+        errors = []
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    errors.append(task.exception())
+        finally:
+            for task in pending:
+                task.cancel()
+        # Prefer the error of a real attempt over the duplicate being refused by the breaker
+        raise next((e for e in errors if not isinstance(e, CircuitOpenError)), errors[0])
+
+    async def acall(self, request):
+        deadline = time.monotonic() + self.deadline
+        attempt = 0
+        while True:
+            try:
+                return await self._ahedged(request, deadline)
+            except Exception as e:
+                attempt += 1
+                delay = self._retry_delay(e, attempt, deadline)
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
+
+
+# Create sync and async OpenAI clients that each reuse a pooled HTTP connection set.
+# Both are lazy, so importing the app neither imports openai nor needs an API key.
+# Pass max_retries=0 when the calls go through a ResilientCaller, which does its own retrying.
+def create_clients(api_key, max_connections=20, timeout=60, max_retries=2):
+    def limits():
+        import httpx
+        return httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+
+    def sync_client():
+        from openai import OpenAI, DefaultHttpxClient
+        return OpenAI(
+            api_key=api_key, timeout=timeout, max_retries=max_retries, http_client=DefaultHttpxClient(limits=limits())
+        )
+
+    def async_client():
+        from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+        return AsyncOpenAI(
+            api_key=api_key, timeout=timeout, max_retries=max_retries,
+            http_client=DefaultAsyncHttpxClient(limits=limits())
+        )
+
+    return LazyClient(sync_client), LazyClient(async_client)
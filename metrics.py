@@ -0,0 +1,229 @@
+import math
+import threading
+import time
+import logging
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds, from sub-millisecond store reads up to slow LLM calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (
+        (k, str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')) for k, v in labels
+    )
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+class _LabeledMetric:
+    """One series per combination of label values, kept in `_values`."""
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple((name, labels.get(name, "")) for name in self.labelnames)
+
+
+class Counter(_LabeledMetric):
+    """Monotonic total, one series per combination of label values.
+
+    By Prometheus convention the name should end in `_total`.
+    """
+
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in sorted(self._values.items())]
+
+
+class Histogram(_LabeledMetric):
+    """Latency histogram with cumulative buckets, as Prometheus expects.
+
+    Observing walks a dozen bucket bounds under a lock, cheap enough to time
+    every request.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    # Time the body of a `with` block, in sync or async code
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels):
+        with self._lock:
+            series = self._values.get(self._key(labels))
+            return series[2] if series else 0
+
+    # (count, sum) of every series, keyed by its label values
+    def series(self):
+        with self._lock:
+            return {tuple(value for _, value in key): (s[2], s[1]) for key, s in self._values.items()}
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, n in zip(self.buckets, counts):
+                    cumulative += n
+                    samples.append((self.name + "_bucket", key + (("le", _format_value(bound)),), cumulative))
+                samples.append((self.name + "_sum", key, total))
+                samples.append((self.name + "_count", key, count))
+        return samples
+
+
+class Gauge:
+    """Current value read from a callback when the metrics are scraped."""
+
+    kind = "gauge"
+
+    def __init__(self, name, help, fn):
+        self.name = name
+        self.help = help
+        self.fn = fn
+
+    def samples(self):
+        try:
+            return [(self.name, (), self.fn())]
+        except Exception as e:
+            logger.warning(f"Gauge {self.name} failed: {str(e)}")
+            return []
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._register(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def gauge(self, name, help, fn):
+        return self._register(Gauge(name, help, fn))
+
+    # All metrics in the Prometheus text exposition format
+    def render(self):
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# Metrics shared by the app's modules
+registry = MetricsRegistry()
+stage_seconds = registry.histogram(
+    "quiz_stage_seconds", "Time spent in each stage of serving a quiz", ["stage"]
+)
+handler_seconds = registry.histogram(
+    "quiz_handler_seconds", "Time to handle a UI event, end to end", ["handler"]
+)
+llm_tokens = registry.counter("quiz_llm_tokens_total", "LLM tokens used", ["call", "direction"])
+llm_errors = registry.counter("quiz_llm_errors_total", "Failed LLM calls", ["call"])
+llm_events = registry.counter(
+    "quiz_llm_events_total", "LLM retries, hedged requests and calls refused by the circuit breaker", ["call", "event"]
+)
+
+
+# Shorthand for timing a stage: `with timed("parse_quiz"): ...`
+def timed(stage):
+    return stage_seconds.time(stage=stage)
+
+
+# Count the tokens reported by an OpenAI response or final stream chunk
+def record_usage(call, usage):
+    prompt_tokens = getattr(usage, "prompt_tokens", None)
+    completion_tokens = getattr(usage, "completion_tokens", None)
+    if isinstance(prompt_tokens, int):
+        llm_tokens.inc(prompt_tokens, call=call, direction="in")
+    if isinstance(completion_tokens, int):
+        llm_tokens.inc(completion_tokens, call=call, direction="out")
+
+
+# Serve `registry` at /metrics from a background thread; returns the server so it can be shut down
+def start_metrics_server(port, host="127.0.0.1", registry=registry):
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info(f"Serving metrics on http://{host}:{server.server_address[1]}/metrics")
+    return server
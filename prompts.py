@@ -0,0 +1,87 @@
+import math
+
+# Extra instruction added to the quiz prompt for each difficulty
+DIFFICULTIES = {
+    "easy": "Keep the questions introductory: core terms and well-known facts.",
+    "medium": "Mix basic recall with questions that need some understanding of the topic.",
+    "hard": "Make the questions challenging: specifics, edge cases and reasoning beyond recall."
+}
+
+# English text averages about four characters per token, close enough to budget prompts without a tokenizer
+CHARS_PER_TOKEN = 4
+# Reply tokens for one question (stem, four options, answer, one-sentence explanation) with some headroom,
+# plus the array brackets and any stray prose around them
+TOKENS_PER_QUESTION = 150
+REPLY_OVERHEAD_TOKENS = 50
+# Two or three sentences of feedback
+FEEDBACK_MAX_TOKENS = 150
+# Prompt tokens allowed for the "do not repeat" list and for the missed questions in a feedback prompt
+AVOID_TOKEN_BUDGET = 400
+FEEDBACK_TOKEN_BUDGET = 300
+
+QUIZ_PROMPT = """Generate exactly {count} multiple-choice questions on the topic '{topic}'. {difficulty}
+Reply with only a JSON array. Each item has "question", "options" (keys A, B, C, D), "correct_answer" (A, B, C or D) and "explanation" (one sentence). Example:
+[{{"question": "What is 2+2?", "options": {{"A": "3", "B": "4", "C": "5", "D": "6"}}, "correct_answer": "B", "explanation": "2+2 equals 4."}}]
+"""
+
+FEEDBACK_PROMPT = """The user scored {score} out of {total} on a quiz.
+{missed}
+Give concise feedback (2-3 sentences): note their performance, praise what went well and suggest what to review. If all answers are correct, congratulate them and encourage continued learning.
+"""
+
+
+# Rough token count of `text`
+def estimate_tokens(text):
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+# Collapse whitespace and cut `text` to at most `limit` characters
+def shorten(text, limit):
+    text = " ".join(str(text).split())
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+
+# Reply token cap for a quiz of `count` questions, so a runaway reply stops early and reserves less quota
+def quiz_max_tokens(count, limit=4000):
+    return min(limit, REPLY_OVERHEAD_TOKENS + TOKENS_PER_QUESTION * count)
+
+
+# As many `lines` as fit in `budget` tokens, in order
+def _within_budget(lines, budget):
+    kept, used = [], 0
+    for line in lines:
+        used += estimate_tokens(line) + 1
+        if used > budget:
+            break
+        kept.append(line)
+    return kept
+
+
+# The quiz generation prompt; `avoid` lists questions the reply must not repeat, most important first
+def build_quiz_prompt(topic, count, difficulty="medium", avoid=()):
+    prompt = QUIZ_PROMPT.format(topic=topic, count=count, difficulty=DIFFICULTIES[difficulty])
+    avoid = _within_budget([f"- {shorten(q, 80)}" for q in avoid], AVOID_TOKEN_BUDGET)
+    if avoid:
+        prompt += "Do not repeat any of these existing questions:\n" + "\n".join(avoid) + "\n"
+    return prompt
+
+
+# Compact summary of the missed questions: number, short stem, what was chosen and the gist of the explanation.
+# Correct answers are only counted; their text adds tokens without changing the advice.
+def summarize_missed(incorrect_questions):
+    lines = [
+        f"- Q{q.get('number', i + 1)}: {shorten(q['question'], 80)} "
+        f"(answered {q['user_answer']}, correct {q['correct_answer']}; {shorten(q['explanation'], 100)})"
+        for i, q in enumerate(incorrect_questions)
+    ]
+    kept = _within_budget(lines, FEEDBACK_TOKEN_BUDGET)
+    if len(kept) < len(lines):
+        kept.append(f"- and {len(lines) - len(kept)} more")
+    return kept
+
+
+# The feedback prompt, built from the missed questions of build_result
+def build_feedback_prompt(score, total, incorrect_questions):
+    missed = summarize_missed(incorrect_questions)
+    missed_text = "Missed questions:\n" + "\n".join(missed) if missed else "No questions were missed."
+    return FEEDBACK_PROMPT.format(score=score, total=total, missed=missed_text)
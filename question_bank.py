@@ -0,0 +1,246 @@
+import hashlib
+import json
+import random
+import re
+import sqlite3
+import threading
+import time
+import logging
+
+from quiz_cache import normalize_topic
+from quiz_validation import validate_question
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize_text(text):
+    return re.sub(r"\s+", " ", str(text).strip().lower())
+
+
+# Content hash that ignores case, spacing and the order of the options
+def question_hash(q):
+    options = sorted(_normalize_text(value) for value in q["options"].values())
+    payload = json.dumps([_normalize_text(q["question"]), options], ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class QuestionBank:
+    """SQLite store of individual questions, tagged by topic.
+
+    Questions are deduplicated by content hash, so the same question
+    generated for two topics is stored once with both tags. The bank records
+    which questions each user has seen, plus how often every question was
+    served and answered correctly, so quizzes can be assembled from
+    questions a user has not had before.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        # WAL and a busy timeout let several app workers share the file
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS questions (
+                hash TEXT PRIMARY KEY,
+                question TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                times_served INTEGER NOT NULL DEFAULT 0,
+                times_correct INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS question_topics (
+                topic TEXT NOT NULL,
+                hash TEXT NOT NULL,
+                PRIMARY KEY (topic, hash)
+            );
+            CREATE TABLE IF NOT EXISTS seen (
+                username TEXT NOT NULL,
+                hash TEXT NOT NULL,
+                seen_at REAL NOT NULL,
+                PRIMARY KEY (username, hash)
+            );
+            """
+        )
+        self._conn.commit()
+
+    # Store new questions under a topic; returns how many were not in the bank yet
+    def add(self, topic, questions):
+        topic = normalize_topic(topic)
+        now = time.time()
+        added = 0
+        with self._lock:
+            for q in questions:
+                q = validate_question(q)
+                if q is None:
+                    continue
+                h = question_hash(q)
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO questions (hash, question, created_at) VALUES (?, ?, ?)",
+                    (h, json.dumps(q), now),
+                )
+                added += cursor.rowcount
+                self._conn.execute("INSERT OR IGNORE INTO question_topics (topic, hash) VALUES (?, ?)", (topic, h))
+            self._conn.commit()
+        logger.debug(f"Question bank: {added} of {len(questions)} questions new for topic {topic}")
+        return added
+
+    # Up to `count` random questions for a topic, skipping any `username` has already seen
+    def assemble(self, topic, count, username=None):
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT q.question FROM question_topics t JOIN questions q ON q.hash = t.hash
+                WHERE t.topic = ?
+                  AND NOT EXISTS (SELECT 1 FROM seen s WHERE s.username = ? AND s.hash = t.hash)
+                ORDER BY RANDOM() LIMIT ?
+                """,
+                (normalize_topic(topic), username or "", count),
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    # The questions from `questions` that `username` has not seen yet
+    def unseen(self, username, questions):
+        if not username:
+            return list(questions)
+        with self._lock:
+            seen = {
+                row[0] for row in self._conn.execute("SELECT hash FROM seen WHERE username = ?", (username,))
+            }
+        return [q for q in questions if question_hash(q) not in seen]
+
+    # Question texts from a topic that `username` has seen, newest first, to keep out of new prompts
+    def seen_questions(self, topic, username, limit=20):
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT q.question FROM seen s
+                JOIN question_topics t ON t.hash = s.hash AND t.topic = ?
+                JOIN questions q ON q.hash = s.hash
+                WHERE s.username = ?
+                ORDER BY s.seen_at DESC LIMIT ?
+                """,
+                (normalize_topic(topic), username, limit),
+            ).fetchall()
+        return [json.loads(row[0])["question"] for row in rows]
+
+    # Record a finished quiz: who saw which questions, and the usage counters
+    def record_answers(self, username, questions, user_answers):
+        now = time.time()
+        with self._lock:
+            for q, answer in zip(questions, user_answers):
+                h = question_hash(q)
+                correct = int(answer is not None and answer.upper() == q["correct_answer"].upper())
+                self._conn.execute(
+                    "UPDATE questions SET times_served = times_served + 1, times_correct = times_correct + ? WHERE hash = ?",
+                    (correct, h),
+                )
+                if username:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO seen (username, hash, seen_at) VALUES (?, ?, ?)", (username, h, now)
+                    )
+            self._conn.commit()
+
+    # Every topic with at least one question
+    def topics(self):
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT DISTINCT topic FROM question_topics")]
+
+    # Number of questions tagged with a topic
+    def count(self, topic):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM question_topics WHERE topic = ?", (normalize_topic(topic),)
+            ).fetchone()[0]
+
+    def stats(self):
+        with self._lock:
+            questions = self._conn.execute("SELECT COUNT(*) FROM questions").fetchone()[0]
+            topics = self._conn.execute("SELECT COUNT(DISTINCT topic) FROM question_topics").fetchone()[0]
+            return {"questions": questions, "topics": topics}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class KVQuestionBank:
+    """Question bank in a shared `KeyValueStore`, for workers on more than one host.
+
+    Same methods and deduplication as `QuestionBank`. Claims made with
+    `add` keep questions, topic tags and seen marks unique across workers,
+    and lists keep the questions of each topic and what each user has seen.
+    A user's seen questions are ordered by when they first saw them.
+    """
+
+    def __init__(self, kv, prefix="questions:"):
+        self.kv = kv
+        self.prefix = prefix
+
+    def _key(self, *parts):
+        return self.prefix + ":".join(parts)
+
+    def add(self, topic, questions):
+        topic = normalize_topic(topic)
+        added = 0
+        for q in questions:
+            q = validate_question(q)
+            if q is None:
+                continue
+            h = question_hash(q)
+            if self.kv.add(self._key("question", h), q):
+                self.kv.incr(self._key("count"))
+                added += 1
+            if self.kv.add(self._key("tag", h, topic), True):
+                if self.kv.append(self._key("topic", topic), h) == 1:
+                    self.kv.append(self._key("topics"), topic)
+        logger.debug(f"Question bank: {added} of {len(questions)} questions new for topic {topic}")
+        return added
+
+    def _seen(self, username):
+        return self.kv.items(self._key("seen_by", username)) if username else []
+
+    def assemble(self, topic, count, username=None):
+        seen = set(self._seen(username))
+        hashes = [h for h in self.kv.items(self._key("topic", normalize_topic(topic))) if h not in seen]
+        questions = (self.kv.get(self._key("question", h)) for h in random.sample(hashes, min(count, len(hashes))))
+        return [q for q in questions if q is not None]
+
+    def unseen(self, username, questions):
+        seen = set(self._seen(username))
+        return [q for q in questions if question_hash(q) not in seen]
+
+    def seen_questions(self, topic, username, limit=20):
+        in_topic = set(self.kv.items(self._key("topic", normalize_topic(topic))))
+        hashes = [h for h in reversed(self._seen(username)) if h in in_topic][:limit]
+        questions = (self.kv.get(self._key("question", h)) for h in hashes)
+        return [q["question"] for q in questions if q is not None]
+
+    def record_answers(self, username, questions, user_answers):
+        for q, answer in zip(questions, user_answers):
+            h = question_hash(q)
+            self.kv.incr(self._key("served", h))
+            if answer is not None and answer.upper() == q["correct_answer"].upper():
+                self.kv.incr(self._key("correct", h))
+            if username and self.kv.add(self._key("seen", h, username), True):
+                self.kv.append(self._key("seen_by", username), h)
+
+    def topics(self):
+        return self.kv.items(self._key("topics"))
+
+    def count(self, topic):
+        return self.kv.length(self._key("topic", normalize_topic(topic)))
+
+    def stats(self):
+        return {"questions": self.kv.get(self._key("count")) or 0, "topics": self.kv.length(self._key("topics"))}
+
+    def close(self):
+        pass
+
+
+def create_question_bank(backend, path=None, kv=None):
+    if backend == "sqlite":
+        return QuestionBank(path)
+    if backend == "kv" and kv is not None:
+        return KVQuestionBank(kv)
+    raise ValueError(f"Unknown question bank backend: {backend}")
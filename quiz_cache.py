@@ -0,0 +1,284 @@
+import abc
+import json
+import random
+import re
+import sqlite3
+import threading
+import time
+import logging
+
+from quiz_validation import validate_question
+
+logger = logging.getLogger(__name__)
+
+
+# Normalize a topic so "  Python ", "python" and "PYTHON" share one cache entry
+def normalize_topic(topic):
+    return re.sub(r"\s+", " ", (topic or "").strip().lower())
+
+
+# Build the cache key from everything that changes what the LLM returns
+def make_cache_key(topic, model, temperature, prompt_version):
+    return f"{normalize_topic(topic)}|{model}|{temperature}|{prompt_version}"
+
+
+# Check that a generated quiz has the shape the UI relies on
+def is_valid_quiz(questions):
+    if not isinstance(questions, list) or not questions:
+        return False
+    return all(validate_question(q) is not None for q in questions)
+
+
+class BaseQuizCache(abc.ABC):
+    """Pool of validated quizzes keyed by normalized topic; subclasses provide the storage.
+
+    Each key holds several question sets so repeated topics can be served a
+    random stored set. Entries expire after `ttl` seconds.
+    `on_put(topic, questions)` is called after each quiz is stored.
+    """
+
+    def __init__(self, ttl=7 * 24 * 3600, min_pool_size=3, on_put=None):
+        self.on_put = on_put
+        self.ttl = ttl
+        self.min_pool_size = min_pool_size
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    # Number of unexpired quizzes stored for a key
+    @abc.abstractmethod
+    def pool_size(self, key):
+        pass
+
+    # Return a random stored quiz for the key, or None
+    @abc.abstractmethod
+    def get(self, key):
+        pass
+
+    @abc.abstractmethod
+    def _insert(self, key, topic, questions, now):
+        pass
+
+    # Distinct normalized topics that still have unexpired quizzes
+    @abc.abstractmethod
+    def topics(self):
+        pass
+
+    # Every unexpired (topic, questions) pair, e.g. to seed the question bank
+    @abc.abstractmethod
+    def quizzes(self):
+        pass
+
+    @abc.abstractmethod
+    def stats(self):
+        pass
+
+    # Store a validated quiz
+    def put(self, key, topic, questions):
+        if not is_valid_quiz(questions):
+            logger.warning(f"Not caching invalid quiz for topic: {topic}")
+            return False
+        self._insert(key, normalize_topic(topic), questions, time.time())
+        if self.on_put is not None:
+            self.on_put(normalize_topic(topic), questions)
+        return True
+
+    # Return a stored quiz once the topic's pool is full; None counts as a miss
+    def lookup(self, topic, model, temperature, prompt_version):
+        key = make_cache_key(topic, model, temperature, prompt_version)
+        questions = None
+        if self.pool_size(key) >= self.min_pool_size:
+            questions = self.get(key)
+        with self._lock:
+            if questions is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        logger.debug(f"Quiz cache {'hit' if questions is not None else 'miss'} for topic: {topic}")
+        return questions
+
+    def store(self, topic, questions, model, temperature, prompt_version):
+        return self.put(make_cache_key(topic, model, temperature, prompt_version), topic, questions)
+
+    # Serve from the pool on a hit; call generate_fn on a miss or when the pool is still small
+    def get_or_generate(self, topic, generate_fn, model, temperature, prompt_version):
+        questions = self.lookup(topic, model, temperature, prompt_version)
+        if questions is not None:
+            return questions
+        key = make_cache_key(topic, model, temperature, prompt_version)
+        questions = generate_fn(topic)
+        if questions is None:
+            # Generation failed; a smaller pool is still better than an error
+            return self.get(key)
+        self.put(key, topic, questions)
+        return questions
+
+    # Async twin of get_or_generate for handlers running on the event loop
+    async def aget_or_generate(self, topic, agenerate_fn, model, temperature, prompt_version):
+        questions = self.lookup(topic, model, temperature, prompt_version)
+        if questions is not None:
+            return questions
+        key = make_cache_key(topic, model, temperature, prompt_version)
+        questions = await agenerate_fn(topic)
+        if questions is None:
+            return self.get(key)
+        self.put(key, topic, questions)
+        return questions
+
+    def close(self):
+        pass
+
+
+class QuizCache(BaseQuizCache):
+    """Quiz pool in a SQLite file, shared by the workers on one host.
+
+    The whole cache is bounded to `max_entries` rows, evicting the least
+    recently used first.
+    """
+
+    def __init__(self, path, ttl=7 * 24 * 3600, max_entries=1000, min_pool_size=3, on_put=None):
+        super().__init__(ttl=ttl, min_pool_size=min_pool_size, on_put=on_put)
+        self.path = path
+        self.max_entries = max_entries
+        # WAL and a busy timeout let several app workers share the file
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS quizzes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                cache_key TEXT NOT NULL,
+                topic TEXT NOT NULL,
+                questions TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_quizzes_key ON quizzes (cache_key)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_quizzes_last_used ON quizzes (last_used)")
+        self._conn.commit()
+
+    def _live_ids(self, key):
+        cutoff = time.time() - self.ttl
+        rows = self._conn.execute(
+            "SELECT id FROM quizzes WHERE cache_key = ? AND created_at >= ?", (key, cutoff)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def pool_size(self, key):
+        with self._lock:
+            return len(self._live_ids(key))
+
+    def get(self, key):
+        with self._lock:
+            ids = self._live_ids(key)
+            if not ids:
+                return None
+            quiz_id = random.choice(ids)
+            row = self._conn.execute("SELECT questions FROM quizzes WHERE id = ?", (quiz_id,)).fetchone()
+            self._conn.execute("UPDATE quizzes SET last_used = ? WHERE id = ?", (time.time(), quiz_id))
+            self._conn.commit()
+            return json.loads(row[0])
+
+    # Insert a quiz and enforce TTL and size bounds
+    def _insert(self, key, topic, questions, now):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO quizzes (cache_key, topic, questions, created_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, topic, json.dumps(questions), now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        self._conn.execute("DELETE FROM quizzes WHERE created_at < ?", (now - self.ttl,))
+        count = self._conn.execute("SELECT COUNT(*) FROM quizzes").fetchone()[0]
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM quizzes WHERE id IN (SELECT id FROM quizzes ORDER BY last_used ASC, id ASC LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    def topics(self):
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT topic FROM quizzes WHERE created_at >= ?", (cutoff,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def quizzes(self):
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT topic, questions FROM quizzes WHERE created_at >= ? ORDER BY id", (cutoff,)
+            ).fetchall()
+        return [(topic, json.loads(questions)) for topic, questions in rows]
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM quizzes").fetchone()[0]
+            return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class KVQuizCache(BaseQuizCache):
+    """Quiz pool in a shared `KeyValueStore`, so workers on any host serve the same quizzes.
+
+    Each quiz is its own key and expires after `ttl` seconds. Only the
+    newest `pool_limit` quizzes of a cache key are served; instead of an
+    LRU bound on the whole cache, rely on the ttl and the server's own
+    memory limit.
+    """
+
+    def __init__(self, kv, ttl=7 * 24 * 3600, pool_limit=10, min_pool_size=3, on_put=None, prefix="quizcache:"):
+        super().__init__(ttl=ttl, min_pool_size=min_pool_size, on_put=on_put)
+        self.kv = kv
+        self.pool_limit = pool_limit
+        self.prefix = prefix
+
+    # Unexpired quizzes among the newest `pool_limit` stored for a key
+    def _pool(self, key):
+        last = self.kv.get(f"{self.prefix}next:{key}") or 0
+        entries = (self.kv.get(f"{self.prefix}quiz:{key}:{n}") for n in range(max(1, last - self.pool_limit + 1), last + 1))
+        return [entry for entry in entries if entry is not None]
+
+    def pool_size(self, key):
+        return len(self._pool(key))
+
+    def get(self, key):
+        pool = self._pool(key)
+        return random.choice(pool)["questions"] if pool else None
+
+    def _insert(self, key, topic, questions, now):
+        number = self.kv.incr(f"{self.prefix}next:{key}")
+        if number == 1:
+            self.kv.append(self.prefix + "keys", key)
+        self.kv.set(f"{self.prefix}quiz:{key}:{number}", {"topic": topic, "questions": questions}, ttl=self.ttl)
+
+    def topics(self):
+        return list(dict.fromkeys(topic for topic, _ in self.quizzes()))
+
+    def quizzes(self):
+        return [
+            (entry["topic"], entry["questions"])
+            for key in self.kv.items(self.prefix + "keys")
+            for entry in self._pool(key)
+        ]
+
+    def stats(self):
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        return {"hits": hits, "misses": misses, "entries": len(self.quizzes())}
+
+
+def create_quiz_cache(backend, path=None, kv=None, ttl=7 * 24 * 3600, max_entries=1000, min_pool_size=3, on_put=None):
+    if backend == "sqlite":
+        return QuizCache(path, ttl=ttl, max_entries=max_entries, min_pool_size=min_pool_size, on_put=on_put)
+    if backend == "kv" and kv is not None:
+        return KVQuizCache(kv, ttl=ttl, min_pool_size=min_pool_size, on_put=on_put)
+    raise ValueError(f"Unknown quiz cache backend: {backend}")
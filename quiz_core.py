@@ -0,0 +1,624 @@
+# Quiz generation, scoring and storage, without the web UI. Importing this module needs
+# neither Gradio nor an OpenAI API key, reads no settings and opens nothing: the LLM clients,
+# stores and background writers are created on first use (open_stores() creates them all up front).
+import atexit
+import json
+from datetime import datetime
+import logging
+import time
+import config
+from answer_log import AnswerLog, make_event
+from llm_client import CircuitBreaker, InFlightLimiter, LazyClient, ResilientCaller, create_clients
+from question_bank import create_question_bank, question_hash
+from quiz_pool import QuizPool
+from quiz_stream import QuizStream
+from quiz_validation import merge_questions, parse_quiz_reply, validate_question
+from results_store import create_results_store, make_row
+from result_writer import ResultWriter
+from session_store import MemorySessionStore, create_session_store
+from feedback import FeedbackCache, local_feedback
+from kv_store import create_kv_store
+from lazy import Lazy, build, is_built
+from leaderboard import Leaderboard
+from prompts import FEEDBACK_MAX_TOKENS, build_feedback_prompt, build_quiz_prompt, quiz_max_tokens
+from metrics import llm_errors, llm_events, record_usage, registry, stage_seconds, timed
+from quiz_cache import create_quiz_cache, normalize_topic
+from topic_index import TopicIndex
+
+logger = logging.getLogger(__name__)
+
+# The (sync, async) OpenAI client pair, set up from the settings when first used
+def _create_clients():
+    return create_clients(
+        config.OPENAI_API_KEY,
+        max_connections=config.LLM_MAX_CONNECTIONS,
+        timeout=config.LLM_TIMEOUT,
+        # Retries are left to the ResilientCallers below
+        max_retries=0
+    )
+
+# OpenAI clients, created on first use; the sync one serves background workers, the async one UI handlers
+client = LazyClient(lambda: build(_create_clients()[0]))
+async_client = LazyClient(lambda: build(_create_clients()[1]))
+# Global cap on LLM calls in flight, shared by handlers and background workers
+llm_limiter = Lazy(lambda: InFlightLimiter(config.LLM_MAX_IN_FLIGHT))
+# Stops calling the LLM while it keeps failing; new quizzes then come from stored questions
+llm_breaker = Lazy(lambda: CircuitBreaker(config.LLM_BREAKER_THRESHOLD, config.LLM_BREAKER_RESET))
+
+# Retrying, deadline-bound caller for one kind of LLM request; each attempt takes an in-flight slot from `limiter`
+def make_caller(call, limiter=llm_limiter):
+    return ResilientCaller(
+        llm_breaker,
+        limiter,
+        retries=config.LLM_RETRIES,
+        attempt_timeout=config.LLM_ATTEMPT_TIMEOUT,
+        deadline=config.LLM_DEADLINE,
+        backoff=config.LLM_BACKOFF,
+        max_backoff=config.LLM_BACKOFF_MAX,
+        hedge=config.LLM_HEDGE,
+        min_hedge_delay=config.LLM_HEDGE_MIN_DELAY,
+        queue_timeout=config.LLM_QUEUE_TIMEOUT,
+        on_event=lambda event: llm_events.inc(call=call, event=event)
+    )
+
+quiz_caller = Lazy(lambda: make_caller("quiz"))
+feedback_caller = Lazy(lambda: make_caller("feedback"))
+# A streamed reply holds its slot until the last chunk, so the stream takes the slot itself
+quiz_stream_caller = Lazy(lambda: make_caller("quiz_stream", limiter=None))
+
+# Legacy leaderboard file, imported into the results store on first start
+RESULTS_FILE = "results.csv"
+
+MODEL = "gpt-3.5-turbo"
+TEMPERATURE = 0.7
+# Bump when the quiz prompt changes so stale cached quizzes are not served
+PROMPT_VERSION = 2
+# Number of questions the prompt asks for; used for "Q1 of N" while a quiz is still streaming
+def quiz_length():
+    return config.QUIZ_LENGTH
+
+# Cached quizzes are kept apart by prompt version, difficulty and length
+def quiz_variant():
+    return f"{PROMPT_VERSION}/{config.QUIZ_DIFFICULTY}/{config.QUIZ_LENGTH}"
+
+# Key-value store shared by all app workers, for sessions, once-only claims and any store set to "kv"
+kv_store = Lazy(lambda: create_kv_store(config.KV_BACKEND, path=config.KV_PATH, url=config.KV_URL))
+
+# Keep newly generated questions for later quizzes and make their topic matchable
+def remember_questions(topic, questions):
+    question_bank.add(topic, questions)
+    topic_index.add(topic)
+
+quiz_cache = Lazy(lambda: create_quiz_cache(
+    config.QUIZ_CACHE_BACKEND,
+    config.QUIZ_CACHE_FILE,
+    kv=kv_store,
+    ttl=config.QUIZ_CACHE_TTL,
+    max_entries=config.QUIZ_CACHE_MAX_ENTRIES,
+    min_pool_size=config.QUIZ_CACHE_MIN_POOL,
+    on_put=remember_questions
+))
+
+def _open_question_bank():
+    bank = create_question_bank(config.QUESTION_BANK_BACKEND, config.QUESTION_BANK_FILE, kv=kv_store)
+    if bank.stats()["questions"] == 0:
+        # First start with a question bank: seed it from quizzes cached by earlier versions
+        for cached_topic, cached_questions in quiz_cache.quizzes():
+            bank.add(cached_topic, cached_questions)
+    return bank
+
+# Individual questions by topic, with who has seen what; quizzes are assembled from here first
+question_bank = Lazy(_open_question_bank)
+
+def _build_topic_index():
+    index = TopicIndex(threshold=config.TOPIC_MATCH_THRESHOLD)
+    index.add_many(config.QUIZ_POOL_WARMUP_TOPICS)
+    index.add_many(question_bank.topics())
+    return index
+
+# Maps near-duplicate topics ("Python basics", "python 3") onto one question pool
+topic_index = Lazy(_build_topic_index)
+
+# Topic whose quizzes should serve `topic`: a known similar topic, or the topic itself
+def resolve_topic(topic):
+    match = topic_index.match(topic)
+    if match is not None and match != normalize_topic(topic):
+        logger.info(f"Reusing quizzes for topic '{match}' for requested topic '{topic}'")
+    return match or topic
+
+# Extract the valid questions from a reply; the flag says whether the reply was truncated or partly invalid
+def parse_quiz_response(quiz_json):
+    questions, damaged = parse_quiz_reply(quiz_json)
+    if not questions:
+        logger.error("No valid questions in LLM reply")
+        logger.error(f"Received JSON string: {quiz_json}")
+    return questions, damaged
+
+# Ask the LLM for `count` questions
+def request_questions(topic, count, avoid=()):
+    messages = [{"role": "user", "content": build_quiz_prompt(topic, count, config.QUIZ_DIFFICULTY, avoid)}]
+    with timed("llm_quiz"):
+        response = quiz_caller.call(lambda timeout: client.chat.completions.create(
+            model=MODEL,
+            messages=messages,
+            temperature=TEMPERATURE,
+            max_tokens=quiz_max_tokens(count),
+            timeout=timeout
+        ))
+    record_usage("quiz", response.usage)
+    with timed("parse_quiz"):
+        return parse_quiz_response(response.choices[0].message.content)
+
+async def arequest_questions(topic, count, avoid=()):
+    messages = [{"role": "user", "content": build_quiz_prompt(topic, count, config.QUIZ_DIFFICULTY, avoid)}]
+    with timed("llm_quiz"):
+        response = await quiz_caller.acall(lambda timeout: async_client.chat.completions.create(
+            model=MODEL,
+            messages=messages,
+            temperature=TEMPERATURE,
+            max_tokens=quiz_max_tokens(count),
+            timeout=timeout
+        ))
+    record_usage("quiz", response.usage)
+    with timed("parse_quiz"):
+        return parse_quiz_response(response.choices[0].message.content)
+
+# Generate quiz questions
+def generate_quiz(topic):
+    length = quiz_length()
+    logger.debug(f"Generating quiz for topic: {topic}")
+
+    try:
+        questions, damaged = request_questions(topic, length)
+    except Exception as e:
+        llm_errors.inc(call="quiz")
+        logger.error(f"Error generating quiz (OpenAI API or other): {str(e)}")
+        return None
+    # A damaged reply keeps its good questions; only the missing ones are requested again
+    for _ in range(config.QUIZ_REPAIR_ATTEMPTS):
+        if not damaged or not questions or len(questions) >= length:
+            break
+        try:
+            extra, damaged = request_questions(
+                topic, length - len(questions), [q["question"] for q in questions]
+            )
+        except Exception as e:
+            llm_errors.inc(call="quiz")
+            logger.error(f"Error topping up quiz (OpenAI API or other): {str(e)}")
+            break
+        questions = merge_questions(questions, extra)[:length]
+    if not questions:
+        return None
+    # Only pay for pretty-printing the quiz when debug logging is on
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Generated questions: {json.dumps(questions, indent=2)}")
+    return questions
+
+# Generate quiz questions without blocking the event loop
+async def agenerate_quiz(topic):
+    length = quiz_length()
+    logger.debug(f"Generating quiz for topic: {topic}")
+
+    try:
+        questions, damaged = await arequest_questions(topic, length)
+    except Exception as e:
+        llm_errors.inc(call="quiz")
+        logger.error(f"Error generating quiz (OpenAI API or other): {str(e)}")
+        return None
+    for _ in range(config.QUIZ_REPAIR_ATTEMPTS):
+        if not damaged or not questions or len(questions) >= length:
+            break
+        try:
+            extra, damaged = await arequest_questions(
+                topic, length - len(questions), [q["question"] for q in questions]
+            )
+        except Exception as e:
+            llm_errors.inc(call="quiz")
+            logger.error(f"Error topping up quiz (OpenAI API or other): {str(e)}")
+            break
+        questions = merge_questions(questions, extra)[:length]
+    if not questions:
+        return None
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Generated questions: {json.dumps(questions, indent=2)}")
+    return questions
+
+# Get a quiz from the cache, generating one only on a miss
+def get_quiz(topic):
+    questions = quiz_cache.get_or_generate(topic, generate_quiz, MODEL, TEMPERATURE, quiz_variant())
+    # stats() counts the cache rows, so skip it unless it will be logged
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Quiz cache stats: {quiz_cache.stats()}")
+    return questions
+
+# Add freshly generated questions to a quiz assembled from the bank that came up short
+async def atop_up_quiz(topic, questions, avoid=()):
+    length = quiz_length()
+    missing = length - len(questions)
+    logger.debug(f"Topping up quiz for topic {topic} with {missing} new questions")
+    try:
+        extra, _ = await arequest_questions(topic, missing, [q["question"] for q in questions] + list(avoid))
+    except Exception as e:
+        llm_errors.inc(call="quiz")
+        logger.error(f"Error topping up quiz (OpenAI API or other): {str(e)}")
+        return questions
+    remember_questions(topic, extra)
+    return merge_questions(questions, extra)[:length]
+
+# Whether the circuit breaker has given up on the LLM for now; callers then skip it rather than wait
+def llm_degraded():
+    return llm_breaker.state == "open"
+
+# Stored questions for `topic` when the LLM can't supply them, added to `questions` up to a full quiz.
+# Unlike a normal quiz these may include questions the user has already seen.
+def fallback_quiz(topic, questions=()):
+    length = quiz_length()
+    stored = question_bank.assemble(topic, length)
+    if stored:
+        logger.info(f"Serving stored questions for topic {topic} while the LLM is unavailable")
+    return merge_questions(list(questions), stored)[:length]
+
+# Stream the raw quiz JSON from the LLM as text chunks
+def stream_quiz_chunks(topic, count=None, avoid=()):
+    if count is None:
+        count = quiz_length()
+    logger.debug(f"Streaming quiz for topic: {topic}")
+    with llm_limiter.slot(config.LLM_QUEUE_TIMEOUT), timed("llm_quiz_stream"):
+        start = time.perf_counter()
+        # Only opening the stream is retried; a reply cut off part way is topped up by repair_quiz_stream
+        response = quiz_stream_caller.call(lambda timeout: client.chat.completions.create(
+            model=MODEL,
+            messages=[{"role": "user", "content": build_quiz_prompt(topic, count, config.QUIZ_DIFFICULTY, avoid)}],
+            temperature=TEMPERATURE,
+            max_tokens=quiz_max_tokens(count),
+            stream=True,
+            stream_options={"include_usage": True},
+            timeout=timeout
+        ))
+        first = True
+        for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                if first:
+                    first = False
+                    stage_seconds.observe(time.perf_counter() - start, stage="llm_quiz_first_chunk")
+                yield chunk.choices[0].delta.content
+            elif not chunk.choices:
+                # The final chunk carries only the token usage
+                record_usage("quiz", chunk.usage)
+
+# New questions to complete a quiz whose streamed reply was cut off or partly invalid; like
+# generate_quiz, only the missing questions are requested
+def repair_quiz_stream(topic, questions, avoid=()):
+    length = quiz_length()
+    repaired = list(questions)
+    for _ in range(config.QUIZ_REPAIR_ATTEMPTS):
+        if len(repaired) >= length:
+            break
+        try:
+            extra, damaged = request_questions(
+                topic, length - len(repaired), [q["question"] for q in repaired] + list(avoid)
+            )
+        except Exception as e:
+            llm_errors.inc(call="quiz")
+            logger.error(f"Error topping up streamed quiz (OpenAI API or other): {str(e)}")
+            break
+        repaired = merge_questions(repaired, extra)[:length]
+        if not damaged:
+            break
+    return repaired[len(questions):]
+
+# Start generating a quiz in the background, or only the questions `initial` is missing.
+# A full quiz is added to the cache; top-up questions, and a quiz that still came up short after
+# repair, go straight to the question bank.
+def start_quiz_stream(topic, initial=(), avoid=()):
+    length = quiz_length()
+    def on_complete(questions):
+        if not initial and len(questions) == length:
+            quiz_cache.store(topic, questions, MODEL, TEMPERATURE, quiz_variant())
+        else:
+            remember_questions(topic, questions)
+
+    return QuizStream(
+        stream_quiz_chunks(topic, length - len(initial), [q["question"] for q in initial] + list(avoid)),
+        validate=validate_question,
+        on_complete=on_complete,
+        initial=initial,
+        repair=lambda questions: repair_quiz_stream(topic, questions, avoid)
+    ).start()
+
+# Quiz sessions live on the server; the browser only holds a session id and a cursor
+session_store = Lazy(lambda: create_session_store(
+    config.SESSION_BACKEND,
+    config.SESSION_PATH,
+    max_sessions=config.SESSION_MAX_SESSIONS,
+    ttl=config.SESSION_TTL,
+    kv=kv_store
+))
+# Streams still delivering questions, by session id; kept in-process since they can't be serialized
+live_streams = Lazy(lambda: MemorySessionStore(max_sessions=config.SESSION_MAX_SESSIONS, ttl=config.SESSION_TTL))
+
+# Copy newly streamed questions into the session, waiting if the user has caught up with the stream
+def sync_quiz_stream(session_id, session, current_question=None):
+    stream = live_streams.get(session_id)
+    if stream is None:
+        return
+    if current_question is not None:
+        stream.wait_for(current_question + 1, config.QUIZ_STREAM_TIMEOUT)
+    else:
+        stream.result(config.QUIZ_STREAM_TIMEOUT)
+    questions = list(stream.questions)
+    session["quiz"] = questions
+    session["user_answers"] = session["user_answers"] + [None] * (len(questions) - len(session["user_answers"]))
+    if stream.done:
+        live_streams.delete(session_id)
+
+# Ready-to-serve quizzes for popular topics, refilled in the background
+quiz_pool = Lazy(lambda: QuizPool(
+    get_quiz,
+    queue_size=config.QUIZ_POOL_SIZE,
+    max_workers=config.QUIZ_POOL_WORKERS,
+    max_topics=config.QUIZ_POOL_MAX_TOPICS,
+    refill_interval=config.QUIZ_POOL_REFILL_INTERVAL
+))
+
+results_store = Lazy(lambda: create_results_store(
+    config.RESULTS_BACKEND, config.RESULTS_PATH, legacy_csv=RESULTS_FILE, kv=kv_store
+))
+
+def _start_result_writer():
+    writer = ResultWriter(
+        results_store,
+        batch_size=config.RESULTS_BATCH_SIZE,
+        flush_interval=config.RESULTS_FLUSH_INTERVAL,
+        max_pending=config.RESULTS_MAX_PENDING,
+        on_flush=lambda rows, seconds: stage_seconds.observe(seconds, stage="results_write")
+    ).start()
+    atexit.register(writer.close)
+    return writer
+
+# Results are queued and written to the store in batches by a background thread
+result_writer = Lazy(_start_result_writer)
+
+def _start_answer_writer():
+    writer = ResultWriter(
+        AnswerLog(config.ANSWER_LOG_DIR),
+        batch_size=config.ANSWER_LOG_BATCH_SIZE,
+        flush_interval=config.ANSWER_LOG_FLUSH_INTERVAL,
+        max_pending=config.RESULTS_MAX_PENDING,
+        on_flush=lambda rows, seconds: stage_seconds.observe(seconds, stage="answers_write")
+    ).start()
+    atexit.register(writer.close)
+    return writer
+
+# Every answer, kept for analytics in Parquet files with one directory per day; written in batches like
+# results. Nothing is logged when ANSWER_LOG_DIR is empty.
+answer_writer = Lazy(_start_answer_writer)
+
+def _load_leaderboard():
+    board = Leaderboard(k=10)
+    board.load(results_store)
+    if config.LEADERBOARD_REFRESH_INTERVAL > 0:
+        # Other workers' results are picked up off the request path, reading only rows added since the last refresh
+        board.start_refresh(
+            results_store,
+            config.LEADERBOARD_REFRESH_INTERVAL,
+            on_refresh=lambda rows, seconds: stage_seconds.observe(seconds, stage="leaderboard_refresh")
+        )
+        atexit.register(board.stop_refresh)
+    return board
+
+# Top scores are kept in memory and updated as results come in
+leaderboard = Lazy(_load_leaderboard)
+
+# Open every store and start the background writers now rather than on the first request
+def open_stores():
+    for store in (kv_store, session_store, quiz_cache, question_bank, topic_index, results_store, result_writer,
+                  leaderboard):
+        build(store)
+    if config.ANSWER_LOG_DIR:
+        build(answer_writer)
+
+# Flush and stop the background writers and close the key-value store, skipping anything never opened
+def close_stores():
+    for writer in (result_writer, answer_writer):
+        if is_built(writer):
+            writer.close()
+    if is_built(kv_store):
+        kv_store.close()
+
+# Gauges read when the metrics are scraped
+registry.gauge("quiz_llm_in_flight", "LLM calls in flight", lambda: llm_limiter.in_flight)
+registry.gauge(
+    "quiz_results_pending", "Results queued for writing",
+    lambda: result_writer.pending() if is_built(result_writer) else 0
+)
+registry.gauge(
+    "quiz_streams_live", "Quizzes still streaming in",
+    lambda: len(build(live_streams)) if is_built(live_streams) else 0
+)
+
+# Save result to leaderboard
+def save_result(name, score, total, topic=None):
+    row = make_row(
+        name, score, total, datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        normalize_topic(topic) if topic else None
+    )
+    leaderboard.add(row)
+    result_writer.submit(row)
+
+# Log one answer to question `index`; `chosen` is None for a question left unanswered at the end.
+# The time to answer is counted from the previous answer, or from the start of the quiz.
+def record_answer(session_id, session, index, chosen):
+    if not config.ANSWER_LOG_DIR:
+        return
+    now = time.time()
+    seconds = None
+    if chosen is not None:
+        shown_at = session.get("shown_at")
+        seconds = round(now - shown_at, 3) if shown_at else None
+        session["shown_at"] = now
+    q = session["quiz"][index]
+    answer_writer.submit(make_event(
+        session_id, session["username"], normalize_topic(session["topic"]), question_hash(q), index + 1,
+        chosen, q["correct_answer"].upper(), seconds
+    ))
+
+# Load leaderboard, optionally for one topic or the current "daily"/"weekly" window
+def load_leaderboard(topic=None, window=None):
+    # pandas is only needed once someone looks at a leaderboard
+    import pandas as pd
+    with timed("leaderboard_load"):
+        rows = leaderboard.top(topic=topic, window=window)
+        if rows:
+            return pd.DataFrame(rows)
+        return pd.DataFrame()
+
+FEEDBACK_ERROR = "Unable to generate feedback due to an error."
+
+# Generated feedback keyed by quiz and answer pattern, so repeats cost no tokens
+feedback_cache = Lazy(lambda: FeedbackCache(config.FEEDBACK_CACHE_SIZE))
+
+# Generate feedback
+def generate_feedback(score, total, incorrect_questions):
+    prompt = build_feedback_prompt(score, total, incorrect_questions)
+    
+    try:
+        with timed("llm_feedback"):
+            response = feedback_caller.call(lambda timeout: client.chat.completions.create(
+                model=MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=TEMPERATURE,
+                max_tokens=FEEDBACK_MAX_TOKENS,
+                timeout=timeout
+            ))
+        record_usage("feedback", response.usage)
+        return response.choices[0].message.content
+    except Exception as e:
+        llm_errors.inc(call="feedback")
+        logger.error(f"Feedback generation error: {str(e)}")
+        return FEEDBACK_ERROR
+
+# Generate feedback without blocking the event loop
+async def agenerate_feedback(score, total, incorrect_questions):
+    prompt = build_feedback_prompt(score, total, incorrect_questions)
+
+    try:
+        with timed("llm_feedback"):
+            response = await feedback_caller.acall(lambda timeout: async_client.chat.completions.create(
+                model=MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=TEMPERATURE,
+                max_tokens=FEEDBACK_MAX_TOKENS,
+                timeout=timeout
+            ))
+        record_usage("feedback", response.usage)
+        return response.choices[0].message.content
+    except Exception as e:
+        llm_errors.inc(call="feedback")
+        logger.error(f"Feedback generation error: {str(e)}")
+        return FEEDBACK_ERROR
+
+# LLM feedback, reused when the same quiz was answered the same way before
+async def get_llm_feedback(quiz, user_answers, score, total, incorrect_questions):
+    key = FeedbackCache.make_key(quiz, user_answers)
+    feedback = feedback_cache.get(key)
+    if feedback is None:
+        feedback = await agenerate_feedback(score, total, incorrect_questions)
+        if feedback != FEEDBACK_ERROR:
+            feedback_cache.put(key, feedback)
+    return feedback
+
+# Format the results page
+def format_results(score, total, feedback, correct_questions, incorrect_questions):
+    results_text = f"## 🎉 Quiz Complete!\n**Final Score: {score}/{total} ({(score/total)*100:.1f}%)**\n\n### Feedback\n{feedback}"
+    if correct_questions:
+        results_text += "\n\n### Correct Answers\n" + "\n".join([
+            f"- **Question**: {q['question']}\n  - **Your Answer**: {q['user_answer']} (Correct)\n  - **Explanation**: {q['explanation']}"
+            for q in correct_questions
+        ])
+    if incorrect_questions:
+        results_text += "\n\n### Incorrect Answers\n" + "\n".join([
+            f"- **Question**: {q['question']}\n  - **Your Answer**: {q['user_answer']}\n  - **Correct Answer**: {q['correct_answer']}\n  - **Explanation**: {q['explanation']}"
+            for q in incorrect_questions
+        ])
+    return results_text
+
+# Score a finished quiz and build the per-question breakdown and results page; no side effects
+def build_result(session):
+    quiz = session["quiz"]
+    score = session["score"]
+    total = len(quiz)
+    correct_questions = []
+    incorrect_questions = []
+    
+    for i, q in enumerate(quiz):
+        user_answer = session["user_answers"][i]
+        correct_answer = q["correct_answer"].upper()
+        if user_answer and user_answer == correct_answer:
+            correct_questions.append({
+                "number": i + 1,
+                "question": q["question"],
+                "user_answer": user_answer,
+                "correct_answer": correct_answer,
+                "explanation": q["explanation"]
+            })
+        else:
+            incorrect_questions.append({
+                "number": i + 1,
+                "question": q["question"],
+                "user_answer": user_answer if user_answer else "Not answered",
+                "correct_answer": correct_answer,
+                "explanation": q["explanation"]
+            })
+    
+    feedback = local_feedback(score, total, correct_questions, incorrect_questions)
+    return {
+        "score": score,
+        "total": total,
+        "correct_questions": correct_questions,
+        "incorrect_questions": incorrect_questions,
+        "feedback": feedback,
+        "feedback_pending": False,
+        "text": format_results(score, total, feedback, correct_questions, incorrect_questions)
+    }
+
+async def finalize_quiz(session_id, session):
+    """Finish a quiz exactly once per session.
+
+    The result is saved to the leaderboard and question bank only the first
+    time; the computed result, including the rendered results page, is kept
+    in the session so later renders just reuse it.
+    """
+    result = session.get("result")
+    if result is not None:
+        return result
+    result = build_result(session)
+    # Claim the session before the first await so a concurrent finish, in this or another
+    # worker, sees it as done
+    if kv_store.add(f"finalized:{session_id}", True, ttl=config.SESSION_TTL):
+        save_result(session["username"], result["score"], result["total"], session["topic"])
+        question_bank.record_answers(session["username"], session["quiz"], session["user_answers"])
+        for i, chosen in enumerate(session["user_answers"]):
+            if chosen is None:
+                record_answer(session_id, session, i, None)
+    session["result"] = result
+    if config.FEEDBACK_MODE == "llm":
+        await apply_llm_feedback(session, result)
+    elif config.FEEDBACK_MODE == "async":
+        # Render with local feedback now; fill_feedback swaps in the LLM version afterwards
+        result["feedback_pending"] = True
+    return result
+
+# Replace a result's local feedback with LLM feedback; returns False if the LLM call failed
+async def apply_llm_feedback(session, result):
+    feedback = await get_llm_feedback(
+        session["quiz"], session["user_answers"], result["score"], result["total"],
+        result["incorrect_questions"]
+    )
+    if feedback == FEEDBACK_ERROR:
+        return False
+    result["feedback"] = feedback
+    result["text"] = format_results(
+        result["score"], result["total"], feedback, result["correct_questions"], result["incorrect_questions"]
+    )
+    return True
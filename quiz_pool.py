@@ -0,0 +1,139 @@
+import threading
+import logging
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from quiz_cache import normalize_topic
+
+logger = logging.getLogger(__name__)
+
+
+class QuizPool:
+    """Keeps a small queue of ready-to-serve quizzes per popular topic.
+
+    `pop` is called on the request path and never waits on the LLM; refills
+    run on a bounded thread pool. Warm-up topics are always kept filled;
+    other topics are ranked by `pop` calls, with counts decaying every
+    refill tick, and only the `max_topics` most requested keep a queue.
+    `touch` counts a request that was served without the pool.
+    """
+
+    def __init__(self, generate_fn, queue_size=2, max_workers=2, max_topics=20, refill_interval=30):
+        self.generate_fn = generate_fn
+        self.queue_size = queue_size
+        self.max_workers = max_workers
+        self.max_topics = max_topics
+        self.refill_interval = refill_interval
+        self._queues = {}
+        self._popularity = Counter()
+        self._pending = set()
+        self._pinned = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._executor = None
+        self._thread = None
+
+    # Start the worker pool and queue up the warm-up topics
+    def start(self, warmup_topics=()):
+        if self._executor is not None:
+            return
+        self._stop.clear()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="quiz-pool")
+        with self._lock:
+            for topic in warmup_topics:
+                key = normalize_topic(topic)
+                if key and key not in self._pinned:
+                    self._pinned.append(key)
+        self._thread = threading.Thread(target=self._run, name="quiz-pool-refill", daemon=True)
+        self._thread.start()
+        logger.info(f"Quiz pool started with {self.max_workers} workers, warm-up topics: {list(warmup_topics)}")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    # Count a request for the topic without taking a quiz, so a topic served from elsewhere stays warm
+    def touch(self, topic):
+        key = normalize_topic(topic)
+        with self._lock:
+            self._popularity[key] += 1
+        self._schedule(key)
+
+    # Take a ready quiz for the topic, or None if the queue is empty
+    def pop(self, topic):
+        key = normalize_topic(topic)
+        with self._lock:
+            self._popularity[key] += 1
+            queue = self._queues.get(key)
+            quiz = queue.popleft() if queue else None
+        self._schedule(key)
+        logger.debug(f"Quiz pool {'hit' if quiz is not None else 'miss'} for topic: {topic}")
+        return quiz
+
+    def ready_count(self, topic):
+        with self._lock:
+            return len(self._queues.get(normalize_topic(topic), ()))
+
+    # Warm-up topics always stay warm; the rest of the slots go to the most requested topics
+    def _top_topics(self):
+        top = list(self._pinned)
+        for topic, _ in self._popularity.most_common(self.max_topics):
+            if len(top) >= self.max_topics:
+                break
+            if topic not in top:
+                top.append(topic)
+        return top
+
+    def _schedule(self, key):
+        if self._executor is None or self._stop.is_set():
+            return
+        with self._lock:
+            if key in self._pending or key not in self._top_topics():
+                return
+            if len(self._queues.get(key, ())) >= self.queue_size:
+                return
+            self._pending.add(key)
+        try:
+            self._executor.submit(self._fill, key)
+        except RuntimeError:
+            # Executor was shut down between the check and the submit
+            with self._lock:
+                self._pending.discard(key)
+
+    def _fill(self, key):
+        quiz = None
+        try:
+            quiz = self.generate_fn(key)
+        except Exception as e:
+            logger.error(f"Quiz pool generation failed for topic {key}: {str(e)}")
+        with self._lock:
+            self._pending.discard(key)
+            if quiz is not None:
+                self._queues.setdefault(key, deque(maxlen=self.queue_size)).append(quiz)
+        # Keep topping up until the queue is full; a failed attempt waits for the next tick
+        if quiz is not None:
+            self._schedule(key)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                top = self._top_topics()
+                # Drop queues for topics that are no longer popular
+                for key in list(self._queues):
+                    if key not in top:
+                        del self._queues[key]
+            for key in top:
+                self._schedule(key)
+            if self._stop.wait(self.refill_interval):
+                return
+            with self._lock:
+                # Halve counts so popularity follows recent traffic
+                for key in list(self._popularity):
+                    self._popularity[key] //= 2
+                    if self._popularity[key] == 0:
+                        del self._popularity[key]
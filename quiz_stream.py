@@ -0,0 +1,149 @@
+import json
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class QuestionStreamParser:
+    """Incrementally parses a streamed JSON array of question objects.
+
+    Feed it text chunks as they arrive; every call returns the top-level
+    objects that were completed by that chunk. Anything before the opening
+    `[` (such as a ```json fence) is ignored.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._started = False
+        self._object_start = None
+        self.finished = False
+        self.malformed = 0
+
+    def feed(self, chunk):
+        self._buffer += chunk
+        completed = []
+        while self._pos < len(self._buffer) and not self.finished:
+            char = self._buffer[self._pos]
+            if not self._started:
+                if char == "[":
+                    self._started = True
+                    self._depth = 1
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if self._depth == 1 and char == "{":
+                    self._object_start = self._pos
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 1 and char == "}" and self._object_start is not None:
+                    text = self._buffer[self._object_start:self._pos + 1]
+                    self._object_start = None
+                    try:
+                        completed.append(json.loads(text))
+                    except json.JSONDecodeError as je:
+                        self.malformed += 1
+                        logger.error(f"Skipping malformed streamed question: {str(je)}")
+                elif self._depth == 0:
+                    self.finished = True
+            self._pos += 1
+        # Drop text that can no longer be part of an unfinished object
+        keep_from = self._object_start if self._object_start is not None else self._pos
+        self._buffer = self._buffer[keep_from:]
+        self._pos -= keep_from
+        if self._object_start is not None:
+            self._object_start = 0
+        return completed
+
+
+class QuizStream:
+    """Consumes a stream of text chunks on a background thread.
+
+    Parsed questions are appended to `questions` as soon as each object
+    closes, so the first one can be shown while the rest are generated.
+    `validate` may normalize each question or return None to drop it.
+    `initial` questions are available before anything is streamed, e.g. when
+    the stream only tops up a partly assembled quiz. `damaged` is set if the
+    reply was cut off, failed, or had questions that had to be dropped; then
+    `repair(questions)` is called before the stream counts as done and may
+    return replacement questions. `on_complete` is called with the streamed
+    and repaired questions once the stream ends without an error.
+    """
+
+    def __init__(self, chunks, on_complete=None, validate=None, initial=(), repair=None):
+        self.questions = list(initial)
+        self._initial_count = len(self.questions)
+        self.done = False
+        self.damaged = False
+        self.error = None
+        self._chunks = chunks
+        self._on_complete = on_complete
+        self._validate = validate
+        self._repair = repair
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="quiz-stream", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        parser = QuestionStreamParser()
+        try:
+            for chunk in self._chunks:
+                parsed = parser.feed(chunk)
+                if self._validate is not None:
+                    valid = [q for q in map(self._validate, parsed) if q is not None]
+                    self.damaged = self.damaged or len(valid) < len(parsed)
+                    parsed = valid
+                if parsed:
+                    with self._cond:
+                        self.questions.extend(parsed)
+                        self._cond.notify_all()
+        except Exception as e:
+            logger.error(f"Error streaming quiz (OpenAI API or other): {str(e)}")
+            self.error = e
+        self.damaged = self.damaged or self.error is not None or not parser.finished or parser.malformed > 0
+        if self.damaged and self._repair is not None:
+            try:
+                extra = self._repair(list(self.questions))
+            except Exception as e:
+                logger.error(f"Quiz stream repair failed: {str(e)}")
+                extra = []
+            if extra:
+                with self._cond:
+                    self.questions.extend(extra)
+                    self._cond.notify_all()
+        with self._cond:
+            self.done = True
+            self._cond.notify_all()
+        streamed = self.questions[self._initial_count:]
+        if self.error is None and streamed and self._on_complete is not None:
+            try:
+                self._on_complete(list(streamed))
+            except Exception as e:
+                logger.error(f"Quiz stream completion callback failed: {str(e)}")
+
+    # Block until at least `count` questions are parsed or the stream ends
+    def wait_for(self, count, timeout=None):
+        with self._cond:
+            self._cond.wait_for(lambda: len(self.questions) >= count or self.done, timeout)
+            return len(self.questions) >= count
+
+    # Block until the stream ends and return every parsed question
+    def result(self, timeout=None):
+        with self._cond:
+            self._cond.wait_for(lambda: self.done, timeout)
+            return list(self.questions)
@@ -0,0 +1,83 @@
+import re
+import logging
+
+from quiz_stream import QuestionStreamParser
+
+logger = logging.getLogger(__name__)
+
+OPTION_KEYS = ("A", "B", "C", "D")
+
+# Start of a JSON array of objects, skipping prose like "Here are [10] questions:"
+_ARRAY_START = re.compile(r"\[\s*\{")
+
+
+# Normalize one generated question, or return None if it can't be used
+def validate_question(q):
+    if not isinstance(q, dict):
+        return None
+    question = q.get("question")
+    explanation = q.get("explanation")
+    if not isinstance(question, str) or not question.strip():
+        return None
+    if not isinstance(explanation, str) or not explanation.strip():
+        return None
+    options = q.get("options")
+    if isinstance(options, list) and len(options) == len(OPTION_KEYS):
+        options = dict(zip(OPTION_KEYS, options))
+    if not isinstance(options, dict):
+        return None
+    options = {str(key).strip().upper(): value for key, value in options.items()}
+    if sorted(options) != list(OPTION_KEYS) or not all(str(value).strip() for value in options.values()):
+        return None
+    # Accept "b", "B)", "B: 4" and similar, keeping only the letter
+    match = re.match(r"\s*([A-Da-d])\b", str(q.get("correct_answer", "")))
+    if not match:
+        return None
+    return {
+        "question": question.strip(),
+        "options": {key: str(options[key]).strip() for key in OPTION_KEYS},
+        "correct_answer": match.group(1).upper(),
+        "explanation": explanation.strip()
+    }
+
+
+def parse_quiz_reply(text):
+    """Extract valid questions from an LLM reply in a single pass.
+
+    Surrounding prose and code fences are skipped, complete question objects
+    are kept even when the reply was cut off, and invalid or duplicate
+    questions are dropped. Returns (questions, damaged), where `damaged` is
+    True if the reply was truncated or anything had to be dropped.
+    """
+    match = _ARRAY_START.search(text or "")
+    if match is None:
+        return [], True
+    parser = QuestionStreamParser()
+    objects = parser.feed(text[match.start():])
+    questions = []
+    seen = set()
+    for obj in objects:
+        q = validate_question(obj)
+        if q is None:
+            continue
+        key = q["question"].lower()
+        if key in seen:
+            continue
+        seen.add(key)
+        questions.append(q)
+    damaged = not parser.finished or parser.malformed > 0 or len(questions) < len(objects)
+    if damaged:
+        logger.warning(f"Salvaged {len(questions)} valid questions from a damaged reply "
+                       f"({len(objects)} parsed, truncated: {not parser.finished})")
+    return questions, damaged
+
+
+# Append questions from a follow-up reply, skipping any the quiz already has
+def merge_questions(questions, extra):
+    seen = {q["question"].lower() for q in questions}
+    merged = list(questions)
+    for q in extra:
+        if q["question"].lower() not in seen:
+            seen.add(q["question"].lower())
+            merged.append(q)
+    return merged
@@ -0,0 +1,117 @@
+import threading
+import time
+import logging
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class ResultWriter:
+    """Write-behind queue that persists results to a ResultsStore in batches.
+
+    `submit` only appends to an in-memory queue; a background thread flushes
+    when `batch_size` rows are waiting or `flush_interval` seconds have passed.
+    At most `max_pending` rows are held: past that, `submit` flushes inline so
+    memory stays bounded. Failed batches are kept and retried on the next
+    flush, within the same bound. `on_flush(rows, seconds)` is called after
+    each batch is written.
+    """
+
+    def __init__(self, store, batch_size=50, flush_interval=1.0, max_pending=10000, on_flush=None):
+        self.store = store
+        self.on_flush = on_flush
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending = deque()
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._closed = False
+        self._thread = None
+        self.stats = {
+            "submitted": 0,
+            "flushed": 0,
+            "flushes": 0,
+            "failures": 0,
+            "dropped": 0,
+            "last_batch_size": 0,
+            "last_flush_seconds": 0.0,
+        }
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="result-writer", daemon=True)
+            self._thread.start()
+        return self
+
+    def submit(self, row):
+        with self._cond:
+            self._pending.append(row)
+            self.stats["submitted"] += 1
+            full = len(self._pending) >= self.max_pending
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify()
+        if full or self._thread is None:
+            # No background thread yet, or the queue is at its bound: write on the caller
+            self.flush()
+
+    def pending(self):
+        with self._cond:
+            return len(self._pending)
+
+    # Write everything queued so far; returns the number of rows persisted
+    def flush(self):
+        with self._flush_lock:
+            with self._cond:
+                batch = list(self._pending)
+                self._pending.clear()
+            if not batch:
+                return 0
+            start = time.perf_counter()
+            try:
+                self.store.add_many(batch)
+            except Exception as e:
+                logger.error(f"Failed to flush {len(batch)} results: {str(e)}")
+                with self._cond:
+                    self.stats["failures"] += 1
+                    # Put the batch back in front of newer rows, dropping the oldest past the bound
+                    self._pending.extendleft(reversed(batch))
+                    while len(self._pending) > self.max_pending:
+                        self._pending.popleft()
+                        self.stats["dropped"] += 1
+                return 0
+            elapsed = time.perf_counter() - start
+            with self._cond:
+                self.stats["flushes"] += 1
+                self.stats["flushed"] += len(batch)
+                self.stats["last_batch_size"] = len(batch)
+                self.stats["last_flush_seconds"] = elapsed
+            logger.debug(f"Flushed {len(batch)} results in {elapsed * 1000:.1f} ms")
+            if self.on_flush is not None:
+                self.on_flush(len(batch), elapsed)
+            return len(batch)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._closed or len(self._pending) >= self.batch_size, self.flush_interval)
+                closed = self._closed
+                failures = self.stats["failures"]
+            self.flush()
+            if closed:
+                return
+            if self.stats["failures"] > failures:
+                # Back off instead of spinning on a failing store
+                with self._cond:
+                    self._cond.wait_for(lambda: self._closed, self.flush_interval)
+
+    # Stop the background thread after a final flush
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+        logger.info(f"Result writer closed: {self.stats}")
@@ -0,0 +1,319 @@
+import abc
+import csv
+import heapq
+import os
+import sqlite3
+import threading
+import uuid
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Column names shown on the leaderboard, kept from the original results.csv
+COLUMNS = ["Name", "Score", "Out Of", "Timestamp", "Topic"]
+
+
+def _timestamp():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+# Turn an (name, score, total, timestamp, topic) tuple into a leaderboard row
+def make_row(name, score, total, timestamp=None, topic=None):
+    return {"Name": name, "Score": int(score), "Out Of": int(total), "Timestamp": timestamp or _timestamp(), "Topic": topic}
+
+
+class ResultsStore(abc.ABC):
+    """Interface for quiz result backends.
+
+    Rows are dicts keyed by COLUMNS. `top` returns the highest scores first,
+    with earlier attempts winning ties, optionally limited to one topic and
+    to attempts at or after `since` (a "%Y-%m-%d %H:%M:%S" timestamp).
+    A row is "own" when it was written through this store object, which
+    lets each worker tell its own results apart from everyone else's.
+    """
+
+    def add(self, name, score, total, timestamp=None, topic=None):
+        row = make_row(name, score, total, timestamp, topic)
+        self.add_many([row])
+        return row
+
+    @abc.abstractmethod
+    def add_many(self, rows):
+        pass
+
+    @abc.abstractmethod
+    def top(self, k=10, topic=None, since=None):
+        pass
+
+    # Top k rows for every topic, as {topic: rows}
+    @abc.abstractmethod
+    def top_per_topic(self, k=10):
+        pass
+
+    # Up to `limit` rows added after row id `after_id`, oldest first, as (id, row, own) triples
+    @abc.abstractmethod
+    def rows_after(self, after_id, limit=1000):
+        pass
+
+    # Id of the newest row, or 0 if there are none
+    @abc.abstractmethod
+    def last_id(self):
+        pass
+
+    @abc.abstractmethod
+    def count(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class SQLiteResultsStore(ResultsStore):
+    """Results in SQLite (WAL mode) with an index on score for O(k) top-k reads.
+
+    Each row records the `source` id of the store object that wrote it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.source = uuid.uuid4().hex
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS results (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    score INTEGER NOT NULL,
+                    total INTEGER NOT NULL,
+                    timestamp TEXT NOT NULL,
+                    topic TEXT
+                )
+                """
+            )
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(results)")]
+            if "topic" not in columns:
+                self._conn.execute("ALTER TABLE results ADD COLUMN topic TEXT")
+            if "source" not in columns:
+                self._conn.execute("ALTER TABLE results ADD COLUMN source TEXT")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_results_score ON results (score DESC)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_results_topic_score ON results (topic, score DESC)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_results_timestamp ON results (timestamp)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS migrations (name TEXT PRIMARY KEY, applied_at TEXT NOT NULL)")
+
+    # Insert all rows in one transaction
+    def add_many(self, rows):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO results (name, score, total, timestamp, topic, source) VALUES (?, ?, ?, ?, ?, ?)",
+                [(r["Name"], r["Score"], r["Out Of"], r["Timestamp"], r["Topic"], self.source) for r in rows],
+            )
+
+    def top(self, k=10, topic=None, since=None):
+        where, params = [], []
+        if topic is not None:
+            where.append("topic = ?")
+            params.append(topic)
+        if since is not None:
+            where.append("timestamp >= ?")
+            params.append(since)
+        query = "SELECT name, score, total, timestamp, topic FROM results"
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        query += " ORDER BY score DESC, id ASC LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(query, (*params, k)).fetchall()
+        return [dict(zip(COLUMNS, row)) for row in rows]
+
+    def top_per_topic(self, k=10):
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT name, score, total, timestamp, topic FROM (
+                    SELECT *, ROW_NUMBER() OVER (PARTITION BY topic ORDER BY score DESC, id ASC) AS rank
+                    FROM results WHERE topic IS NOT NULL
+                ) WHERE rank <= ? ORDER BY topic, rank
+                """,
+                (k,),
+            ).fetchall()
+        grouped = {}
+        for row in rows:
+            grouped.setdefault(row[4], []).append(dict(zip(COLUMNS, row)))
+        return grouped
+
+    # Walks the primary key, so picking up new rows costs the same however large the table is
+    def rows_after(self, after_id, limit=1000):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, name, score, total, timestamp, topic, source FROM results WHERE id > ? ORDER BY id LIMIT ?",
+                (after_id, limit),
+            ).fetchall()
+        return [(row[0], dict(zip(COLUMNS, row[1:6])), row[6] == self.source) for row in rows]
+
+    def last_id(self):
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM results").fetchone()[0]
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    # Import a legacy results.csv once; the CSV itself is left untouched
+    def migrate_csv(self, csv_path):
+        migration = f"csv:{os.path.abspath(csv_path)}"
+        if not os.path.exists(csv_path):
+            return 0
+        with open(csv_path, newline="") as f:
+            rows = [make_row(r["Name"], r["Score"], r["Out Of"], r["Timestamp"], r.get("Topic") or None) for r in csv.DictReader(f)]
+        # Claim the migration and import the rows in one write transaction, so
+        # when several workers start at once exactly one of them does the import
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            claimed = self._conn.execute(
+                "INSERT OR IGNORE INTO migrations (name, applied_at) VALUES (?, ?)", (migration, _timestamp())
+            ).rowcount == 1
+            if not claimed:
+                return 0
+            self._conn.executemany(
+                "INSERT INTO results (name, score, total, timestamp, topic) VALUES (?, ?, ?, ?, ?)",
+                [(r["Name"], r["Score"], r["Out Of"], r["Timestamp"], r["Topic"]) for r in rows],
+            )
+        logger.info(f"Migrated {len(rows)} results from {csv_path}")
+        return len(rows)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class CSVResultsStore(ResultsStore):
+    """The original append-only results.csv, kept for deployments that still want a flat file."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._own_ids = set()
+
+    def add_many(self, rows):
+        with self._lock:
+            header = COLUMNS
+            existing = 0
+            if os.path.exists(self.path):
+                # Files written before the Topic column existed keep their original header
+                with open(self.path, newline="") as f:
+                    reader = csv.reader(f)
+                    header = next(reader, COLUMNS)
+                    existing = sum(1 for _ in reader)
+                write_header = False
+            else:
+                write_header = True
+            self._own_ids.update(range(existing + 1, existing + len(rows) + 1))
+            with open(self.path, "a", newline="") as f:
+                writer = csv.writer(f)
+                if write_header:
+                    writer.writerow(header)
+                writer.writerows([row.get(column) for column in header] for row in rows)
+
+    def _rows(self):
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, newline="") as f:
+            return [make_row(r["Name"], r["Score"], r["Out Of"], r["Timestamp"], r.get("Topic") or None) for r in csv.DictReader(f)]
+
+    def top(self, k=10, topic=None, since=None):
+        with self._lock:
+            rows = self._rows()
+        rows = [r for r in rows if (topic is None or r["Topic"] == topic) and (since is None or r["Timestamp"] >= since)]
+        return sorted(rows, key=lambda r: -r["Score"])[:k]
+
+    def top_per_topic(self, k=10):
+        with self._lock:
+            rows = self._rows()
+        grouped = {}
+        for row in sorted(rows, key=lambda r: -r["Score"]):
+            if row["Topic"] is not None and len(grouped.setdefault(row["Topic"], [])) < k:
+                grouped[row["Topic"]].append(row)
+        return grouped
+
+    # Row ids are line numbers, counting from 1
+    def rows_after(self, after_id, limit=1000):
+        with self._lock:
+            rows = self._rows()
+        return [(row_id, row, row_id in self._own_ids) for row_id, row in enumerate(rows[after_id:after_id + limit], after_id + 1)]
+
+    def last_id(self):
+        return self.count()
+
+    def count(self):
+        with self._lock:
+            return len(self._rows())
+
+
+class KVResultsStore(ResultsStore):
+    """Results appended to a list in a shared `KeyValueStore`, for workers on more than one host.
+
+    Row ids are list positions, counting from 1. `top` and `top_per_topic`
+    read the whole list, so they are only meant for loading the in-memory
+    leaderboard; after that it catches up through `rows_after`.
+    """
+
+    def __init__(self, kv, key="results", batch_size=1000):
+        self.kv = kv
+        self.key = key
+        self.batch_size = batch_size
+        self.source = uuid.uuid4().hex
+
+    def add_many(self, rows):
+        for row in rows:
+            self.kv.append(self.key, {"row": row, "source": self.source})
+
+    def _rows(self):
+        start = 0
+        while True:
+            entries = self.kv.items(self.key, start, start + self.batch_size)
+            for entry in entries:
+                yield entry["row"]
+            if len(entries) < self.batch_size:
+                return
+            start += self.batch_size
+
+    # nsmallest is stable, so earlier attempts win ties
+    def top(self, k=10, topic=None, since=None):
+        rows = (r for r in self._rows() if (topic is None or r["Topic"] == topic) and (since is None or r["Timestamp"] >= since))
+        return heapq.nsmallest(k, rows, key=lambda r: -r["Score"])
+
+    def top_per_topic(self, k=10):
+        grouped = {}
+        for row in self._rows():
+            if row["Topic"] is not None:
+                grouped.setdefault(row["Topic"], []).append(row)
+        return {topic: heapq.nsmallest(k, rows, key=lambda r: -r["Score"]) for topic, rows in grouped.items()}
+
+    def rows_after(self, after_id, limit=1000):
+        entries = self.kv.items(self.key, after_id, after_id + limit)
+        return [(row_id, entry["row"], entry["source"] == self.source) for row_id, entry in enumerate(entries, after_id + 1)]
+
+    def last_id(self):
+        return self.kv.length(self.key)
+
+    def count(self):
+        return self.kv.length(self.key)
+
+
+# Build the configured results backend, importing any legacy CSV into a new SQLite store.
+# The "kv" backend keeps results in the shared key-value store `kv`.
+def create_results_store(backend, path, legacy_csv=None, kv=None):
+    if backend == "csv":
+        return CSVResultsStore(path)
+    if backend == "kv" and kv is not None:
+        return KVResultsStore(kv)
+    if backend == "sqlite":
+        store = SQLiteResultsStore(path)
+        if legacy_csv:
+            store.migrate_csv(legacy_csv)
+        return store
+    raise ValueError(f"Unknown results backend: {backend}")
@@ -0,0 +1,153 @@
+import argparse
+import itertools
+import os
+import subprocess
+import sys
+import logging
+from contextlib import asynccontextmanager
+
+import httpx
+import uvicorn
+from starlette.applications import Starlette
+from starlette.background import BackgroundTask
+from starlette.responses import PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+logger = logging.getLogger(__name__)
+
+WORKER_COOKIE = "quiz_worker"
+# Headers that only apply to a single connection and must not be forwarded
+HOP_BY_HOP = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailer", "transfer-encoding", "upgrade"
+}
+
+# Shared backends for workers on one host; explicit settings in the environment win
+WORKER_DEFAULTS = {
+    "KV_BACKEND": "sqlite",
+    "SESSION_BACKEND": "kv",
+    "RESULTS_BACKEND": "sqlite",
+    "LEADERBOARD_REFRESH_INTERVAL": "5",
+}
+# With a Redis KV store, keep everything shared there so workers can run on several hosts
+REDIS_WORKER_DEFAULTS = {
+    "QUIZ_CACHE_BACKEND": "kv",
+    "QUESTION_BANK_BACKEND": "kv",
+    "RESULTS_BACKEND": "kv",
+}
+
+
+# Environment for worker `index`, listening on `port`
+def worker_env(index, port, base=None):
+    env = dict(os.environ if base is None else base)
+    if env.get("KV_BACKEND", "").lower() == "redis":
+        for key, value in REDIS_WORKER_DEFAULTS.items():
+            env.setdefault(key, value)
+    for key, value in WORKER_DEFAULTS.items():
+        env.setdefault(key, value)
+    env["GRADIO_SERVER_NAME"] = "127.0.0.1"
+    env["GRADIO_SERVER_PORT"] = str(port)
+    env["WORKER_ID"] = str(index)
+    # Each worker serves its own metrics; scrape them all, one port after the other
+    metrics_port = int(env.get("METRICS_PORT", 0))
+    if metrics_port:
+        env["METRICS_PORT"] = str(metrics_port + index)
+    if index > 0:
+        # Warm-up generation writes to the shared cache, so one worker doing it is enough
+        env["QUIZ_POOL_WARMUP_TOPICS"] = ""
+    return env
+
+
+def start_workers(count, base_port):
+    workers = []
+    for i in range(count):
+        port = base_port + i
+        workers.append(subprocess.Popen([sys.executable, "app.py"], env=worker_env(i, port)))
+        logger.info(f"Started worker {i} on port {port}")
+    return workers
+
+
+def stop_workers(workers, timeout=10):
+    for worker in workers:
+        worker.terminate()
+    for worker in workers:
+        try:
+            worker.wait(timeout)
+        except subprocess.TimeoutExpired:
+            worker.kill()
+
+
+# The worker named by the request's cookie, or the next one in turn for a new browser
+def pick_worker(cookies, count, counter):
+    value = cookies.get(WORKER_COOKIE, "")
+    if value.isdigit() and int(value) < count:
+        return int(value), False
+    return next(counter) % count, True
+
+
+def create_proxy(worker_urls, transport=None):
+    """Reverse proxy in front of the app workers.
+
+    A new browser is sent to the next worker in turn and then kept there with
+    a cookie, since its Gradio state and any quiz still streaming in live in
+    that worker's memory. Responses are streamed as they arrive, so Gradio's
+    server-sent events pass straight through.
+    """
+    client = httpx.AsyncClient(timeout=None, transport=transport)
+    counter = itertools.count()
+
+    async def proxy(request):
+        index, is_new = pick_worker(request.cookies, len(worker_urls), counter)
+        url = worker_urls[index] + request.url.path
+        if request.url.query:
+            url += "?" + request.url.query
+        # Keep the client's Host header so Gradio builds URLs pointing at the proxy
+        headers = [(k, v) for k, v in request.headers.raw if k.decode("latin-1").lower() not in HOP_BY_HOP]
+        upstream = client.build_request(request.method, url, headers=headers, content=request.stream())
+        try:
+            reply = await client.send(upstream, stream=True)
+        except httpx.TransportError as e:
+            logger.warning(f"Worker {index} unavailable: {e}")
+            return PlainTextResponse("Worker unavailable, please retry.", status_code=502)
+        response = StreamingResponse(
+            reply.aiter_raw(), status_code=reply.status_code, background=BackgroundTask(reply.aclose)
+        )
+        response.raw_headers = [
+            (k, v) for k, v in reply.headers.raw if k.decode("latin-1").lower() not in HOP_BY_HOP
+        ]
+        if is_new:
+            response.set_cookie(WORKER_COOKIE, str(index), httponly=True, samesite="lax")
+        return response
+
+    @asynccontextmanager
+    async def lifespan(app):
+        yield
+        await client.aclose()
+
+    methods = ["GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"]
+    return Starlette(routes=[Route("/{path:path}", proxy, methods=methods)], lifespan=lifespan)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run several quiz app workers behind one port.")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WORKERS", 2)), help="Number of app processes")
+    parser.add_argument("--host", default="0.0.0.0", help="Interface for the public port")
+    parser.add_argument("--port", type=int, default=7860, help="Public port")
+    parser.add_argument("--worker-port", type=int, default=7900, help="Port of the first worker; the rest follow it")
+    args = parser.parse_args(argv)
+
+    if os.getenv("RESULTS_BACKEND") == "csv":
+        logger.error("The csv results backend can't be shared by workers; use RESULTS_BACKEND=sqlite")
+        return 1
+    workers = start_workers(args.workers, args.worker_port)
+    try:
+        urls = [f"http://127.0.0.1:{args.worker_port + i}" for i in range(args.workers)]
+        uvicorn.run(create_proxy(urls), host=args.host, port=args.port)
+    finally:
+        stop_workers(workers)
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    raise SystemExit(main())
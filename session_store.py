@@ -0,0 +1,182 @@
+import abc
+import json
+import sqlite3
+import threading
+import time
+import uuid
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def new_session_id():
+    return uuid.uuid4().hex
+
+
+class SessionStore(abc.ABC):
+    """Interface for server-side quiz sessions.
+
+    A session is a dict keyed by an opaque id. `get` returns None for
+    unknown or expired ids and refreshes the session's expiry. Callers
+    mutate the returned dict and `put` it back to save changes.
+    """
+
+    @abc.abstractmethod
+    def get(self, session_id):
+        pass
+
+    @abc.abstractmethod
+    def put(self, session_id, session):
+        pass
+
+    @abc.abstractmethod
+    def delete(self, session_id):
+        pass
+
+    def close(self):
+        pass
+
+
+class MemorySessionStore(SessionStore):
+    """In-process LRU of sessions with an idle TTL.
+
+    At most `max_sessions` are kept; the least recently used is evicted
+    first, so abandoned sessions cannot grow memory without bound. Values
+    may be any object, not just JSON.
+    """
+
+    def __init__(self, max_sessions=10000, ttl=3600):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None or now - entry[0] > self.ttl:
+                if entry is not None:
+                    del self._entries[session_id]
+                self.misses += 1
+                return None
+            self._entries[session_id] = (now, entry[1])
+            self._entries.move_to_end(session_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, session_id, session):
+        with self._lock:
+            self._entries[session_id] = (time.monotonic(), session)
+            self._entries.move_to_end(session_id)
+            while len(self._entries) > self.max_sessions:
+                evicted, _ = self._entries.popitem(last=False)
+                self.evictions += 1
+                logger.debug(f"Evicted least recently used session {evicted}")
+
+    def delete(self, session_id):
+        with self._lock:
+            self._entries.pop(session_id, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "sessions": len(self._entries)}
+
+
+class SQLiteSessionStore(SessionStore):
+    """Sessions as JSON rows in SQLite, so they survive restarts and can be shared.
+
+    Expired rows are purged every `prune_every` writes.
+    """
+
+    def __init__(self, path, ttl=3600, prune_every=100):
+        self.path = path
+        self.ttl = ttl
+        self.prune_every = prune_every
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS sessions (
+                    id TEXT PRIMARY KEY,
+                    data TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_updated_at ON sessions (updated_at)")
+
+    def get(self, session_id):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM sessions WHERE id = ? AND updated_at >= ?", (session_id, now - self.ttl)
+            ).fetchone()
+            if row is None:
+                return None
+            with self._conn:
+                self._conn.execute("UPDATE sessions SET updated_at = ? WHERE id = ?", (now, session_id))
+        return json.loads(row[0])
+
+    def put(self, session_id, session):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (id, data, updated_at) VALUES (?, ?, ?)",
+                (session_id, json.dumps(session), now),
+            )
+            self._writes += 1
+            if self._writes % self.prune_every == 0:
+                self._conn.execute("DELETE FROM sessions WHERE updated_at < ?", (now - self.ttl,))
+
+    def delete(self, session_id):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class KVSessionStore(SessionStore):
+    """Sessions kept in a shared `KeyValueStore`, so any app worker can serve them.
+
+    A session expires `ttl` seconds after it was last read or saved.
+    """
+
+    def __init__(self, kv, ttl=3600, prefix="session:"):
+        self.kv = kv
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, session_id):
+        session = self.kv.get(self.prefix + session_id)
+        if session is not None:
+            self.kv.touch(self.prefix + session_id, self.ttl)
+        return session
+
+    def put(self, session_id, session):
+        self.kv.set(self.prefix + session_id, session, ttl=self.ttl)
+
+    def delete(self, session_id):
+        self.kv.delete(self.prefix + session_id)
+
+
+def create_session_store(backend, path=None, max_sessions=10000, ttl=3600, kv=None):
+    if backend == "memory":
+        return MemorySessionStore(max_sessions=max_sessions, ttl=ttl)
+    if backend == "sqlite":
+        return SQLiteSessionStore(path, ttl=ttl)
+    if backend == "kv" and kv is not None:
+        return KVSessionStore(kv, ttl=ttl)
+    raise ValueError(f"Unknown session backend: {backend}")
@@ -0,0 +1,56 @@
+import unittest
+import os
+import shutil
+import tempfile
+from datetime import datetime
+
+from answer_log import AnswerLog, make_event
+
+
+def event(day, number=1, chosen="A", correct="A", username="alice"):
+    return make_event("s1", username, "math", f"hash{number}", number, chosen, correct, 2.5,
+                      timestamp=datetime.fromisoformat(f"{day} 12:00:00"))
+
+
+class TestAnswerLog(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.log = AnswerLog(os.path.join(self.directory, "answers"))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_events_are_partitioned_by_day(self):
+        self.log.add_many([event("2026-10-01"), event("2026-10-02", 2), event("2026-10-02", 3, chosen=None)])
+        self.assertEqual(self.log.days(), ["2026-10-01", "2026-10-02"])
+        table = self.log.read(start="2026-10-02", columns=["question_number", "is_correct"])
+        self.assertEqual(table.column_names, ["question_number", "is_correct"])
+        self.assertEqual(sorted(table.to_pylist(), key=lambda r: r["question_number"]),
+                         [{"question_number": 2, "is_correct": True}, {"question_number": 3, "is_correct": False}])
+        self.assertEqual(self.log.read(end="2026-10-01").num_rows, 1)
+
+    def test_empty_log(self):
+        self.assertEqual(self.log.days(), [])
+        self.assertEqual(self.log.read(columns=["topic"]).num_rows, 0)
+        # Nothing is created until there is something to write
+        self.assertFalse(os.path.exists(self.log.directory))
+
+    def test_unfinished_files_are_ignored(self):
+        self.log.add_many([event("2026-10-01")])
+        with open(os.path.join(self.log.directory, "day=2026-10-01", "_part-x.parquet.tmp"), "wb") as f:
+            f.write(b"partial")
+        self.assertEqual(self.log.read().num_rows, 1)
+
+    def test_compact_merges_parts(self):
+        for number in range(3):
+            self.log.add_many([event("2026-10-01", number)])
+        self.log.add_many([event("2026-10-05")])
+        self.assertEqual(self.log.compact_before("2026-10-05"), {"2026-10-01": 3})
+        self.assertEqual(len(os.listdir(os.path.join(self.log.directory, "day=2026-10-01"))), 1)
+        self.assertEqual(self.log.read().num_rows, 4)
+        self.assertEqual(self.log.compact("2026-10-01"), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
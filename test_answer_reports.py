@@ -0,0 +1,80 @@
+import unittest
+import io
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from answer_log import AnswerLog, make_event
+from answer_reports import main, load_answers, question_difficulty, topic_accuracy, user_trends
+
+
+class TestAnswerReports(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.log = AnswerLog(self.directory)
+        start = datetime(2026, 9, 7, 12)
+        events = []
+        # q1 is always right, q2 always wrong (mostly "C"), q3 skipped once; bob improves week by week
+        for week in range(3):
+            when = start + timedelta(weeks=week)
+            for user in ("alice", "bob"):
+                session = f"{user}-{week}"
+                events.append(make_event(session, user, "math", "q1", 1, "A", "A", 3.0, when))
+                events.append(make_event(session, user, "math", "q2", 2, "C" if week else "D", "B", 9.0, when))
+                bob_right = user == "bob" and week > 0
+                events.append(make_event(session, user, "history", f"h{week}", 1,
+                                         "A" if user == "alice" or bob_right else "D", "A", 5.0, when))
+        events.append(make_event("alice-3", "alice", "math", "q3", 3, None, "A", None, start))
+        self.log.add_many(events)
+        self.answers = load_answers(self.log)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_question_difficulty(self):
+        report = question_difficulty(self.answers)
+        # Six wrong answers outrank one skip once the prior pulls q3 towards the mean
+        self.assertEqual(list(report.index[:2]), ["q2", "q3"])
+        self.assertEqual(report.loc["q2", "accuracy"], 0)
+        self.assertEqual(report.loc["q2", "common_wrong"], "C")
+        self.assertEqual(report.loc["q3", "skip_rate"], 1)
+        self.assertEqual(report.loc["q1", "median_seconds"], 3.0)
+        self.assertEqual(report.index[-1], "q1")
+        self.assertNotIn("q3", question_difficulty(self.answers, min_answers=2).index)
+
+    def test_topic_accuracy(self):
+        report = topic_accuracy(self.answers)
+        self.assertEqual(report.loc["math", "answers"], 13)
+        self.assertEqual(report.loc["history", "users"], 2)
+        self.assertAlmostEqual(report.loc["history", "accuracy"], 5 / 6)
+
+    def test_user_trends(self):
+        report = user_trends(self.answers, freq="W")
+        self.assertEqual(report.loc["alice", "sessions"], 4)
+        self.assertEqual(report.loc["bob", "periods"], 3)
+        self.assertGreater(report.loc["bob", "trend"], 0)
+        # Alice's skip in the first week makes her trend slightly positive, but well below Bob's
+        self.assertLess(report.loc["alice", "trend"], report.loc["bob", "trend"])
+
+    def test_main_writes_report_and_compacts(self):
+        output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, output_dir)
+        output = f"{output_dir}/questions.csv"
+        with patch("sys.stdout", new_callable=io.StringIO):
+            self.assertEqual(main(["questions", "--dir", self.directory, "--min-answers", "1", "-o", output]), 0)
+            self.assertEqual(main(["compact", "--dir", self.directory]), 0)
+        with open(output) as f:
+            self.assertEqual(len(f.read().splitlines()), 1 + 6)
+        self.assertEqual(len(load_answers(self.log)), len(self.answers))
+
+    def test_reports_on_empty_log(self):
+        answers = load_answers(AnswerLog(tempfile.mkdtemp()))
+        self.assertEqual(len(question_difficulty(answers)), 0)
+        self.assertEqual(len(topic_accuracy(answers)), 0)
+        self.assertEqual(len(user_trends(answers)), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+import json
+import os
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import quiz_core
+from batch_generate import generate_batch, load_checkpoint, main, read_topics
+
+TEST_OUTPUT_FILE = "test_batch_output.jsonl"
+TEST_TOPICS_FILE = "test_batch_topics.txt"
+
+SAMPLE_QUIZ = [
+    {
+        "question": "What is 2+2?",
+        "options": {"A": "3", "B": "4", "C": "5", "D": "6"},
+        "correct_answer": "B",
+        "explanation": "2+2 equals 4."
+    }
+]
+
+
+class TestBatchGenerate(unittest.TestCase):
+
+    def setUp(self):
+        for path in (TEST_OUTPUT_FILE, TEST_TOPICS_FILE):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def tearDown(self):
+        self.setUp()
+
+    def test_read_topics(self):
+        with open(TEST_TOPICS_FILE, "w") as f:
+            f.write("Python\n\n# comment\n  History  \n")
+        self.assertEqual(read_topics(TEST_TOPICS_FILE), ["Python", "History"])
+
+    def test_writes_jsonl_and_calls_sink(self):
+        sink = MagicMock()
+        summary = generate_batch(["Python", "History", "python"], lambda t: SAMPLE_QUIZ,
+                                 output_path=TEST_OUTPUT_FILE, sink=sink, backoff=0)
+        self.assertEqual(summary, {"generated": 2, "skipped": 1, "failed": []})
+        with open(TEST_OUTPUT_FILE) as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual(sorted(line["topic"] for line in lines), ["History", "Python"])
+        self.assertEqual(sink.call_count, 2)
+
+    def test_resume_skips_finished_topics(self):
+        generate_batch(["Python"], lambda t: SAMPLE_QUIZ, output_path=TEST_OUTPUT_FILE, backoff=0)
+        with open(TEST_OUTPUT_FILE, "a") as f:
+            f.write('{"topic": "Hist')  # interrupted write
+        generate = MagicMock(return_value=SAMPLE_QUIZ)
+        summary = generate_batch(["PYTHON", "History"], generate, output_path=TEST_OUTPUT_FILE, backoff=0)
+        generate.assert_called_once_with("History")
+        self.assertEqual(summary["skipped"], 1)
+        self.assertEqual(load_checkpoint(TEST_OUTPUT_FILE), {"python", "history"})
+
+    def test_retries_invalid_output_then_fails(self):
+        generate = MagicMock(side_effect=[None, [{"question": "bad"}], SAMPLE_QUIZ, Exception("API Error"), None, None])
+        summary = generate_batch(["a"], generate, concurrency=1, retries=2, backoff=0)
+        self.assertEqual(summary["generated"], 1)
+        summary = generate_batch(["b"], generate, concurrency=1, retries=2, backoff=0)
+        self.assertEqual(summary["failed"], ["b"])
+        self.assertEqual(generate.call_count, 6)
+
+    @patch("batch_generate.config.get_settings")
+    @patch("batch_generate.generate_batch", return_value={"generated": 1, "skipped": 0, "failed": []})
+    def test_cli_retries_configure_the_llm_caller(self, mock_generate_batch, mock_settings):
+        caller = MagicMock(retries=2, backoff=0.5)
+        with patch.object(quiz_core, "quiz_caller", caller), patch("sys.stdout"):
+            self.assertEqual(main(["Python", "-o", TEST_OUTPUT_FILE, "--retries", "4", "--backoff", "0.1"]), 0)
+        self.assertEqual((caller.retries, caller.backoff), (4, 0.1))
+        # Failed LLM calls are retried by the caller only, not again by the batch
+        self.assertEqual(mock_generate_batch.call_args.kwargs["retries"], 0)
+
+    def test_bounded_concurrency(self):
+        running = []
+        peak = []
+        lock = threading.Lock()
+
+        def slow_generate(topic):
+            with lock:
+                running.append(topic)
+                peak.append(len(running))
+            time.sleep(0.02)
+            with lock:
+                running.remove(topic)
+            return SAMPLE_QUIZ
+
+        summary = generate_batch([f"t{i}" for i in range(10)], slow_generate, concurrency=3, backoff=0)
+        self.assertEqual(summary["generated"], 10)
+        self.assertLessEqual(max(peak), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+
+from benchmark import compare, percentile, run_threads, summarize
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_percentile_interpolates(self):
+        values = [1, 2, 3, 4]
+        self.assertEqual(percentile(values, 0), 1)
+        self.assertEqual(percentile(values, 50), 2.5)
+        self.assertEqual(percentile(values, 100), 4)
+        self.assertIsNone(percentile([], 95))
+
+    def test_summarize(self):
+        result = summarize([0.1, 0.2, 0.3, 0.4], errors=1, elapsed=2)
+        self.assertEqual(result["requests"], 5)
+        self.assertEqual(result["rps"], 2)
+        self.assertEqual(result["p50_ms"], 250)
+        self.assertEqual(result["max_ms"], 400)
+        self.assertIsNone(summarize([], 0, 1)["p99_ms"])
+
+    def test_run_threads_counts_failures(self):
+        def call(user, i):
+            if user == 1:
+                raise RuntimeError("boom")
+            return i != 0
+
+        result = run_threads(call, users=3, requests=2)
+        self.assertEqual(result["requests"], 6)
+        # User 1 fails both calls; users 0 and 2 each fail their first one
+        self.assertEqual(result["errors"], 4)
+
+    def test_compare(self):
+        baseline = {"scenarios": {"leaderboard": {"p50_ms": 10, "p95_ms": 20, "p99_ms": 30, "rps": 100}}}
+        report = {"scenarios": {
+            "leaderboard": {"p50_ms": 5, "p95_ms": 20, "p99_ms": 60, "rps": 150},
+            "quiz_flow": {"p50_ms": 1, "p95_ms": 1, "p99_ms": 1, "rps": 1}
+        }}
+        text = compare(report, baseline)
+        self.assertIn("-50.0%", text)
+        self.assertIn("+100.0%", text)
+        self.assertNotIn("quiz_flow", text)
+
+
+if __name__ == '__main__':
+    unittest.main()
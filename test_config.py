@@ -0,0 +1,50 @@
+import unittest
+
+import config
+from config import Settings
+
+
+class TestSettings(unittest.TestCase):
+
+    def test_missing_api_key_only_fails_when_asked_for(self):
+        settings = Settings({})
+        self.assertIsNone(settings.OPENAI_API_KEY)
+        with self.assertRaises(ValueError) as ctx:
+            settings.require_api_key()
+        self.assertIn("OPENAI_API_KEY", str(ctx.exception))
+        self.assertEqual(Settings({"OPENAI_API_KEY": "sk-test"}).require_api_key(), "sk-test")
+
+    def test_values_are_parsed(self):
+        settings = Settings({
+            "QUIZ_CACHE_TTL": "60", "LLM_TIMEOUT": "2.5", "QUIZ_STREAMING": "off",
+            "QUIZ_POOL_WARMUP_TOPICS": "Python, ,History", "LLM_MAX_IN_FLIGHT": " "
+        })
+        self.assertEqual(settings.QUIZ_CACHE_TTL, 60)
+        self.assertEqual(settings.LLM_TIMEOUT, 2.5)
+        self.assertFalse(settings.QUIZ_STREAMING)
+        self.assertEqual(settings.QUIZ_POOL_WARMUP_TOPICS, ["Python", "History"])
+        self.assertEqual(Settings({"QUIZ_DIFFICULTY": " Hard"}).QUIZ_DIFFICULTY, "hard")
+        self.assertEqual(Settings({"FEEDBACK_MODE": "LLM"}).FEEDBACK_MODE, "llm")
+        # The unauthenticated metrics endpoint is opt-in
+        self.assertEqual(Settings({}).METRICS_PORT, 0)
+        # Blank values fall back to the default
+        self.assertEqual(settings.LLM_MAX_IN_FLIGHT, Settings({}).LLM_MAX_IN_FLIGHT)
+
+    def test_malformed_values_name_the_variable(self):
+        for name, value in (("QUIZ_CACHE_TTL", "a week"), ("LLM_TIMEOUT", "fast"), ("QUIZ_STREAMING", "maybe"),
+                            ("QUIZ_DIFFICULTY", "extreme"), ("QUIZ_LENGTH", "0"),
+                            ("FEEDBACK_MODE", "llms"), ("RESULTS_BACKEND", "postgres"), ("SESSION_BACKEND", "redis"),
+                            ("KV_BACKEND", "sqlite3")):
+            with self.assertRaises(ValueError) as ctx:
+                Settings({name: value})
+            self.assertIn(name, str(ctx.exception))
+
+    def test_module_attributes_load_lazily(self):
+        self.assertIsInstance(config.QUIZ_CACHE_TTL, int)
+        self.assertIs(config.get_settings(), config.get_settings())
+        with self.assertRaises(AttributeError):
+            config.NOT_A_SETTING
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+import json
+
+from starlette.testclient import TestClient
+
+from fake_llm_server import FakeLLM, create_app
+from quiz_validation import parse_quiz_reply
+
+
+def quiz_request(count=3, **extra):
+    prompt = f"Generate exactly {count} multiple-choice questions on the topic 'Python'. Each question should have:"
+    return {"model": "gpt-3.5-turbo", "messages": [{"role": "user", "content": prompt}], **extra}
+
+
+class TestFakeLLM(unittest.TestCase):
+
+    def client(self, **options):
+        self.llm = FakeLLM(latency=0, jitter=0, chunk_delay=0, seed=1, **options)
+        return TestClient(create_app(self.llm))
+
+    def test_quiz_reply_is_a_valid_quiz(self):
+        with self.client() as client:
+            reply = client.post("/v1/chat/completions", json=quiz_request(3)).json()
+        questions, damaged = parse_quiz_reply(reply["choices"][0]["message"]["content"])
+        self.assertEqual(len(questions), 3)
+        self.assertFalse(damaged)
+        self.assertGreater(reply["usage"]["completion_tokens"], 0)
+        # Every question is unique so the question bank keeps them all
+        self.assertEqual(len({q["question"] for q in questions}), 3)
+
+    def test_feedback_reply(self):
+        request = {"messages": [{"role": "user", "content": "The user scored 1 out of 2 on a quiz."}]}
+        with self.client() as client:
+            reply = client.post("/v1/chat/completions", json=request).json()
+        self.assertIn("try again", reply["choices"][0]["message"]["content"])
+
+    def test_malformed_replies_are_truncated(self):
+        with self.client(malformed_rate=1.0) as client:
+            reply = client.post("/v1/chat/completions", json=quiz_request(5)).json()
+        questions, damaged = parse_quiz_reply(reply["choices"][0]["message"]["content"])
+        self.assertTrue(damaged)
+        self.assertLess(len(questions), 5)
+        self.assertEqual(self.llm.stats["malformed"], 1)
+
+    def test_streamed_reply(self):
+        request = quiz_request(2, stream=True, stream_options={"include_usage": True})
+        with self.client() as client:
+            lines = client.post("/v1/chat/completions", json=request).text.split("\n\n")
+        events = [json.loads(line[len("data: "):]) for line in lines if line.startswith("data: {")]
+        self.assertIn("data: [DONE]", lines)
+        content = "".join(e["choices"][0]["delta"].get("content", "") for e in events if e["choices"])
+        self.assertEqual(len(parse_quiz_reply(content)[0]), 2)
+        self.assertEqual(events[-1]["choices"], [])
+        self.assertIn("usage", events[-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+
+from feedback import FeedbackCache, local_feedback, quiz_id
+
+QUIZ = [
+    {
+        "question": "What is 2+2?",
+        "options": {"A": "3", "B": "4", "C": "5", "D": "6"},
+        "correct_answer": "B",
+        "explanation": "2+2 equals 4."
+    }
+]
+
+
+def result(question, user_answer, explanation="Because."):
+    return {"question": question, "user_answer": user_answer, "correct_answer": "B", "explanation": explanation}
+
+
+class TestLocalFeedback(unittest.TestCase):
+
+    def test_perfect_score(self):
+        feedback = local_feedback(3, 3, [result("Q1", "B")] * 3, [])
+        self.assertIn("all 3 questions", feedback)
+
+    def test_mentions_correct_and_missed_questions(self):
+        feedback = local_feedback(1, 2, [result("What is 2+2?", "B")], [result("What is 3+3?", "A", "3+3 equals 6.")])
+        self.assertIn("1 of 2", feedback)
+        self.assertIn("What is 2+2?", feedback)
+        self.assertIn("3+3 equals 6.", feedback)
+
+    def test_unanswered_questions(self):
+        feedback = local_feedback(0, 2, [], [result("Q1", "Not answered"), result("Q2", "Not answered")])
+        self.assertIn("2 question(s) unanswered", feedback)
+
+    def test_empty_quiz(self):
+        self.assertIn("nothing to review", local_feedback(0, 0, [], []))
+
+
+class TestFeedbackCache(unittest.TestCase):
+
+    def test_quiz_id_is_stable(self):
+        self.assertEqual(quiz_id(QUIZ), quiz_id([dict(QUIZ[0])]))
+        self.assertNotEqual(quiz_id(QUIZ), quiz_id([dict(QUIZ[0], correct_answer="A")]))
+
+    def test_keyed_by_answer_vector(self):
+        cache = FeedbackCache(max_entries=10)
+        cache.put(FeedbackCache.make_key(QUIZ, ["B"]), "Well done")
+        self.assertEqual(cache.get(FeedbackCache.make_key(QUIZ, ["B"])), "Well done")
+        self.assertIsNone(cache.get(FeedbackCache.make_key(QUIZ, ["A"])))
+        self.assertEqual(cache.stats(), {"hits": 1, "misses": 1, "entries": 1})
+
+    def test_lru_eviction(self):
+        cache = FeedbackCache(max_entries=2)
+        cache.put("a", "1")
+        cache.put("b", "2")
+        cache.get("a")
+        cache.put("c", "3")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "1")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,235 @@
+import unittest
+import os
+import threading
+import time
+from unittest.mock import patch
+
+from kv_store import KeyValueStore, MemoryKeyValueStore, RedisKeyValueStore, SQLiteKeyValueStore, create_kv_store
+
+TEST_KV_DB = "test_kv.db"
+
+
+def remove_test_files():
+    for path in (TEST_KV_DB, TEST_KV_DB + "-wal", TEST_KV_DB + "-shm"):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+class FakeRedis:
+    """Local stand-in for a Redis client: the subset of commands RedisKeyValueStore uses."""
+
+    def __init__(self):
+        self.data = {}
+        self.lists = {}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            value, expires_at = self.data.get(key, (None, None))
+            if expires_at is not None and expires_at <= time.time():
+                del self.data[key]
+                return None
+            return None if value is None else value.encode("utf-8")
+
+    def set(self, key, value, ex=None, nx=False):
+        if nx and self.get(key) is not None:
+            return None
+        with self.lock:
+            self.data[key] = (value, time.time() + ex if ex else None)
+        return True
+
+    def expire(self, key, seconds):
+        if self.get(key) is None:
+            return False
+        with self.lock:
+            self.data[key] = (self.data[key][0], time.time() + seconds)
+        return True
+
+    def delete(self, key):
+        with self.lock:
+            self.data.pop(key, None)
+            self.lists.pop(key, None)
+
+    def incrby(self, key, amount):
+        with self.lock:
+            value, expires_at = self.data.get(key, ("0", None))
+            value = int(value) + amount
+            self.data[key] = (str(value), expires_at)
+            return value
+
+    def rpush(self, key, value):
+        with self.lock:
+            values = self.lists.setdefault(key, [])
+            values.append(value.encode("utf-8"))
+            return len(values)
+
+    def lrange(self, key, start, end):
+        with self.lock:
+            values = self.lists.get(key, [])
+            return values[start:] if end == -1 else values[start:end + 1]
+
+    def llen(self, key):
+        with self.lock:
+            return len(self.lists.get(key, []))
+
+    def close(self):
+        pass
+
+
+class KeyValueStoreContract:
+    """Behaviour every backend must share; subclasses provide make_store()."""
+
+    def test_set_get_delete(self):
+        store = self.make_store()
+        self.assertIsNone(store.get("a"))
+        store.set("a", {"score": 1, "answers": ["A", None]})
+        self.assertEqual(store.get("a"), {"score": 1, "answers": ["A", None]})
+        store.delete("a")
+        self.assertIsNone(store.get("a"))
+
+    def test_add_only_sets_missing_keys(self):
+        store = self.make_store()
+        self.assertTrue(store.add("claim", 1))
+        self.assertFalse(store.add("claim", 2))
+        self.assertEqual(store.get("claim"), 1)
+
+    def test_keys_expire(self):
+        store = self.make_store()
+        store.set("a", True, ttl=1)
+        self.assertTrue(store.get("a"))
+        time.sleep(1.05)
+        self.assertIsNone(store.get("a"))
+        # An expired claim can be taken again
+        self.assertTrue(store.add("a", True))
+
+    def test_touch_restarts_ttl(self):
+        store = self.make_store()
+        with patch("kv_store.time.time", return_value=1000):
+            store.set("a", 1, ttl=10)
+        with patch("kv_store.time.time", return_value=1008):
+            self.assertTrue(store.touch("a", 10))
+            self.assertFalse(store.touch("missing", 10))
+        with patch("kv_store.time.time", return_value=1015):
+            self.assertEqual(store.get("a"), 1)
+        with patch("kv_store.time.time", return_value=1020):
+            self.assertIsNone(store.get("a"))
+            self.assertFalse(store.touch("a", 10))
+
+    def test_counters(self):
+        store = self.make_store()
+        self.assertEqual(store.incr("n"), 1)
+        self.assertEqual(store.incr("n", 4), 5)
+        self.assertEqual(store.get("n"), 5)
+
+    def test_lists(self):
+        store = self.make_store()
+        self.assertEqual(store.items("log"), [])
+        self.assertEqual(store.length("log"), 0)
+        for i in range(4):
+            self.assertEqual(store.append("log", {"i": i}), i + 1)
+        self.assertEqual(store.items("log"), [{"i": 0}, {"i": 1}, {"i": 2}, {"i": 3}])
+        self.assertEqual(store.items("log", 1, 3), [{"i": 1}, {"i": 2}])
+        self.assertEqual(store.items("log", 3, 3), [])
+        self.assertEqual(store.items("log", 2, 10), [{"i": 2}, {"i": 3}])
+        self.assertEqual(store.length("log"), 4)
+        store.delete("log")
+        self.assertEqual(store.length("log"), 0)
+
+    def test_concurrent_appends_get_distinct_positions(self):
+        store = self.make_store()
+        positions = []
+        threads = [threading.Thread(target=lambda: positions.append(store.append("log", 1))) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(sorted(positions), list(range(1, 9)))
+
+    def test_concurrent_add_has_one_winner(self):
+        store = self.make_store()
+        wins = []
+        threads = [threading.Thread(target=lambda: wins.append(store.add("claim", True))) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(wins.count(True), 1)
+
+
+class TestMemoryKeyValueStore(KeyValueStoreContract, unittest.TestCase):
+
+    def make_store(self):
+        return MemoryKeyValueStore()
+
+    def test_expired_keys_that_are_never_read_are_purged(self):
+        store = MemoryKeyValueStore(prune_every=100)
+        with patch("kv_store.time.time", return_value=1000):
+            for i in range(150):
+                store.add(f"finalized:{i}", True, ttl=10)
+            store.set("forever", 1)
+        self.assertEqual(len(store), 151)
+        with patch("kv_store.time.time", return_value=2000):
+            for i in range(50):
+                store.add(f"finalized:new{i}", True, ttl=10)
+        # The 200th write purged the 150 expired claims
+        self.assertEqual(len(store), 51)
+        self.assertEqual(store.get("forever"), 1)
+
+
+class TestSQLiteKeyValueStore(KeyValueStoreContract, unittest.TestCase):
+
+    def setUp(self):
+        remove_test_files()
+        self.stores = []
+
+    def tearDown(self):
+        for store in self.stores:
+            store.close()
+        remove_test_files()
+
+    def make_store(self):
+        store = SQLiteKeyValueStore(TEST_KV_DB)
+        self.stores.append(store)
+        return store
+
+    def test_claims_are_shared_between_connections(self):
+        # Each worker process opens its own connection to the same file
+        first, second = self.make_store(), self.make_store()
+        self.assertTrue(first.add("finalized:s1", True))
+        self.assertFalse(second.add("finalized:s1", True))
+        second.set("session:s1", {"step": "quiz"})
+        self.assertEqual(first.get("session:s1"), {"step": "quiz"})
+        self.assertEqual(first.append("results", 1), 1)
+        self.assertEqual(second.append("results", 2), 2)
+        self.assertEqual(first.items("results"), [1, 2])
+
+
+class TestRedisKeyValueStore(KeyValueStoreContract, unittest.TestCase):
+
+    def make_store(self):
+        return RedisKeyValueStore(client=FakeRedis())
+
+    def test_keys_are_prefixed(self):
+        client = FakeRedis()
+        RedisKeyValueStore(client=client, prefix="app:").set("a", 1)
+        self.assertEqual(list(client.data), ["app:a"])
+
+
+class TestCreateKeyValueStore(unittest.TestCase):
+
+    def test_backends(self):
+        self.assertIsInstance(create_kv_store("memory"), MemoryKeyValueStore)
+        with self.assertRaises(ValueError):
+            create_kv_store("memcached")
+
+    def test_incomplete_store_cannot_be_created(self):
+        class GetOnly(KeyValueStore):
+            def get(self, key):
+                return None
+
+        with self.assertRaises(TypeError):
+            GetOnly()
+
+
+if __name__ == '__main__':
+    unittest.main()
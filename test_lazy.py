@@ -0,0 +1,37 @@
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from lazy import Lazy, build, is_built
+
+
+class TestLazy(unittest.TestCase):
+
+    def test_builds_on_first_attribute_access(self):
+        built = []
+        store = Lazy(lambda: built.append(1) or {"a": 1})
+        self.assertFalse(is_built(store))
+        self.assertEqual(store.get("a"), 1)
+        self.assertEqual(store.get("a"), 1)
+        self.assertEqual(built, [1])
+        self.assertTrue(is_built(store))
+
+    def test_build_and_plain_objects(self):
+        store = Lazy(lambda: "store")
+        self.assertEqual(build(store), "store")
+        self.assertTrue(is_built(store))
+        self.assertEqual(build("plain"), "plain")
+        self.assertTrue(is_built("plain"))
+
+    def test_attribute_writes_reach_the_real_object(self):
+        target = SimpleNamespace(retries=2)
+        caller = Lazy(lambda: target)
+        caller.retries = 0
+        self.assertEqual(target.retries, 0)
+        with patch.object(caller, "retries", 5):
+            self.assertEqual(target.retries, 5)
+        self.assertEqual(target.retries, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
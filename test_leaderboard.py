@@ -0,0 +1,122 @@
+import unittest
+import os
+import threading
+from datetime import datetime
+
+from leaderboard import Leaderboard, TopK, window_start
+from results_store import SQLiteResultsStore, make_row
+
+TEST_RESULTS_DB = "test_leaderboard.db"
+
+
+def remove_test_files():
+    for path in (TEST_RESULTS_DB, TEST_RESULTS_DB + "-wal", TEST_RESULTS_DB + "-shm"):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+class TestTopK(unittest.TestCase):
+
+    def test_keeps_best_k_with_earlier_ties_first(self):
+        board = TopK(3)
+        for name, score, ts in [("A", 5, "2026-01-01 10:00:00"), ("B", 9, "2026-01-01 11:00:00"),
+                                ("C", 5, "2026-01-01 09:00:00"), ("D", 7, "2026-01-01 12:00:00"),
+                                ("E", 2, "2026-01-01 08:00:00")]:
+            board.add(make_row(name, score, 10, ts))
+        self.assertEqual([r["Name"] for r in board.rows()], ["B", "D", "C"])
+
+
+class TestLeaderboard(unittest.TestCase):
+
+    def setUp(self):
+        remove_test_files()
+        self.store = SQLiteResultsStore(TEST_RESULTS_DB)
+
+    def tearDown(self):
+        self.store.close()
+        remove_test_files()
+
+    def test_window_start(self):
+        now = datetime(2026, 10, 16, 15, 30)  # a Friday
+        self.assertEqual(window_start("daily", now), "2026-10-16 00:00:00")
+        self.assertEqual(window_start("weekly", now), "2026-10-12 00:00:00")
+        with self.assertRaises(ValueError):
+            window_start("monthly", now)
+
+    def test_load_and_incremental_add(self):
+        now = datetime.now()
+        today = now.strftime("%Y-%m-%d %H:%M:%S")
+        self.store.add("Old", 10, 10, "2000-01-01 00:00:00", "math")
+        self.store.add("Today", 6, 10, today, "art")
+        board = Leaderboard(k=2)
+        board.load(self.store)
+
+        self.assertEqual([r["Name"] for r in board.top()], ["Old", "Today"])
+        self.assertEqual([r["Name"] for r in board.top(window="daily")], ["Today"])
+        self.assertEqual([r["Name"] for r in board.top(topic="Math")], ["Old"])
+
+        board.add(make_row("New", 8, 10, today, "math"))
+        self.assertEqual([r["Name"] for r in board.top()], ["Old", "New"])
+        self.assertEqual([r["Name"] for r in board.top(window="weekly")], ["New", "Today"])
+        self.assertEqual([r["Name"] for r in board.top(topic="math")], ["Old", "New"])
+        self.assertEqual(board.top(topic="unknown"), [])
+
+    def test_past_window_query_keeps_current_board(self):
+        now = datetime.now()
+        self.store.add("Today", 6, 10, now.strftime("%Y-%m-%d %H:%M:%S"))
+        board = Leaderboard(k=2)
+        board.load(self.store)
+        self.assertEqual(board.top(window="daily", now=datetime(2000, 1, 1)), [])
+        self.assertEqual([r["Name"] for r in board.top(window="daily", now=now)], ["Today"])
+
+    def test_refresh_reads_only_new_rows_and_skips_our_own(self):
+        today = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.store.add("Loaded", 5, 10, today, "math")
+        board = Leaderboard(k=3)
+        board.load(self.store)
+        # Our own result is on the board before the write-behind queue stores it
+        own = make_row("Own", 7, 10, today, "math")
+        board.add(own)
+        self.store.add_many([own])
+        other = SQLiteResultsStore(TEST_RESULTS_DB)
+        other.add("Other", 9, 10, today, "math")
+        other.close()
+        self.assertEqual(board.refresh(self.store, batch_size=1), 2)
+        self.assertEqual([r["Name"] for r in board.top()], ["Other", "Own", "Loaded"])
+        self.assertEqual([r["Name"] for r in board.top(window="daily")], ["Other", "Own", "Loaded"])
+        self.assertEqual(board.refresh(self.store), 0)
+
+    def test_refresh_keeps_identical_results_from_other_workers(self):
+        today = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        board = Leaderboard(k=3)
+        board.load(self.store)
+        row = make_row("Same", 7, 10, today)
+        board.add(row)
+        self.store.add_many([row])
+        other = SQLiteResultsStore(TEST_RESULTS_DB)
+        other.add_many([row])
+        other.close()
+        board.refresh(self.store)
+        self.assertEqual([r["Name"] for r in board.top()], ["Same", "Same"])
+
+    def test_background_refresh(self):
+        board = Leaderboard(k=3)
+        board.load(self.store)
+        refreshed = threading.Event()
+        board.start_refresh(self.store, 0.01, on_refresh=lambda rows, seconds: rows and refreshed.set())
+        other = SQLiteResultsStore(TEST_RESULTS_DB)
+        try:
+            other.add("Other", 9, 10)
+            self.assertTrue(refreshed.wait(2))
+            self.assertEqual([r["Name"] for r in board.top()], ["Other"])
+        finally:
+            board.stop_refresh()
+            other.close()
+
+    def test_topic_and_window_together_rejected(self):
+        with self.assertRaises(ValueError):
+            Leaderboard().top(topic="math", window="daily")
+
+
+if __name__ == '__main__':
+    unittest.main()
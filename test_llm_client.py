@@ -0,0 +1,273 @@
+import unittest
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+from llm_client import CircuitBreaker, CircuitOpenError, InFlightLimiter, LazyClient, ResilientCaller, is_retryable
+
+
+class TestInFlightLimiter(unittest.TestCase):
+
+    def test_sync_slot_limits_concurrency(self):
+        limiter = InFlightLimiter(2)
+        peak = []
+        lock = threading.Lock()
+
+        def call():
+            with limiter.slot():
+                with lock:
+                    peak.append(limiter.in_flight)
+                time.sleep(0.02)
+
+        threads = [threading.Thread(target=call) for _ in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertLessEqual(max(peak), 2)
+        self.assertEqual(limiter.in_flight, 0)
+
+    def test_sync_acquire_timeout(self):
+        limiter = InFlightLimiter(1)
+        limiter.acquire()
+        with self.assertRaises(TimeoutError):
+            limiter.acquire(timeout=0.01)
+        limiter.release()
+
+    def test_async_slot_limits_concurrency(self):
+        limiter = InFlightLimiter(3)
+        peak = []
+
+        async def call():
+            async with limiter.async_slot():
+                peak.append(limiter.in_flight)
+                await asyncio.sleep(0.01)
+
+        async def run():
+            await asyncio.gather(*(call() for _ in range(10)))
+
+        asyncio.run(run())
+        self.assertEqual(len(peak), 10)
+        self.assertLessEqual(max(peak), 3)
+        self.assertEqual(limiter.in_flight, 0)
+
+    def test_async_acquire_timeout(self):
+        limiter = InFlightLimiter(1)
+        limiter.acquire()
+
+        async def run():
+            await limiter.acquire_async(timeout=0.02)
+
+        with self.assertRaises(TimeoutError):
+            asyncio.run(run())
+        limiter.release()
+
+    def test_slot_released_on_error(self):
+        limiter = InFlightLimiter(1)
+        with self.assertRaises(ValueError):
+            with limiter.slot():
+                raise ValueError("boom")
+        self.assertEqual(limiter.in_flight, 0)
+        limiter.acquire(timeout=0.01)
+        limiter.release()
+
+
+class TestLazyClient(unittest.TestCase):
+
+    def test_builds_client_once_on_first_use(self):
+        built = []
+
+        def factory():
+            built.append(1)
+            return SimpleNamespace(chat="chat api")
+
+        client = LazyClient(factory)
+        self.assertEqual(built, [])
+        self.assertEqual(client.chat, "chat api")
+        self.assertEqual(client.chat, "chat api")
+        self.assertEqual(built, [1])
+
+    def test_special_attribute_probes_do_not_build_client(self):
+        client = LazyClient(lambda: self.fail("client built"))
+        self.assertFalse(hasattr(client, "__func__"))
+        self.assertFalse(hasattr(client, "_is_coroutine"))
+
+
+class ServerError(Exception):
+    status_code = 503
+
+
+class BadRequest(Exception):
+    status_code = 400
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+# Returns `outcomes` in turn: an exception is raised, anything else returned
+def scripted(outcomes):
+    outcomes = list(outcomes)
+    calls = []
+
+    def request(timeout):
+        calls.append(timeout)
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    return request, calls
+
+
+def caller(breaker=None, **options):
+    options = {"retries": 2, "backoff": 0.001, "max_backoff": 0.002, **options}
+    return ResilientCaller(breaker or CircuitBreaker(threshold=100), **options)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def test_opens_after_threshold_and_half_opens(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(threshold=2, reset_timeout=10, clock=clock)
+        breaker.failure()
+        self.assertEqual(breaker.state, "closed")
+        breaker.failure()
+        self.assertEqual(breaker.state, "open")
+        self.assertIsNone(breaker.allow())
+
+        clock.now = 10
+        self.assertEqual(breaker.allow(), "half-open")
+        # Only one trial call at a time
+        self.assertIsNone(breaker.allow())
+        breaker.failure()
+        self.assertEqual(breaker.state, "open")
+
+        clock.now = 20
+        self.assertEqual(breaker.allow(), "half-open")
+        breaker.success()
+        self.assertEqual(breaker.state, "closed")
+
+    def test_abandoned_trial_lets_another_through(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(threshold=1, reset_timeout=1, clock=clock)
+        breaker.failure()
+        clock.now = 1
+        self.assertEqual(breaker.allow(), "half-open")
+        breaker.abandon()
+        self.assertEqual(breaker.allow(), "half-open")
+
+    def test_is_retryable(self):
+        self.assertTrue(is_retryable(ServerError()))
+        self.assertTrue(is_retryable(TimeoutError()))
+        self.assertFalse(is_retryable(BadRequest()))
+        self.assertFalse(is_retryable(ValueError()))
+        self.assertFalse(is_retryable(CircuitOpenError()))
+
+
+class TestResilientCaller(unittest.TestCase):
+
+    def test_retries_retryable_errors(self):
+        events = []
+        request, calls = scripted([ServerError(), TimeoutError(), "ok"])
+        self.assertEqual(caller(on_event=events.append).call(request), "ok")
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(events, ["retry", "retry"])
+
+    def test_gives_up_after_retries_and_on_other_errors(self):
+        request, calls = scripted([ServerError()] * 3)
+        with self.assertRaises(ServerError):
+            caller().call(request)
+        self.assertEqual(len(calls), 3)
+
+        request, calls = scripted([BadRequest(), "ok"])
+        with self.assertRaises(BadRequest):
+            caller().call(request)
+        self.assertEqual(len(calls), 1)
+
+    def test_attempts_fit_in_the_deadline(self):
+        request, calls = scripted([ServerError()] * 10)
+        start = time.monotonic()
+        with self.assertRaises(ServerError):
+            caller(retries=10, backoff=0.2, max_backoff=0.2, attempt_timeout=5, deadline=0.3).call(request)
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertLessEqual(calls[0], 0.3)
+
+    def test_open_breaker_refuses_calls(self):
+        breaker = CircuitBreaker(threshold=2, reset_timeout=60)
+        events = []
+        request, calls = scripted([ServerError()] * 5)
+        with self.assertRaises(CircuitOpenError):
+            caller(breaker, retries=5, on_event=events.append).call(request)
+        self.assertEqual(len(calls), 2)
+        self.assertIn("rejected", events)
+
+    def test_async_attempt_timeout(self):
+        async def slow(timeout):
+            await asyncio.sleep(1)
+
+        start = time.monotonic()
+        with self.assertRaises(TimeoutError):
+            asyncio.run(caller(retries=0, attempt_timeout=0.05).acall(slow))
+        self.assertLess(time.monotonic() - start, 0.5)
+
+    def test_hedges_slow_attempt(self):
+        events = []
+        limiter = InFlightLimiter(4)
+        hedged = caller(limiter=limiter, hedge=True, min_hedge_delay=0.05, on_event=events.append)
+        for _ in range(20):
+            hedged._latencies.append(0.01)
+        delays = [1.0, 0.0]
+
+        async def request(timeout):
+            delay = delays.pop(0)
+            await asyncio.sleep(delay)
+            return delay
+
+        start = time.monotonic()
+        self.assertEqual(asyncio.run(hedged.acall(request)), 0.0)
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(events, ["hedge"])
+        # The losing attempt was cancelled and gave back its slot
+        self.assertEqual(limiter.in_flight, 0)
+
+    def test_no_hedging_without_latency_history(self):
+        self.assertIsNone(caller(hedge=True).hedge_delay())
+        self.assertIsNone(caller(hedge=False).hedge_delay())
+
+
+class TestResilientCallerAgainstFakeServer(unittest.TestCase):
+
+    def test_flaky_upstream(self):
+        from openai import AsyncOpenAI
+        from fake_llm_server import FakeLLM, start_server
+
+        llm = FakeLLM(latency=0.01, jitter=0, chunk_delay=0, error_rate=0.3, seed=3)
+        server, base_url = start_server(llm)
+        try:
+            client = AsyncOpenAI(api_key="test", base_url=base_url, max_retries=0)
+            resilient = caller(retries=5, deadline=5)
+
+            async def run():
+                async def one():
+                    reply = await resilient.acall(lambda timeout: client.chat.completions.create(
+                        model="fake", messages=[{"role": "user", "content": "Feedback please"}], timeout=timeout
+                    ))
+                    return reply.choices[0].message.content
+
+                return await asyncio.gather(*(one() for _ in range(10)))
+
+            self.assertEqual(len(asyncio.run(run())), 10)
+            self.assertGreater(llm.stats["errors"], 0)
+        finally:
+            server.should_exit = True
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+import asyncio
+import urllib.request
+from types import SimpleNamespace
+
+from metrics import MetricsRegistry, record_usage, llm_tokens, start_metrics_server
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_histogram_buckets_are_cumulative(self):
+        hist = self.registry.histogram("stage_seconds", "Stage time", ["stage"], buckets=(0.1, 1))
+        for value in (0.05, 0.5, 0.5, 3):
+            hist.observe(value, stage="llm")
+        text = self.registry.render()
+        self.assertIn("# TYPE stage_seconds histogram", text)
+        self.assertIn('stage_seconds_bucket{stage="llm",le="0.1"} 1', text)
+        self.assertIn('stage_seconds_bucket{stage="llm",le="1"} 3', text)
+        self.assertIn('stage_seconds_bucket{stage="llm",le="+Inf"} 4', text)
+        self.assertIn('stage_seconds_count{stage="llm"} 4', text)
+        self.assertIn('stage_seconds_sum{stage="llm"} 4.05', text)
+        # Histograms only take observations; counting into one would break the output
+        self.assertFalse(hasattr(hist, "inc"))
+
+    def test_time_works_in_async_code(self):
+        hist = self.registry.histogram("handler_seconds", "Handler time", ["handler"])
+
+        async def handler():
+            with hist.time(handler="submit"):
+                await asyncio.sleep(0.01)
+
+        asyncio.run(handler())
+        self.assertEqual(hist.count(handler="submit"), 1)
+        self.assertEqual(hist.count(handler="other"), 0)
+
+    def test_counter_gauge_and_label_escaping(self):
+        counter = self.registry.counter("calls_total", "Calls", ["topic"])
+        counter.inc(topic='say "hi"')
+        counter.inc(2, topic='say "hi"')
+        self.registry.gauge("in_flight", "In flight", lambda: 3)
+        self.registry.gauge("broken", "Broken", lambda: 1 / 0)
+        text = self.registry.render()
+        self.assertIn('calls_total{topic="say \\"hi\\""} 3', text)
+        self.assertIn("in_flight 3", text)
+        self.assertNotIn("\nbroken ", text)
+        with self.assertRaises(ValueError):
+            self.registry.counter("calls_total", "Again")
+
+    def test_record_usage_ignores_missing_counts(self):
+        before = llm_tokens.value(call="test", direction="in")
+        record_usage("test", SimpleNamespace(prompt_tokens=12, completion_tokens=30))
+        record_usage("test", None)
+        self.assertEqual(llm_tokens.value(call="test", direction="in"), before + 12)
+
+    def test_metrics_server(self):
+        self.registry.counter("calls_total", "Calls").inc()
+        server = start_metrics_server(0, registry=self.registry)
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+            with urllib.request.urlopen(url) as response:
+                self.assertIn("text/plain", response.headers["Content-Type"])
+                self.assertIn("calls_total 1", response.read().decode())
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+
+from prompts import (
+    AVOID_TOKEN_BUDGET, FEEDBACK_TOKEN_BUDGET, build_feedback_prompt, build_quiz_prompt, estimate_tokens,
+    quiz_max_tokens
+)
+
+
+def missed(number, question="What is 3+3?", explanation="3+3 equals 6."):
+    return {"number": number, "question": question, "user_answer": "C", "correct_answer": "A", "explanation": explanation}
+
+
+class TestPrompts(unittest.TestCase):
+
+    def test_max_tokens_scales_with_question_count(self):
+        self.assertLess(quiz_max_tokens(2), quiz_max_tokens(10))
+        self.assertLessEqual(quiz_max_tokens(10), 4000)
+        self.assertEqual(quiz_max_tokens(1000), 4000)
+
+    def test_quiz_prompt_count_and_difficulty(self):
+        prompt = build_quiz_prompt("Python", 5, "hard")
+        self.assertIn("Generate exactly 5 multiple-choice questions on the topic 'Python'.", prompt)
+        self.assertIn("challenging", prompt)
+        self.assertNotIn("Do not repeat", prompt)
+        with self.assertRaises(KeyError):
+            build_quiz_prompt("Python", 5, "impossible")
+
+    def test_avoid_list_is_shortened_and_capped(self):
+        long_question = "Which of the following " + "very " * 40 + "long question?"
+        prompt = build_quiz_prompt("Python", 2, avoid=[f"{i} {long_question}" for i in range(200)])
+        avoid_lines = [line for line in prompt.splitlines() if line.startswith("- ")]
+        self.assertTrue(avoid_lines[0].startswith("- 0 Which"))
+        self.assertTrue(all(len(line) <= 82 for line in avoid_lines))
+        self.assertLessEqual(estimate_tokens("\n".join(avoid_lines)), AVOID_TOKEN_BUDGET)
+        self.assertLess(len(avoid_lines), 200)
+
+    def test_feedback_prompt_lists_only_missed_questions(self):
+        prompt = build_feedback_prompt(9, 10, [missed(4)])
+        self.assertIn("scored 9 out of 10", prompt)
+        self.assertIn("- Q4: What is 3+3? (answered C, correct A; 3+3 equals 6.)", prompt)
+        self.assertIn("No questions were missed.", build_feedback_prompt(10, 10, []))
+
+    def test_feedback_prompt_stays_within_budget(self):
+        explanation = "A long explanation " * 20
+        prompt = build_feedback_prompt(0, 50, [missed(i + 1, explanation=explanation) for i in range(50)])
+        self.assertIn("- Q1: What is 3+3?", prompt)
+        self.assertRegex(prompt, r"- and \d+ more\n")
+        self.assertLess(estimate_tokens(prompt), FEEDBACK_TOKEN_BUDGET + 150)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import unittest
+import os
+import time
+
+from kv_store import RedisKeyValueStore
+from question_bank import KVQuestionBank, QuestionBank, create_question_bank, question_hash
+from test_kv_store import FakeRedis
+
+TEST_BANK_FILE = "test_question_bank.db"
+
+
+def make_question(i, correct="B"):
+    return {
+        "question": f"What is {i}+{i}?",
+        "options": {"A": str(i), "B": str(2 * i), "C": str(3 * i), "D": str(4 * i)},
+        "correct_answer": correct,
+        "explanation": f"{i}+{i} equals {2 * i}."
+    }
+
+
+class QuestionBankContract:
+    """Behaviour every question bank must share; subclasses set self.bank in setUp."""
+
+    def test_question_hash_ignores_case_spacing_and_option_order(self):
+        q = make_question(1)
+        variant = dict(q, question="  what is 1+1? ", options={"A": "4", "B": "3", "C": "2", "D": "1"})
+        self.assertEqual(question_hash(q), question_hash(variant))
+        self.assertNotEqual(question_hash(q), question_hash(make_question(2)))
+
+    def test_add_deduplicates_and_tags_topics(self):
+        self.assertEqual(self.bank.add("Math", [make_question(i) for i in range(5)]), 5)
+        self.assertEqual(self.bank.add("math", [make_question(0), make_question(5)]), 1)
+        self.assertEqual(self.bank.add("Arithmetic", [make_question(0)]), 0)
+        self.assertEqual(self.bank.count("math"), 6)
+        self.assertEqual(self.bank.count("arithmetic"), 1)
+        self.assertEqual(sorted(self.bank.topics()), ["arithmetic", "math"])
+        self.assertEqual(self.bank.stats(), {"questions": 6, "topics": 2})
+
+    def test_invalid_questions_are_skipped(self):
+        self.assertEqual(self.bank.add("math", [{"question": "?"}, make_question(1, correct="E")]), 0)
+
+    def test_assemble_skips_questions_the_user_has_seen(self):
+        self.bank.add("math", [make_question(i) for i in range(6)])
+        first = self.bank.assemble("math", 4, "alice")
+        self.assertEqual(len(first), 4)
+        self.bank.record_answers("alice", first, ["B", "A", None, "B"])
+
+        second = self.bank.assemble("math", 4, "alice")
+        self.assertEqual(len(second), 2)
+        self.assertFalse({q["question"] for q in first} & {q["question"] for q in second})
+        self.assertEqual(len(self.bank.assemble("math", 10, "bob")), 6)
+        self.assertEqual(self.bank.unseen("alice", first + second), second)
+        self.assertEqual(sorted(self.bank.seen_questions("math", "alice")), sorted(q["question"] for q in first))
+
+    def test_seen_questions_are_newest_first_and_per_topic(self):
+        self.bank.add("math", [make_question(i) for i in range(3)])
+        self.bank.add("art", [make_question(9)])
+        self.bank.record_answers("alice", [make_question(0), make_question(9)], ["B", "B"])
+        time.sleep(0.01)
+        self.bank.record_answers("alice", [make_question(2)], ["B"])
+        self.assertEqual(self.bank.seen_questions("math", "alice"), ["What is 2+2?", "What is 0+0?"])
+        self.assertEqual(self.bank.seen_questions("math", "alice", limit=1), ["What is 2+2?"])
+
+
+class TestQuestionBank(QuestionBankContract, unittest.TestCase):
+
+    def setUp(self):
+        if os.path.exists(TEST_BANK_FILE):
+            os.remove(TEST_BANK_FILE)
+        self.bank = QuestionBank(TEST_BANK_FILE)
+
+    def tearDown(self):
+        self.bank.close()
+        if os.path.exists(TEST_BANK_FILE):
+            os.remove(TEST_BANK_FILE)
+
+    def test_record_answers_updates_usage_counters(self):
+        questions = [make_question(1), make_question(2)]
+        self.bank.add("math", questions)
+        self.bank.record_answers("alice", questions, ["b", "A"])
+        self.bank.record_answers("bob", questions, ["B", None])
+        rows = dict(self.bank._conn.execute("SELECT hash, times_served || '/' || times_correct FROM questions"))
+        self.assertEqual(rows[question_hash(questions[0])], "2/2")
+        self.assertEqual(rows[question_hash(questions[1])], "2/0")
+
+
+class TestKVQuestionBank(QuestionBankContract, unittest.TestCase):
+
+    def setUp(self):
+        self.kv = RedisKeyValueStore(client=FakeRedis())
+        self.bank = KVQuestionBank(self.kv)
+
+    def test_record_answers_updates_usage_counters(self):
+        questions = [make_question(1), make_question(2)]
+        self.bank.add("math", questions)
+        self.bank.record_answers("alice", questions, ["b", "A"])
+        self.bank.record_answers("bob", questions, ["B", None])
+        h1, h2 = question_hash(questions[0]), question_hash(questions[1])
+        self.assertEqual(self.kv.get(f"questions:served:{h1}"), 2)
+        self.assertEqual(self.kv.get(f"questions:correct:{h1}"), 2)
+        self.assertEqual(self.kv.get(f"questions:served:{h2}"), 2)
+        self.assertIsNone(self.kv.get(f"questions:correct:{h2}"))
+
+    def test_workers_share_the_bank(self):
+        KVQuestionBank(self.kv).add("math", [make_question(1)])
+        self.assertEqual(self.bank.add("Math", [make_question(1)]), 0)
+        self.assertEqual(self.bank.topics(), ["math"])
+
+    def test_factory(self):
+        self.assertIsInstance(create_question_bank("kv", kv=self.kv), KVQuestionBank)
+        self.assertIsInstance(create_question_bank("sqlite", ":memory:"), QuestionBank)
+        with self.assertRaises(ValueError):
+            create_question_bank("memcached")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+import unittest
+import os
+import time
+import asyncio
+from unittest.mock import MagicMock, AsyncMock, patch
+
+from kv_store import RedisKeyValueStore
+from quiz_cache import KVQuizCache, QuizCache, create_quiz_cache, normalize_topic, make_cache_key, is_valid_quiz
+from test_kv_store import FakeRedis
+
+TEST_CACHE_FILE = "test_quiz_cache.db"
+
+SAMPLE_QUIZ = [
+    {
+        "question": "What is 2+2?",
+        "options": {"A": "3", "B": "4", "C": "5", "D": "6"},
+        "correct_answer": "B",
+        "explanation": "2+2 equals 4."
+    }
+]
+
+
+class TestQuizCache(unittest.TestCase):
+
+    def setUp(self):
+        if os.path.exists(TEST_CACHE_FILE):
+            os.remove(TEST_CACHE_FILE)
+        self.cache = QuizCache(TEST_CACHE_FILE, ttl=60, max_entries=5, min_pool_size=2)
+
+    def tearDown(self):
+        self.cache.close()
+        if os.path.exists(TEST_CACHE_FILE):
+            os.remove(TEST_CACHE_FILE)
+
+    def test_normalize_topic(self):
+        self.assertEqual(normalize_topic("  Python   Basics "), "python basics")
+        self.assertEqual(make_cache_key("PYTHON", "m", 0.7, 1), make_cache_key("python", "m", 0.7, 1))
+
+    def test_is_valid_quiz(self):
+        self.assertTrue(is_valid_quiz(SAMPLE_QUIZ))
+        self.assertFalse(is_valid_quiz([]))
+        self.assertFalse(is_valid_quiz([dict(SAMPLE_QUIZ[0], correct_answer="E")]))
+        self.assertFalse(is_valid_quiz([dict(SAMPLE_QUIZ[0], options={"A": "1", "B": "2"})]))
+
+    def test_miss_until_pool_is_full_then_hit(self):
+        generate = MagicMock(return_value=SAMPLE_QUIZ)
+        for _ in range(2):
+            self.assertEqual(self.cache.get_or_generate("Math", generate, "m", 0.7, 1), SAMPLE_QUIZ)
+        self.assertEqual(generate.call_count, 2)
+
+        # Pool now holds two sets, so a differently-cased topic is served from disk
+        self.assertEqual(self.cache.get_or_generate(" math ", generate, "m", 0.7, 1), SAMPLE_QUIZ)
+        self.assertEqual(generate.call_count, 2)
+        self.assertEqual(self.cache.stats(), {"hits": 1, "misses": 2, "entries": 2})
+
+    def test_async_get_or_generate(self):
+        generate = AsyncMock(return_value=SAMPLE_QUIZ)
+        for _ in range(3):
+            self.assertEqual(
+                asyncio.run(self.cache.aget_or_generate("math", generate, "m", 0.7, 1)), SAMPLE_QUIZ
+            )
+        self.assertEqual(generate.await_count, 2)
+
+    def test_generation_failure_falls_back_to_pool(self):
+        self.cache.put(make_cache_key("math", "m", 0.7, 1), "math", SAMPLE_QUIZ)
+        generate = MagicMock(return_value=None)
+        self.assertEqual(self.cache.get_or_generate("math", generate, "m", 0.7, 1), SAMPLE_QUIZ)
+        generate.assert_called_once()
+
+    def test_invalid_quiz_not_stored(self):
+        self.assertFalse(self.cache.put("k", "math", [{"question": "?"}]))
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+    def test_ttl_expiry(self):
+        self.cache.ttl = 0.01
+        key = make_cache_key("math", "m", 0.7, 1)
+        self.cache.put(key, "math", SAMPLE_QUIZ)
+        time.sleep(0.02)
+        self.assertIsNone(self.cache.get(key))
+
+    def test_lru_eviction(self):
+        for i in range(5):
+            self.cache.put(f"k{i}", f"topic{i}", SAMPLE_QUIZ)
+        # Touch k0 so k1 becomes the least recently used entry
+        self.cache.get("k0")
+        self.cache.put("k5", "topic5", SAMPLE_QUIZ)
+        self.assertEqual(self.cache.stats()["entries"], 5)
+        self.assertIsNotNone(self.cache.get("k0"))
+        self.assertIsNone(self.cache.get("k1"))
+
+    def test_topics_and_on_put(self):
+        added = []
+        self.cache.on_put = lambda topic, questions: added.append(topic)
+        self.cache.store("  Python ", SAMPLE_QUIZ, "m", 0.7, 1)
+        self.cache.store("math", SAMPLE_QUIZ, "m", 0.7, 1)
+        self.assertEqual(added, ["python", "math"])
+        self.assertEqual(sorted(self.cache.topics()), ["math", "python"])
+        self.assertEqual(self.cache.quizzes(), [("python", SAMPLE_QUIZ), ("math", SAMPLE_QUIZ)])
+
+
+
+class TestKVQuizCache(unittest.TestCase):
+
+    def setUp(self):
+        self.kv = RedisKeyValueStore(client=FakeRedis())
+        self.cache = KVQuizCache(self.kv, ttl=60, pool_limit=3, min_pool_size=2)
+
+    def test_miss_until_pool_is_full_then_hit(self):
+        generate = MagicMock(return_value=SAMPLE_QUIZ)
+        for _ in range(2):
+            self.assertEqual(self.cache.get_or_generate("Math", generate, "m", 0.7, 1), SAMPLE_QUIZ)
+        # Another worker sharing the store sees the full pool
+        other = KVQuizCache(self.kv, ttl=60, min_pool_size=2)
+        self.assertEqual(other.get_or_generate(" math ", generate, "m", 0.7, 1), SAMPLE_QUIZ)
+        self.assertEqual(generate.call_count, 2)
+        self.assertEqual(other.stats(), {"hits": 1, "misses": 0, "entries": 2})
+
+    def test_only_newest_quizzes_are_served(self):
+        key = make_cache_key("math", "m", 0.7, 1)
+        quizzes = [[dict(SAMPLE_QUIZ[0], question=f"What is {i}+2?")] for i in range(5)]
+        for questions in quizzes:
+            self.cache.put(key, "math", questions)
+        self.assertEqual(self.cache.pool_size(key), 3)
+        self.assertIn(self.cache.get(key), quizzes[2:])
+
+    def test_ttl_expiry(self):
+        key = make_cache_key("math", "m", 0.7, 1)
+        with patch("kv_store.time.time", return_value=1000):
+            self.cache.put(key, "math", SAMPLE_QUIZ)
+        with patch("kv_store.time.time", return_value=1061):
+            self.assertIsNone(self.cache.get(key))
+
+    def test_topics_and_on_put(self):
+        added = []
+        self.cache.on_put = lambda topic, questions: added.append(topic)
+        self.cache.store("  Python ", SAMPLE_QUIZ, "m", 0.7, 1)
+        self.cache.store("math", SAMPLE_QUIZ, "m", 0.7, 1)
+        self.assertFalse(self.cache.put("k", "math", [{"question": "?"}]))
+        self.assertEqual(added, ["python", "math"])
+        self.assertEqual(self.cache.topics(), ["python", "math"])
+        self.assertEqual(self.cache.quizzes(), [("python", SAMPLE_QUIZ), ("math", SAMPLE_QUIZ)])
+
+    def test_factory(self):
+        self.assertIsInstance(create_quiz_cache("kv", kv=self.kv), KVQuizCache)
+        with self.assertRaises(ValueError):
+            create_quiz_cache("memcached")
+
+
+if __name__ == '__main__':
+    unittest.main()
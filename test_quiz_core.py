@@ -0,0 +1,520 @@
+import unittest
+import os
+import pandas as pd
+from datetime import datetime
+import asyncio
+from unittest.mock import patch, MagicMock, AsyncMock
+import json # Added import
+import shutil
+import tempfile
+
+# Add the parent directory to sys.path to allow importing quiz_core
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import quiz_core
+import metrics
+from results_store import SQLiteResultsStore
+from leaderboard import Leaderboard
+from result_writer import ResultWriter
+from question_bank import QuestionBank
+from answer_log import AnswerLog
+from quiz_cache import QuizCache
+from topic_index import TopicIndex
+import subprocess
+
+# Define the path to a temporary results file for testing
+TEST_RESULTS_FILE = "test_results.csv"
+TEST_RESULTS_DB = "test_results.db"
+
+class TestAppFunctions(unittest.TestCase):
+
+    def setUp(self):
+        # Ensure a clean state before each test
+        for path in (TEST_RESULTS_FILE, TEST_RESULTS_DB):
+            if os.path.exists(path):
+                os.remove(path)
+        # Override the results store in quiz_core module for testing
+        self.original_results_store = quiz_core.results_store
+        self.original_leaderboard = quiz_core.leaderboard
+        self.original_result_writer = quiz_core.result_writer
+        self.original_answer_writer = quiz_core.answer_writer
+        self.original_quiz_cache = quiz_core.quiz_cache
+        self.original_question_bank = quiz_core.question_bank
+        self.original_topic_index = quiz_core.topic_index
+        self.store_dir = tempfile.mkdtemp()
+        quiz_core.quiz_cache = QuizCache(os.path.join(self.store_dir, "quiz_cache.db"), on_put=quiz_core.remember_questions)
+        quiz_core.question_bank = QuestionBank(":memory:")
+        quiz_core.topic_index = TopicIndex()
+        quiz_core.results_store = SQLiteResultsStore(TEST_RESULTS_DB)
+        quiz_core.leaderboard = Leaderboard(k=10)
+        quiz_core.result_writer = ResultWriter(quiz_core.results_store, batch_size=10, flush_interval=0.05).start()
+        self.answer_dir = tempfile.mkdtemp()
+        self.answer_log = AnswerLog(self.answer_dir)
+        quiz_core.answer_writer = ResultWriter(self.answer_log)
+
+    def tearDown(self):
+        quiz_core.result_writer.close()
+        quiz_core.results_store.close()
+        # Clean up created files after tests
+        for path in (TEST_RESULTS_FILE, TEST_RESULTS_DB, TEST_RESULTS_DB + "-wal", TEST_RESULTS_DB + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+        # Restore original results store in quiz_core module
+        quiz_core.results_store = self.original_results_store
+        quiz_core.leaderboard = self.original_leaderboard
+        quiz_core.result_writer = self.original_result_writer
+        quiz_core.answer_writer = self.original_answer_writer
+        quiz_core.quiz_cache.close()
+        quiz_core.quiz_cache = self.original_quiz_cache
+        quiz_core.question_bank = self.original_question_bank
+        quiz_core.topic_index = self.original_topic_index
+        shutil.rmtree(self.answer_dir, ignore_errors=True)
+        shutil.rmtree(self.store_dir, ignore_errors=True)
+
+    def test_import_opens_no_files(self):
+        # A fresh interpreter in an empty directory: importing the core must not create any store
+        repo = os.path.dirname(os.path.abspath(quiz_core.__file__))
+        env = dict(os.environ, PYTHONPATH=repo)
+        workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, workdir)
+        subprocess.run([sys.executable, "-c", "import quiz_core"], cwd=workdir, env=env, check=True)
+        self.assertEqual(os.listdir(workdir), [])
+
+    def test_import_reads_no_settings(self):
+        # A malformed setting only fails once the code that needs it runs
+        repo = os.path.dirname(os.path.abspath(quiz_core.__file__))
+        env = dict(os.environ, PYTHONPATH=repo, QUIZ_LENGTH="abc")
+        script = "import quiz_core\ntry:\n    quiz_core.quiz_length()\nexcept ValueError as e:\n    print(e)"
+        result = subprocess.run(
+            [sys.executable, "-c", script], cwd=tempfile.gettempdir(), env=env, check=True, capture_output=True, text=True
+        )
+        self.assertIn("QUIZ_LENGTH", result.stdout)
+
+    def test_save_result(self):
+        # Test saving a single result
+        quiz_core.save_result("TestUser1", 8, 10)
+        df = quiz_core.load_leaderboard()
+        self.assertEqual(len(df), 1)
+        self.assertEqual(df.iloc[0]["Name"], "TestUser1")
+        self.assertEqual(df.iloc[0]["Score"], 8)
+        self.assertEqual(df.iloc[0]["Out Of"], 10)
+
+        # Test saving another result (appending)
+        quiz_core.save_result("TestUser2", 5, 10)
+        df = quiz_core.load_leaderboard()
+        self.assertEqual(len(df), 2)
+        self.assertEqual(df.iloc[1]["Name"], "TestUser2")
+
+    def test_load_leaderboard_empty(self):
+        # Test loading leaderboard when file doesn't exist
+        leaderboard = quiz_core.load_leaderboard()
+        self.assertTrue(isinstance(leaderboard, pd.DataFrame))
+        self.assertTrue(leaderboard.empty)
+
+    def test_load_leaderboard_with_data(self):
+        # Setup: Create a dummy results file
+        data = {
+            "Name": ["UserA", "UserB", "UserC"],
+            "Score": [7, 9, 6],
+            "Out Of": [10, 10, 10],
+            "Timestamp": [
+                datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            ]
+        }
+        dummy_df = pd.DataFrame(data)
+        dummy_df.to_csv(TEST_RESULTS_FILE, index=False)
+        quiz_core.results_store.migrate_csv(TEST_RESULTS_FILE)
+        quiz_core.leaderboard.load(quiz_core.results_store)
+
+        leaderboard = quiz_core.load_leaderboard()
+        self.assertEqual(len(leaderboard), 3)
+        # Leaderboard should be sorted by Score descending
+        self.assertEqual(leaderboard.iloc[0]["Name"], "UserB")
+        self.assertEqual(leaderboard.iloc[0]["Score"], 9)
+        self.assertEqual(leaderboard.iloc[1]["Name"], "UserA")
+        self.assertEqual(leaderboard.iloc[2]["Name"], "UserC")
+
+    def test_load_leaderboard_top_10(self):
+        # Setup: Create a dummy results file with 12 entries
+        names = [f"User{i}" for i in range(12)]
+        scores = [(i % 5) + 5 for i in range(12)] # Scores from 5 to 9
+        data = {
+            "Name": names,
+            "Score": scores,
+            "Out Of": [10] * 12,
+            "Timestamp": [datetime.now().strftime("%Y-%m-%d %H:%M:%S")] * 12
+        }
+        dummy_df = pd.DataFrame(data)
+        # Ensure scores are varied enough for sorting
+        dummy_df = dummy_df.sort_values(by="Score", ascending=False)
+        dummy_df.to_csv(TEST_RESULTS_FILE, index=False)
+        quiz_core.results_store.migrate_csv(TEST_RESULTS_FILE)
+        quiz_core.leaderboard.load(quiz_core.results_store)
+
+        leaderboard = quiz_core.load_leaderboard()
+        self.assertEqual(len(leaderboard), 10) # Should only load top 10
+
+    def test_save_result_updates_topic_leaderboard(self):
+        quiz_core.save_result("TestUser1", 8, 10, "Python ")
+        quiz_core.save_result("TestUser2", 9, 10, "History")
+        leaderboard = quiz_core.load_leaderboard(topic="python")
+        self.assertEqual(len(leaderboard), 1)
+        self.assertEqual(leaderboard.iloc[0]["Name"], "TestUser1")
+        self.assertEqual(len(quiz_core.load_leaderboard(window="daily")), 2)
+        # Once the write-behind queue is flushed, reloading from the store gives the same boards
+        quiz_core.result_writer.flush()
+        quiz_core.leaderboard.load(quiz_core.results_store)
+        self.assertEqual(quiz_core.load_leaderboard(topic="history").iloc[0]["Name"], "TestUser2")
+
+    def test_leaderboard_refresh_picks_up_other_workers_results(self):
+        quiz_core.save_result("LocalUser", 6, 10)
+        quiz_core.result_writer.flush()
+        # Written to the shared store by another worker
+        other = SQLiteResultsStore(TEST_RESULTS_DB)
+        other.add("OtherWorkerUser", 9, 10, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        other.close()
+        self.assertEqual(quiz_core.leaderboard.refresh(quiz_core.results_store), 2)
+        # Our own result, read back from the store, isn't counted twice
+        names = list(quiz_core.load_leaderboard()["Name"])
+        self.assertEqual(names, ["OtherWorkerUser", "LocalUser"])
+        self.assertEqual(quiz_core.leaderboard.refresh(quiz_core.results_store), 0)
+
+    @patch('quiz_core.client') # Target 'quiz_core.client' which is the OpenAI client instance
+    def test_generate_quiz_success(self, mock_openai_client):
+        # Configure the mock response from OpenAI API
+        mock_completion = MagicMock()
+        mock_choice = MagicMock()
+        mock_choice.message.content = json.dumps([
+            {
+                "question": "What is 2+2?",
+                "options": {"A": "3", "B": "4", "C": "5", "D": "6"},
+                "correct_answer": "B",
+                "explanation": "2+2 equals 4."
+            }
+        ])
+        mock_completion.choices = [mock_choice]
+        mock_openai_client.chat.completions.create.return_value = mock_completion
+
+        questions = quiz_core.generate_quiz("math")
+        self.assertIsNotNone(questions)
+        self.assertEqual(len(questions), 1)
+        self.assertEqual(questions[0]["question"], "What is 2+2?")
+        # Verify that the mock was called
+        mock_openai_client.chat.completions.create.assert_called_once()
+
+    @patch('quiz_core.client')
+    def test_generate_quiz_records_timings_and_tokens(self, mock_openai_client):
+        mock_completion = MagicMock()
+        mock_completion.choices[0].message.content = json.dumps([
+            {"question": "What is 2+2?", "options": {"A": "3", "B": "4", "C": "5", "D": "6"},
+             "correct_answer": "B", "explanation": "2+2 equals 4."}
+        ])
+        mock_completion.choices.__bool__.return_value = True
+        mock_completion.usage.prompt_tokens = 120
+        mock_completion.usage.completion_tokens = 80
+        mock_openai_client.chat.completions.create.return_value = mock_completion
+        calls = quiz_core.stage_seconds.count(stage="llm_quiz")
+        tokens_out = metrics.llm_tokens.value(call="quiz", direction="out")
+
+        quiz_core.generate_quiz("math")
+        self.assertEqual(quiz_core.stage_seconds.count(stage="llm_quiz"), calls + 1)
+        self.assertEqual(metrics.llm_tokens.value(call="quiz", direction="out"), tokens_out + 80)
+        self.assertIn('quiz_stage_seconds_count{stage="parse_quiz"}', quiz_core.registry.render())
+
+    @patch('quiz_core.client')
+    def test_generate_quiz_api_error(self, mock_openai_client):
+        # Configure the mock to raise an exception
+        mock_openai_client.chat.completions.create.side_effect = Exception("API Error")
+
+        questions = quiz_core.generate_quiz("science")
+        self.assertIsNone(questions)
+        mock_openai_client.chat.completions.create.assert_called_once()
+
+    @patch('quiz_core.client')
+    def test_generate_quiz_retries_server_errors(self, mock_openai_client):
+        class ServerError(Exception):
+            status_code = 503
+
+        mock_completion = MagicMock()
+        mock_completion.choices[0].message.content = json.dumps([{
+            "question": "What is 2+2?", "options": {"A": "3", "B": "4", "C": "5", "D": "6"},
+            "correct_answer": "B", "explanation": "2+2 equals 4."
+        }])
+        mock_openai_client.chat.completions.create.side_effect = [ServerError("overloaded"), mock_completion]
+        retries = metrics.llm_events.value(call="quiz", event="retry")
+
+        with patch.object(quiz_core.quiz_caller, "backoff", 0.001):
+            questions = quiz_core.generate_quiz("science")
+        self.assertEqual(len(questions), 1)
+        self.assertEqual(mock_openai_client.chat.completions.create.call_count, 2)
+        self.assertEqual(metrics.llm_events.value(call="quiz", event="retry"), retries + 1)
+        # Each attempt is given what is left of its time limit
+        self.assertLessEqual(
+            mock_openai_client.chat.completions.create.call_args.kwargs["timeout"], quiz_core.config.LLM_ATTEMPT_TIMEOUT
+        )
+
+    @patch('quiz_core.question_bank', new_callable=lambda: QuestionBank(":memory:"))
+    def test_fallback_quiz_while_llm_is_down(self, mock_bank):
+        stored = [{"question": f"Stored {i}?", "options": {"A": "1", "B": "2", "C": "3", "D": "4"},
+                   "correct_answer": "A", "explanation": "Because."} for i in range(3)]
+        mock_bank.add("math", stored)
+        mock_bank.record_answers("Alice", stored, ["A"] * 3)
+        try:
+            for _ in range(quiz_core.llm_breaker.threshold):
+                quiz_core.llm_breaker.failure()
+            self.assertTrue(quiz_core.llm_degraded())
+            # Questions Alice has already seen are still better than no quiz
+            quiz = quiz_core.fallback_quiz("math", [dict(stored[0], question="Fresh?")])
+            self.assertEqual(len(quiz), 4)
+            self.assertEqual(quiz[0]["question"], "Fresh?")
+        finally:
+            quiz_core.llm_breaker.success()
+        self.assertFalse(quiz_core.llm_degraded())
+
+    @patch('quiz_core.client')
+    def test_generate_quiz_json_decode_error(self, mock_openai_client):
+        # Configure the mock response with invalid JSON
+        mock_completion = MagicMock()
+        mock_choice = MagicMock()
+        mock_choice.message.content = "This is not valid JSON"
+        mock_completion.choices = [mock_choice]
+        mock_openai_client.chat.completions.create.return_value = mock_completion
+
+        questions = quiz_core.generate_quiz("history")
+        self.assertIsNone(questions) # Due to the new error handling
+        mock_openai_client.chat.completions.create.assert_called_once()
+
+    @patch('quiz_core.client')
+    def test_generate_quiz_tops_up_truncated_reply(self, mock_openai_client):
+        def reply(questions, truncate=0):
+            text = json.dumps(questions)
+            mock_completion = MagicMock()
+            mock_completion.choices[0].message.content = text[:len(text) - truncate]
+            return mock_completion
+
+        questions = [
+            {
+                "question": f"Question {i}?",
+                "options": {"A": "1", "B": "2", "C": "3", "D": "4"},
+                "correct_answer": "A",
+                "explanation": f"Because {i}."
+            }
+            for i in range(quiz_core.quiz_length())
+        ]
+        # First reply is cut off inside the last question; the follow-up supplies only what was lost
+        mock_openai_client.chat.completions.create.side_effect = [
+            reply(questions, truncate=30),
+            reply(questions[-1:])
+        ]
+
+        result = quiz_core.generate_quiz("math")
+        self.assertEqual(len(result), quiz_core.quiz_length())
+        self.assertEqual(mock_openai_client.chat.completions.create.call_count, 2)
+        repair_prompt = mock_openai_client.chat.completions.create.call_args.kwargs["messages"][0]["content"]
+        self.assertIn("Generate exactly 1 multiple-choice", repair_prompt)
+        self.assertEqual(mock_openai_client.chat.completions.create.call_args.kwargs["max_tokens"], quiz_core.quiz_max_tokens(1))
+        self.assertIn("- Question 0?", repair_prompt)
+
+    @patch('quiz_core.client')
+    def test_generate_feedback_success(self, mock_openai_client):
+        mock_completion = MagicMock()
+        mock_choice = MagicMock()
+        mock_choice.message.content = "Great job! You did well."
+        mock_completion.choices = [mock_choice]
+        mock_openai_client.chat.completions.create.return_value = mock_completion
+
+        incorrect = [{"number": 3, "question": "What is 3+3?", "user_answer": "C", "correct_answer": "A",
+                      "explanation": "3+3 equals 6."}]
+        feedback = quiz_core.generate_feedback(8, 10, incorrect)
+        self.assertEqual(feedback, "Great job! You did well.")
+        mock_openai_client.chat.completions.create.assert_called_once()
+        kwargs = mock_openai_client.chat.completions.create.call_args.kwargs
+        self.assertIn("Q3: What is 3+3? (answered C, correct A; 3+3 equals 6.)", kwargs["messages"][0]["content"])
+        self.assertEqual(kwargs["max_tokens"], quiz_core.FEEDBACK_MAX_TOKENS)
+
+    @patch('quiz_core.client')
+    def test_generate_feedback_api_error(self, mock_openai_client):
+        mock_openai_client.chat.completions.create.side_effect = Exception("API Error")
+
+        feedback = quiz_core.generate_feedback(5, 10, [])
+        self.assertEqual(feedback, "Unable to generate feedback due to an error.")
+        mock_openai_client.chat.completions.create.assert_called_once()
+
+    @patch('quiz_core.async_client')
+    def test_agenerate_quiz_success(self, mock_async_client):
+        mock_completion = MagicMock()
+        mock_completion.choices[0].message.content = json.dumps([
+            {
+                "question": "What is 2+2?",
+                "options": {"A": "3", "B": "4", "C": "5", "D": "6"},
+                "correct_answer": "B",
+                "explanation": "2+2 equals 4."
+            }
+        ])
+        mock_async_client.chat.completions.create = AsyncMock(return_value=mock_completion)
+
+        questions = asyncio.run(quiz_core.agenerate_quiz("math"))
+        self.assertEqual(len(questions), 1)
+        mock_async_client.chat.completions.create.assert_awaited_once()
+        self.assertEqual(quiz_core.llm_limiter.in_flight, 0)
+
+    @patch('quiz_core.async_client')
+    def test_agenerate_feedback_api_error(self, mock_async_client):
+        mock_async_client.chat.completions.create = AsyncMock(side_effect=Exception("API Error"))
+
+        feedback = asyncio.run(quiz_core.agenerate_feedback(5, 10, []))
+        self.assertEqual(feedback, "Unable to generate feedback due to an error.")
+        self.assertEqual(quiz_core.llm_limiter.in_flight, 0)
+
+    @patch('quiz_core.async_client')
+    def test_get_llm_feedback_is_cached(self, mock_async_client):
+        mock_completion = MagicMock()
+        mock_completion.choices[0].message.content = "Great job! You did well."
+        mock_async_client.chat.completions.create = AsyncMock(return_value=mock_completion)
+        quiz = [{"question": "What is 2+2?", "options": {"A": "3", "B": "4", "C": "5", "D": "6"},
+                 "correct_answer": "B", "explanation": "2+2 equals 4."}]
+
+        for _ in range(2):
+            feedback = asyncio.run(quiz_core.get_llm_feedback(quiz, ["B"], 1, 1, []))
+            self.assertEqual(feedback, "Great job! You did well.")
+        mock_async_client.chat.completions.create.assert_awaited_once()
+
+    @patch('quiz_core.client')
+    def test_stream_quiz_chunks(self, mock_openai_client):
+        chunks = []
+        for text in ['[{"question": "What is 2+2?", ', '"options": {"A": "3", "B": "4", "C": "5", "D": "6"}, ',
+                     '"correct_answer": "B", "explanation": "2+2 equals 4."}]']:
+            chunk = MagicMock()
+            chunk.choices[0].delta.content = text
+            chunks.append(chunk)
+        mock_openai_client.chat.completions.create.return_value = iter(chunks)
+
+        stream = quiz_core.QuizStream(quiz_core.stream_quiz_chunks("math")).start()
+        questions = stream.result(timeout=2)
+        self.assertEqual(len(questions), 1)
+        self.assertEqual(questions[0]["correct_answer"], "B")
+        self.assertTrue(mock_openai_client.chat.completions.create.call_args.kwargs["stream"])
+
+    @patch('quiz_core.quiz_cache')
+    @patch('quiz_core.question_bank', new_callable=lambda: QuestionBank(":memory:"))
+    @patch('quiz_core.client')
+    def test_truncated_quiz_stream_is_topped_up_before_caching(self, mock_openai_client, mock_bank, mock_cache):
+        questions = [
+            {
+                "question": f"Question {i}?",
+                "options": {"A": "1", "B": "2", "C": "3", "D": "4"},
+                "correct_answer": "A",
+                "explanation": f"Because {i}."
+            }
+            for i in range(quiz_core.quiz_length())
+        ]
+        text = json.dumps(questions)
+
+        def streamed(text):
+            chunk = MagicMock()
+            chunk.choices[0].delta.content = text
+            return iter([chunk])
+
+        def reply(questions):
+            completion = MagicMock()
+            completion.choices[0].message.content = json.dumps(questions)
+            return completion
+
+        # The stream is cut off inside the last question; only that one is requested again
+        create = mock_openai_client.chat.completions.create
+        create.side_effect = [streamed(text[:len(text) - 30]), reply(questions[-1:])]
+        stream = quiz_core.start_quiz_stream("geology")
+        self.assertEqual(stream.result(timeout=2), questions)
+        self.assertIn("Generate exactly 1 multiple-choice", create.call_args.kwargs["messages"][0]["content"])
+        mock_cache.store.assert_called_once()
+        self.assertEqual(len(mock_cache.store.call_args.args[1]), quiz_core.quiz_length())
+
+        # If the top-up fails too, the short quiz is banked but not cached as a full one
+        mock_cache.reset_mock()
+        create.side_effect = [streamed(text[:len(text) - 30]), Exception("API Error")]
+        with patch.object(quiz_core.quiz_caller, "retries", 0):
+            stream = quiz_core.start_quiz_stream("volcanoes")
+            self.assertEqual(len(stream.result(timeout=2)), quiz_core.quiz_length() - 1)
+        mock_cache.store.assert_not_called()
+        self.assertEqual(len(mock_bank.assemble("volcanoes", quiz_core.quiz_length())), quiz_core.quiz_length() - 1)
+
+    def test_resolve_topic_reuses_similar_topic(self):
+        quiz_core.topic_index.add("Machine Learning")
+        self.assertEqual(quiz_core.resolve_topic("machine learning basics"), "machine learning")
+        self.assertEqual(quiz_core.resolve_topic("Underwater Basket Weaving"), "Underwater Basket Weaving")
+
+    @patch('quiz_core.question_bank', new_callable=lambda: QuestionBank(":memory:"))
+    @patch('quiz_core.config.FEEDBACK_MODE', "async")
+    def test_finalize_quiz_saves_once_and_caches_results(self, mock_bank):
+        quiz = [{"question": "What is 2+2?", "options": {"A": "3", "B": "4", "C": "5", "D": "6"},
+                 "correct_answer": "B", "explanation": "2+2 equals 4."},
+                {"question": "What is 3+3?", "options": {"A": "6", "B": "7", "C": "8", "D": "9"},
+                 "correct_answer": "A", "explanation": "3+3 equals 6."}]
+        session = {"username": "Alice", "topic": "math", "quiz": quiz, "user_answers": ["B", None], "score": 1}
+
+        result = asyncio.run(quiz_core.finalize_quiz("session-1", session))
+        self.assertEqual((result["score"], result["total"]), (1, 2))
+        self.assertIn("Final Score: 1/2", result["text"])
+        self.assertTrue(result["feedback_pending"])
+        # Finishing again, even from a fresh copy of the session, neither recomputes nor saves again
+        self.assertIs(asyncio.run(quiz_core.finalize_quiz("session-1", session)), result)
+        asyncio.run(quiz_core.finalize_quiz("session-1", dict(session, result=None)))
+        self.assertEqual(len(quiz_core.leaderboard.top()), 1)
+        quiz_core.result_writer.flush()
+        self.assertEqual(quiz_core.results_store.count(), 1)
+        # The unanswered question is in the answer log, once
+        answers = self.answer_log.read().to_pylist()
+        self.assertEqual(len(answers), 1)
+        self.assertEqual((answers[0]["question_number"], answers[0]["chosen"]), (2, None))
+
+    def test_record_answer_times_answers(self):
+        quiz = [{"question": f"Q{i}?", "options": {"A": "1", "B": "2", "C": "3", "D": "4"},
+                 "correct_answer": "b", "explanation": "Because."} for i in range(2)]
+        session = {"username": "Alice", "topic": "Math ", "quiz": quiz, "shown_at": 1000.0}
+        with patch("quiz_core.time.time", side_effect=[1004.5, 1006.0]):
+            quiz_core.record_answer("s1", session, 0, "B")
+            quiz_core.record_answer("s1", session, 1, "C")
+        answers = sorted(self.answer_log.read().to_pylist(), key=lambda a: a["question_number"])
+        self.assertEqual([a["seconds_to_answer"] for a in answers], [4.5, 1.5])
+        self.assertEqual([a["is_correct"] for a in answers], [True, False])
+        self.assertEqual(answers[0]["topic"], "math")
+        self.assertEqual(answers[0]["correct"], "B")
+
+    def test_sync_quiz_stream_extends_session(self):
+        question = {"question": "What is 2+2?", "options": {"A": "3", "B": "4", "C": "5", "D": "6"},
+                    "correct_answer": "B", "explanation": "2+2 equals 4."}
+        stream = quiz_core.QuizStream(iter([json.dumps([question, dict(question, question="What is 3+3?")])]),
+                                initial=[dict(question, question="What is 1+1?")]).start()
+        quiz_core.live_streams.put("s1", stream)
+        session = {"quiz": list(stream.questions[:1]), "user_answers": ["A"]}
+        quiz_core.sync_quiz_stream("s1", session)
+        self.assertEqual(len(session["quiz"]), 3)
+        self.assertEqual(session["user_answers"], ["A", None, None])
+        # A finished stream is dropped so later clicks don't wait on it
+        self.assertIsNone(quiz_core.live_streams.get("s1"))
+
+    @patch('quiz_core.question_bank', new_callable=lambda: QuestionBank(":memory:"))
+    @patch('quiz_core.async_client')
+    def test_atop_up_quiz_requests_only_missing_questions(self, mock_async_client, mock_bank):
+        banked = [{"question": f"Banked {i}?", "options": {"A": "1", "B": "2", "C": "3", "D": "4"},
+                   "correct_answer": "A", "explanation": "Because."} for i in range(8)]
+        new = [{"question": f"New {i}?", "options": {"A": "1", "B": "2", "C": "3", "D": "4"},
+                "correct_answer": "B", "explanation": "Because."} for i in range(2)]
+        mock_completion = MagicMock()
+        mock_completion.choices[0].message.content = json.dumps(new)
+        mock_async_client.chat.completions.create = AsyncMock(return_value=mock_completion)
+
+        quiz = asyncio.run(quiz_core.atop_up_quiz("math", banked, avoid=["Seen before?"]))
+        self.assertEqual(quiz, banked + new)
+        prompt = mock_async_client.chat.completions.create.call_args.kwargs["messages"][0]["content"]
+        self.assertIn("exactly 2 multiple-choice questions", prompt)
+        self.assertIn("Seen before?", prompt)
+        # The new questions are kept in the bank for the next quiz
+        self.assertEqual(mock_bank.count("math"), 2)
+
+# It's good practice to be able to run tests directly
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+import threading
+import time
+from unittest.mock import MagicMock
+
+from quiz_pool import QuizPool
+
+
+def wait_for(condition, timeout=2):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestQuizPool(unittest.TestCase):
+
+    def setUp(self):
+        self.generate = MagicMock(side_effect=lambda topic: [{"question": topic}])
+        self.pool = QuizPool(self.generate, queue_size=2, max_workers=2, max_topics=2, refill_interval=60)
+
+    def tearDown(self):
+        self.pool.stop()
+
+    def test_warmup_fills_queue(self):
+        self.pool.start(["Python"])
+        self.assertTrue(wait_for(lambda: self.pool.ready_count("python") == 2))
+        self.assertEqual(self.pool.pop(" PYTHON "), [{"question": "python"}])
+
+    def test_pop_miss_schedules_refill(self):
+        self.pool.start()
+        self.assertIsNone(self.pool.pop("History"))
+        self.assertTrue(wait_for(lambda: self.pool.ready_count("history") == 2))
+        self.assertIsNotNone(self.pool.pop("history"))
+        # Popping keeps the queue topped up
+        self.assertTrue(wait_for(lambda: self.pool.ready_count("history") == 2))
+
+    def test_touch_counts_popularity_without_taking_a_quiz(self):
+        self.pool.start()
+        self.pool.touch("History")
+        self.assertTrue(wait_for(lambda: self.pool.ready_count("history") == 2))
+        self.pool.touch("history")
+        time.sleep(0.1)
+        self.assertEqual(self.pool.ready_count("history"), 2)
+        self.assertEqual(self.generate.call_count, 2)
+
+    def test_unpopular_topics_not_prefetched(self):
+        self.pool.start(["a", "b"])
+        self.assertTrue(wait_for(lambda: self.pool.ready_count("a") == 2 and self.pool.ready_count("b") == 2))
+        self.pool.pop("c")
+        time.sleep(0.1)
+        self.assertEqual(self.pool.ready_count("c"), 0)
+
+    def test_concurrency_limit(self):
+        running = []
+        peak = []
+        lock = threading.Lock()
+
+        def slow_generate(topic):
+            with lock:
+                running.append(topic)
+                peak.append(len(running))
+            time.sleep(0.05)
+            with lock:
+                running.remove(topic)
+            return [topic]
+
+        pool = QuizPool(slow_generate, queue_size=1, max_workers=2, max_topics=5, refill_interval=60)
+        pool.start(["a", "b", "c", "d", "e"])
+        try:
+            self.assertTrue(wait_for(lambda: all(pool.ready_count(t) == 1 for t in "abcde")))
+            self.assertLessEqual(max(peak), 2)
+        finally:
+            pool.stop()
+
+    def test_generation_error_does_not_kill_pool(self):
+        self.generate.side_effect = Exception("API Error")
+        self.pool.start(["Python"])
+        self.assertTrue(wait_for(lambda: self.generate.called))
+        self.assertIsNone(self.pool.pop("python"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import unittest
+import json
+import threading
+from unittest.mock import MagicMock
+
+from quiz_stream import QuestionStreamParser, QuizStream
+
+QUESTIONS = [
+    {
+        "question": "What is 2+2? {tricky} \"quoted\"",
+        "options": {"A": "3", "B": "4", "C": "5", "D": "6"},
+        "correct_answer": "B",
+        "explanation": "2+2 equals 4."
+    },
+    {
+        "question": "What is [3+3]?",
+        "options": {"A": "6", "B": "4", "C": "5", "D": "7"},
+        "correct_answer": "A",
+        "explanation": "3+3 equals 6."
+    }
+]
+
+
+def chunked(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class TestQuestionStreamParser(unittest.TestCase):
+
+    def test_parses_objects_as_they_complete(self):
+        text = "```json\n" + json.dumps(QUESTIONS, indent=2) + "\n```"
+        parser = QuestionStreamParser()
+        parsed = []
+        first_seen_at = None
+        chunks = chunked(text, 7)
+        for i, chunk in enumerate(chunks):
+            parsed.extend(parser.feed(chunk))
+            if parsed and first_seen_at is None:
+                first_seen_at = i
+        self.assertEqual(parsed, QUESTIONS)
+        self.assertTrue(parser.finished)
+        # The first question is available well before the stream ends
+        self.assertLess(first_seen_at, len(chunks) - 5)
+
+    def test_single_character_chunks(self):
+        parser = QuestionStreamParser()
+        parsed = []
+        for char in json.dumps(QUESTIONS):
+            parsed.extend(parser.feed(char))
+        self.assertEqual(parsed, QUESTIONS)
+
+    def test_truncated_stream_keeps_complete_objects(self):
+        text = json.dumps(QUESTIONS)
+        parser = QuestionStreamParser()
+        parsed = parser.feed(text[:len(text) - 20])
+        self.assertEqual(parsed, QUESTIONS[:1])
+        self.assertFalse(parser.finished)
+
+
+class TestQuizStream(unittest.TestCase):
+
+    def test_stream_collects_questions_and_calls_on_complete(self):
+        on_complete = MagicMock()
+        stream = QuizStream(iter(chunked(json.dumps(QUESTIONS), 5)), on_complete=on_complete).start()
+        self.assertEqual(stream.result(timeout=2), QUESTIONS)
+        self.assertTrue(stream.done)
+        on_complete.assert_called_once_with(QUESTIONS)
+
+    def test_wait_for_returns_after_first_question(self):
+        release = threading.Event()
+        first, second = json.dumps(QUESTIONS[0]), json.dumps(QUESTIONS[1])
+
+        def chunks():
+            yield "[" + first + ","
+            release.wait(2)
+            yield second + "]"
+
+        stream = QuizStream(chunks()).start()
+        self.assertTrue(stream.wait_for(1, timeout=2))
+        self.assertEqual(stream.questions, QUESTIONS[:1])
+        self.assertFalse(stream.done)
+        release.set()
+        self.assertEqual(stream.result(timeout=2), QUESTIONS)
+
+    def test_error_marks_stream_done_without_caching(self):
+        def chunks():
+            yield "[" + json.dumps(QUESTIONS[0]) + ","
+            raise Exception("API Error")
+
+        on_complete = MagicMock()
+        stream = QuizStream(chunks(), on_complete=on_complete).start()
+        self.assertEqual(stream.result(timeout=2), QUESTIONS[:1])
+        self.assertIsNotNone(stream.error)
+        on_complete.assert_not_called()
+
+    def test_damaged_stream_is_repaired_before_done(self):
+        text = json.dumps(QUESTIONS)
+        repair = MagicMock(return_value=QUESTIONS[1:])
+        on_complete = MagicMock()
+        stream = QuizStream(iter([text[:len(text) - 20]]), on_complete=on_complete, repair=repair).start()
+        self.assertEqual(stream.result(timeout=2), QUESTIONS)
+        self.assertTrue(stream.damaged)
+        repair.assert_called_once_with(QUESTIONS[:1])
+        on_complete.assert_called_once_with(QUESTIONS)
+
+    def test_clean_stream_is_not_repaired(self):
+        repair = MagicMock()
+        stream = QuizStream(iter([json.dumps(QUESTIONS)]), validate=dict, repair=repair).start()
+        stream.result(timeout=2)
+        self.assertFalse(stream.damaged)
+        repair.assert_not_called()
+
+    def test_initial_questions_are_served_first(self):
+        on_complete = MagicMock()
+        stream = QuizStream(iter([json.dumps(QUESTIONS[1:])]), on_complete=on_complete, initial=QUESTIONS[:1])
+        self.assertTrue(stream.wait_for(1, timeout=0))
+        stream.start()
+        self.assertEqual(stream.result(timeout=2), QUESTIONS)
+        on_complete.assert_called_once_with(QUESTIONS[1:])
+
+
+if __name__ == '__main__':
+    unittest.main()
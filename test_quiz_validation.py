@@ -0,0 +1,77 @@
+import unittest
+import json
+
+from quiz_validation import merge_questions, parse_quiz_reply, validate_question
+
+
+def make_question(i, **overrides):
+    q = {
+        "question": f"Question {i}?",
+        "options": {"A": "1", "B": "2", "C": "3", "D": "4"},
+        "correct_answer": "B",
+        "explanation": f"Because {i}."
+    }
+    q.update(overrides)
+    return q
+
+
+class TestValidateQuestion(unittest.TestCase):
+
+    def test_valid_question_unchanged(self):
+        self.assertEqual(validate_question(make_question(1)), make_question(1))
+
+    def test_normalizes_answer_and_options(self):
+        q = validate_question(make_question(1, correct_answer="b) 2", options=["1", "2", "3", "4"]))
+        self.assertEqual(q["correct_answer"], "B")
+        self.assertEqual(q["options"], {"A": "1", "B": "2", "C": "3", "D": "4"})
+        q = validate_question(make_question(1, options={"a": "1", "b": "2", "c": "3", "d": "4"}))
+        self.assertEqual(sorted(q["options"]), ["A", "B", "C", "D"])
+
+    def test_rejects_bad_questions(self):
+        self.assertIsNone(validate_question(make_question(1, correct_answer="E")))
+        self.assertIsNone(validate_question(make_question(1, options={"A": "1", "B": "2", "C": "3"})))
+        self.assertIsNone(validate_question(make_question(1, explanation="")))
+        self.assertIsNone(validate_question(make_question(1, question=None)))
+        self.assertIsNone(validate_question("not a dict"))
+
+
+class TestParseQuizReply(unittest.TestCase):
+
+    def test_clean_reply(self):
+        questions, damaged = parse_quiz_reply(json.dumps([make_question(1), make_question(2)]))
+        self.assertEqual(len(questions), 2)
+        self.assertFalse(damaged)
+
+    def test_extracts_from_prose_and_fences(self):
+        text = "Here are [2] questions:\n```json\n" + json.dumps([make_question(1), make_question(2)]) + "\n```\nEnjoy!"
+        questions, damaged = parse_quiz_reply(text)
+        self.assertEqual(len(questions), 2)
+        self.assertFalse(damaged)
+
+    def test_wrapped_in_object(self):
+        questions, _ = parse_quiz_reply(json.dumps({"questions": [make_question(1)]}))
+        self.assertEqual(len(questions), 1)
+
+    def test_salvages_truncated_reply(self):
+        text = json.dumps([make_question(1), make_question(2), make_question(3)])
+        questions, damaged = parse_quiz_reply(text[:-40])
+        self.assertEqual([q["question"] for q in questions], ["Question 1?", "Question 2?"])
+        self.assertTrue(damaged)
+
+    def test_drops_invalid_and_duplicate_questions(self):
+        text = json.dumps([make_question(1), make_question(2, correct_answer="Z"), make_question(1)])
+        questions, damaged = parse_quiz_reply(text)
+        self.assertEqual(len(questions), 1)
+        self.assertTrue(damaged)
+
+    def test_no_json(self):
+        self.assertEqual(parse_quiz_reply("This is not valid JSON"), ([], True))
+        self.assertEqual(parse_quiz_reply(None), ([], True))
+
+    def test_merge_questions_skips_duplicates(self):
+        merged = merge_questions([make_question(1)], [make_question(1, question="question 1?"), make_question(2)])
+        self.assertEqual([q["question"] for q in merged], ["Question 1?", "Question 2?"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+import time
+from unittest.mock import MagicMock
+
+from result_writer import ResultWriter
+from results_store import make_row
+
+
+def wait_for(condition, timeout=2):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestResultWriter(unittest.TestCase):
+
+    def test_flushes_on_batch_size(self):
+        store = MagicMock()
+        writer = ResultWriter(store, batch_size=3, flush_interval=60).start()
+        try:
+            for i in range(3):
+                writer.submit(make_row(f"U{i}", i, 10))
+            self.assertTrue(wait_for(lambda: writer.stats["flushed"] == 3))
+            store.add_many.assert_called_once()
+            self.assertEqual(len(store.add_many.call_args.args[0]), 3)
+        finally:
+            writer.close()
+
+    def test_flushes_on_interval(self):
+        store = MagicMock()
+        writer = ResultWriter(store, batch_size=100, flush_interval=0.05).start()
+        try:
+            writer.submit(make_row("U", 1, 10))
+            self.assertTrue(wait_for(lambda: writer.stats["flushed"] == 1))
+            self.assertEqual(writer.stats["last_batch_size"], 1)
+        finally:
+            writer.close()
+
+    def test_on_flush_reports_each_batch(self):
+        flushed = []
+        writer = ResultWriter(MagicMock(), batch_size=2, flush_interval=60, on_flush=lambda rows, seconds: flushed.append(rows))
+        writer.submit(make_row("U1", 1, 10))
+        writer.submit(make_row("U2", 2, 10))
+        writer.flush()
+        # Empty flushes are not reported
+        self.assertEqual(sum(flushed), 2)
+        self.assertNotIn(0, flushed)
+
+    def test_close_flushes_remaining_rows(self):
+        store = MagicMock()
+        writer = ResultWriter(store, batch_size=100, flush_interval=60).start()
+        writer.submit(make_row("U", 1, 10))
+        writer.close()
+        self.assertEqual(writer.pending(), 0)
+        self.assertEqual(writer.stats["flushed"], 1)
+
+    def test_failed_flush_is_retried(self):
+        store = MagicMock()
+        store.add_many.side_effect = [Exception("disk full"), None]
+        writer = ResultWriter(store, batch_size=100, flush_interval=60)
+        writer.submit(make_row("U", 1, 10))
+        self.assertEqual(writer.stats["failures"], 1)
+        self.assertEqual(writer.pending(), 1)
+        self.assertEqual(writer.flush(), 1)
+        self.assertEqual(writer.pending(), 0)
+
+    def test_pending_is_bounded(self):
+        store = MagicMock()
+        store.add_many.side_effect = Exception("disk full")
+        writer = ResultWriter(store, batch_size=100, flush_interval=60, max_pending=5)
+        for i in range(8):
+            writer.submit(make_row(f"U{i}", i, 10))
+        self.assertLessEqual(writer.pending(), 5)
+        self.assertGreater(writer.stats["dropped"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
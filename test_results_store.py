@@ -0,0 +1,206 @@
+import unittest
+import csv
+import os
+import sqlite3
+import threading
+
+from kv_store import RedisKeyValueStore
+from results_store import KVResultsStore, ResultsStore, SQLiteResultsStore, CSVResultsStore, create_results_store, make_row, COLUMNS
+from test_kv_store import FakeRedis
+
+TEST_RESULTS_FILE = "test_store_results.csv"
+TEST_RESULTS_DB = "test_store_results.db"
+
+
+def remove_test_files():
+    for path in (TEST_RESULTS_FILE, TEST_RESULTS_DB, TEST_RESULTS_DB + "-wal", TEST_RESULTS_DB + "-shm"):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+class TestSQLiteResultsStore(unittest.TestCase):
+
+    def setUp(self):
+        remove_test_files()
+        self.store = SQLiteResultsStore(TEST_RESULTS_DB)
+
+    def tearDown(self):
+        self.store.close()
+        remove_test_files()
+
+    def test_top_k_sorted_with_ties_by_insertion(self):
+        for name, score in [("A", 7), ("B", 9), ("C", 7), ("D", 3)]:
+            self.store.add(name, score, 10)
+        top = self.store.top(3)
+        self.assertEqual([r["Name"] for r in top], ["B", "A", "C"])
+        self.assertEqual(list(top[0]), COLUMNS)
+        self.assertEqual(self.store.count(), 4)
+
+    def test_topic_and_since_filters(self):
+        self.store.add("A", 5, 10, "2026-01-01 10:00:00", "math")
+        self.store.add("B", 9, 10, "2026-01-02 10:00:00", "art")
+        self.store.add("C", 7, 10, "2026-01-03 10:00:00", "math")
+        self.assertEqual([r["Name"] for r in self.store.top(5, topic="math")], ["C", "A"])
+        self.assertEqual([r["Name"] for r in self.store.top(5, since="2026-01-02 00:00:00")], ["B", "C"])
+        per_topic = self.store.top_per_topic(1)
+        self.assertEqual({t: rows[0]["Name"] for t, rows in per_topic.items()}, {"math": "C", "art": "B"})
+
+    def test_rows_after(self):
+        self.assertEqual(self.store.last_id(), 0)
+        for name in "ABC":
+            self.store.add(name, 5, 10)
+        rows = self.store.rows_after(1, limit=1)
+        self.assertEqual([(row_id, row["Name"], own) for row_id, row, own in rows], [(2, "B", True)])
+        self.assertEqual(self.store.rows_after(self.store.last_id()), [])
+        self.assertEqual(self.store.last_id(), 3)
+        # Rows written by another worker's store, and migrated rows, aren't ours
+        other = SQLiteResultsStore(TEST_RESULTS_DB)
+        other.add("D", 5, 10)
+        other.close()
+        self.assertEqual([own for _, _, own in self.store.rows_after(2)], [True, False])
+
+    def test_adds_topic_column_to_old_database(self):
+        self.store.close()
+        os.remove(TEST_RESULTS_DB)
+        conn = sqlite3.connect(TEST_RESULTS_DB)
+        conn.execute("CREATE TABLE results (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, "
+                     "score INTEGER NOT NULL, total INTEGER NOT NULL, timestamp TEXT NOT NULL)")
+        conn.execute("INSERT INTO results (name, score, total, timestamp) VALUES ('Old', 3, 10, '2025-01-01 00:00:00')")
+        conn.commit()
+        conn.close()
+        self.store = SQLiteResultsStore(TEST_RESULTS_DB)
+        self.assertIsNone(self.store.top(1)[0]["Topic"])
+
+    def test_wal_mode_and_score_index(self):
+        mode = self.store._conn.execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(mode, "wal")
+        plan = " ".join(str(row) for row in self.store._conn.execute(
+            "EXPLAIN QUERY PLAN SELECT name FROM results ORDER BY score DESC, id ASC LIMIT 10"
+        ))
+        self.assertIn("idx_results_score", plan)
+
+    def test_concurrent_adds(self):
+        threads = [
+            threading.Thread(target=lambda i=i: [self.store.add(f"U{i}", j, 10) for j in range(20)])
+            for i in range(5)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(self.store.count(), 100)
+
+    def test_csv_migration_runs_once(self):
+        with open(TEST_RESULTS_FILE, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(COLUMNS)
+            writer.writerow(["Old", 6, 10, "2025-01-01 10:00:00"])
+            writer.writerow(["Older", 8, 10, "2025-01-01 09:00:00"])
+        self.assertEqual(self.store.migrate_csv(TEST_RESULTS_FILE), 2)
+        self.assertEqual(self.store.migrate_csv(TEST_RESULTS_FILE), 0)
+        self.assertEqual(self.store.top(1)[0]["Name"], "Older")
+        self.assertEqual(self.store.count(), 2)
+
+    def test_migration_without_csv(self):
+        self.assertEqual(self.store.migrate_csv(TEST_RESULTS_FILE), 0)
+
+    def test_concurrent_migration_imports_once(self):
+        with open(TEST_RESULTS_FILE, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(COLUMNS)
+            writer.writerow(["Old", 6, 10, "2025-01-01 10:00:00"])
+        stores = [SQLiteResultsStore(TEST_RESULTS_DB) for _ in range(4)]
+        barrier = threading.Barrier(len(stores))
+        migrated = []
+
+        def migrate(store):
+            barrier.wait()
+            migrated.append(store.migrate_csv(TEST_RESULTS_FILE))
+
+        threads = [threading.Thread(target=migrate, args=(store,)) for store in stores]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        for store in stores:
+            store.close()
+        self.assertEqual(sorted(migrated), [0, 0, 0, 1])
+        self.assertEqual(self.store.count(), 1)
+
+    def test_incomplete_store_cannot_be_created(self):
+        class TopOnly(ResultsStore):
+            def top(self, k=10, topic=None, since=None):
+                return []
+
+        with self.assertRaises(TypeError):
+            TopOnly()
+
+
+class TestCSVResultsStore(unittest.TestCase):
+
+    def setUp(self):
+        remove_test_files()
+
+    def tearDown(self):
+        remove_test_files()
+
+    def test_add_and_top(self):
+        store = CSVResultsStore(TEST_RESULTS_FILE)
+        store.add_many([make_row("A", 4, 10, topic="math"), make_row("B", 9, 10, topic="art")])
+        self.assertEqual(store.top(1)[0]["Name"], "B")
+        self.assertEqual(store.top(5, topic="math")[0]["Name"], "A")
+        self.assertEqual(store.count(), 2)
+        store.add("C", 1, 10)
+        self.assertEqual([(row_id, row["Name"], own) for row_id, row, own in store.rows_after(1)], [(2, "B", True), (3, "C", True)])
+        self.assertEqual([own for _, _, own in CSVResultsStore(TEST_RESULTS_FILE).rows_after(0)], [False, False, False])
+        self.assertEqual(store.last_id(), 3)
+
+    def test_legacy_csv_header_preserved(self):
+        with open(TEST_RESULTS_FILE, "w", newline="") as f:
+            csv.writer(f).writerow(["Name", "Score", "Out Of", "Timestamp"])
+        store = CSVResultsStore(TEST_RESULTS_FILE)
+        store.add("A", 4, 10, topic="math")
+        with open(TEST_RESULTS_FILE, newline="") as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(len(rows[1]), 4)
+        self.assertEqual(store.top(1)[0]["Topic"], None)
+
+    def test_factory(self):
+        self.assertIsInstance(create_results_store("csv", TEST_RESULTS_FILE), CSVResultsStore)
+        with self.assertRaises(ValueError):
+            create_results_store("mongo", TEST_RESULTS_FILE)
+
+
+
+class TestKVResultsStore(unittest.TestCase):
+
+    def setUp(self):
+        self.kv = RedisKeyValueStore(client=FakeRedis())
+        self.store = KVResultsStore(self.kv, batch_size=2)
+
+    def test_top_k_sorted_with_ties_by_insertion(self):
+        for name, score, topic in [("A", 7, "math"), ("B", 9, "art"), ("C", 7, "math"), ("D", 3, "math"), ("E", 8, None)]:
+            self.store.add(name, score, 10, f"2026-01-0{ord(name) - 64} 10:00:00", topic)
+        self.assertEqual([r["Name"] for r in self.store.top(3)], ["B", "E", "A"])
+        self.assertEqual([r["Name"] for r in self.store.top(5, topic="math")], ["A", "C", "D"])
+        self.assertEqual([r["Name"] for r in self.store.top(5, since="2026-01-03 00:00:00")], ["E", "C", "D"])
+        per_topic = self.store.top_per_topic(2)
+        self.assertEqual({topic: [r["Name"] for r in rows] for topic, rows in per_topic.items()}, {"math": ["A", "C"], "art": ["B"]})
+        self.assertEqual(self.store.count(), 5)
+
+    def test_rows_after_marks_own_rows(self):
+        other = KVResultsStore(self.kv)
+        self.store.add("A", 5, 10)
+        other.add("B", 6, 10)
+        self.store.add("C", 7, 10)
+        rows = self.store.rows_after(1)
+        self.assertEqual([(row_id, row["Name"], own) for row_id, row, own in rows], [(2, "B", False), (3, "C", True)])
+        self.assertEqual(other.last_id(), 3)
+        self.assertEqual(self.store.rows_after(3), [])
+
+    def test_factory(self):
+        self.assertIsInstance(create_results_store("kv", None, kv=self.kv), KVResultsStore)
+
+
+if __name__ == '__main__':
+    unittest.main()
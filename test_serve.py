@@ -0,0 +1,67 @@
+import unittest
+import itertools
+
+import httpx
+from starlette.testclient import TestClient
+
+from serve import WORKER_COOKIE, create_proxy, pick_worker, worker_env
+
+
+# Fake workers that echo which one answered and the Host header they saw
+def fake_workers(request):
+    body = f"{request.url.port} {request.url.path} {request.headers['host']}".encode()
+    return httpx.Response(200, stream=httpx.ByteStream(body), headers={"set-cookie": "app=1"})
+
+
+class TestWorkerEnv(unittest.TestCase):
+
+    def test_shared_backends_and_ports(self):
+        env = worker_env(1, 7901, base={"KV_BACKEND": "redis", "METRICS_PORT": "9464"})
+        self.assertEqual(env["KV_BACKEND"], "redis")
+        self.assertEqual(env["SESSION_BACKEND"], "kv")
+        self.assertEqual(env["RESULTS_BACKEND"], "kv")
+        self.assertEqual(env["QUESTION_BANK_BACKEND"], "kv")
+        self.assertEqual(env["GRADIO_SERVER_PORT"], "7901")
+        self.assertEqual(env["QUIZ_POOL_WARMUP_TOPICS"], "")
+        self.assertEqual(env["METRICS_PORT"], "9465")
+        self.assertEqual(worker_env(1, 7901, base={"METRICS_PORT": "0"})["METRICS_PORT"], "0")
+        self.assertNotIn("QUIZ_POOL_WARMUP_TOPICS", worker_env(0, 7900, base={}))
+        # Metrics stay off unless a port is set
+        self.assertNotIn("METRICS_PORT", worker_env(1, 7901, base={}))
+        local = worker_env(0, 7900, base={})
+        self.assertEqual(local["RESULTS_BACKEND"], "sqlite")
+        self.assertNotIn("QUIZ_CACHE_BACKEND", local)
+
+
+class TestProxy(unittest.TestCase):
+
+    def test_pick_worker(self):
+        counter = itertools.count()
+        self.assertEqual(pick_worker({}, 2, counter), (0, True))
+        self.assertEqual(pick_worker({}, 2, counter), (1, True))
+        self.assertEqual(pick_worker({WORKER_COOKIE: "1"}, 2, counter), (1, False))
+        # A cookie from a bigger deployment falls back to round-robin
+        self.assertEqual(pick_worker({WORKER_COOKIE: "5"}, 2, counter), (0, True))
+
+    def test_browsers_stick_to_their_worker(self):
+        urls = ["http://127.0.0.1:7900", "http://127.0.0.1:7901"]
+        app = create_proxy(urls, transport=httpx.MockTransport(fake_workers))
+        with TestClient(app, base_url="http://quiz.example") as first, TestClient(app, base_url="http://quiz.example") as second:
+            reply = first.get("/config?x=1")
+            self.assertEqual(reply.text, "7900 /config quiz.example")
+            self.assertEqual(reply.cookies.get("app"), "1")
+            self.assertEqual(second.get("/").text.split()[0], "7901")
+            # Later requests go back to the worker named in the cookie
+            for _ in range(3):
+                self.assertEqual(first.post("/gradio_api/queue/join", json={}).text.split()[0], "7900")
+
+    def test_unavailable_worker(self):
+        def down(request):
+            raise httpx.ConnectError("refused")
+        app = create_proxy(["http://127.0.0.1:7900"], transport=httpx.MockTransport(down))
+        with TestClient(app) as client:
+            self.assertEqual(client.get("/").status_code, 502)
+
+
+if __name__ == '__main__':
+    unittest.main()
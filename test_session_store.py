@@ -0,0 +1,113 @@
+import unittest
+import os
+import time
+from unittest.mock import patch
+
+from kv_store import MemoryKeyValueStore
+from session_store import KVSessionStore, MemorySessionStore, SessionStore, SQLiteSessionStore, create_session_store, new_session_id
+
+TEST_SESSIONS_DB = "test_sessions.db"
+
+
+class TestMemorySessionStore(unittest.TestCase):
+
+    def test_put_get_delete(self):
+        store = MemorySessionStore()
+        session_id = new_session_id()
+        store.put(session_id, {"score": 1})
+        self.assertEqual(store.get(session_id), {"score": 1})
+        store.delete(session_id)
+        self.assertIsNone(store.get(session_id))
+        self.assertIsNone(store.get("unknown"))
+
+    def test_lru_eviction_is_bounded(self):
+        store = MemorySessionStore(max_sessions=2)
+        store.put("a", {})
+        store.put("b", {})
+        # Touch "a" so "b" becomes the least recently used session
+        store.get("a")
+        store.put("c", {})
+        self.assertEqual(len(store), 2)
+        self.assertIsNotNone(store.get("a"))
+        self.assertIsNone(store.get("b"))
+        self.assertEqual(store.stats()["evictions"], 1)
+
+    def test_idle_sessions_expire(self):
+        store = MemorySessionStore(ttl=0.01)
+        store.put("a", {})
+        time.sleep(0.02)
+        self.assertIsNone(store.get("a"))
+        self.assertEqual(len(store), 0)
+
+
+class TestKVSessionStore(unittest.TestCase):
+
+    def test_reading_a_session_keeps_it_alive(self):
+        store = KVSessionStore(MemoryKeyValueStore(), ttl=10)
+        with patch("kv_store.time.time", return_value=1000):
+            store.put("a", {"score": 1})
+        with patch("kv_store.time.time", return_value=1008):
+            self.assertEqual(store.get("a"), {"score": 1})
+        with patch("kv_store.time.time", return_value=1015):
+            self.assertEqual(store.get("a"), {"score": 1})
+        with patch("kv_store.time.time", return_value=1026):
+            self.assertIsNone(store.get("a"))
+
+
+class TestSQLiteSessionStore(unittest.TestCase):
+
+    def setUp(self):
+        self.cleanup()
+        self.store = SQLiteSessionStore(TEST_SESSIONS_DB, ttl=60, prune_every=2)
+
+    def tearDown(self):
+        self.store.close()
+        self.cleanup()
+
+    def cleanup(self):
+        for path in (TEST_SESSIONS_DB, TEST_SESSIONS_DB + "-wal", TEST_SESSIONS_DB + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_sessions_round_trip_as_copies(self):
+        session = {"quiz": [{"question": "?"}], "user_answers": [None], "score": 0}
+        self.store.put("a", session)
+        loaded = self.store.get("a")
+        self.assertEqual(loaded, session)
+        loaded["user_answers"][0] = "B"
+        self.assertEqual(self.store.get("a")["user_answers"], [None])
+        self.store.delete("a")
+        self.assertIsNone(self.store.get("a"))
+
+    def test_sessions_survive_reopening(self):
+        self.store.put("a", {"score": 3})
+        self.store.close()
+        self.store = SQLiteSessionStore(TEST_SESSIONS_DB, ttl=60)
+        self.assertEqual(self.store.get("a"), {"score": 3})
+
+    def test_expired_sessions_are_hidden_and_pruned(self):
+        self.store.ttl = 0.01
+        self.store.put("a", {})
+        time.sleep(0.02)
+        self.assertIsNone(self.store.get("a"))
+        self.store.put("b", {})
+        count = self.store._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        self.assertEqual(count, 1)
+
+    def test_incomplete_store_cannot_be_created(self):
+        class ReadOnly(SessionStore):
+            def get(self, session_id):
+                return None
+
+        with self.assertRaises(TypeError):
+            ReadOnly()
+
+    def test_create_session_store(self):
+        self.assertIsInstance(create_session_store("memory"), MemorySessionStore)
+        self.assertIsInstance(create_session_store("kv", kv=MemoryKeyValueStore()), KVSessionStore)
+        with self.assertRaises(ValueError):
+            create_session_store("redis")
+
+
+if __name__ == '__main__':
+    unittest.main()
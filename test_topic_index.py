@@ -0,0 +1,66 @@
+import unittest
+
+from topic_index import TopicIndex, canonical_topic
+
+
+class TestTopicIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = TopicIndex(threshold=0.8)
+        self.index.add_many(["Python", "World War 1", "JavaScript", "Machine Learning"])
+
+    def test_canonical_topic(self):
+        self.assertEqual(canonical_topic("  Python Programming Basics "), "python")
+        self.assertEqual(canonical_topic("Intro to Data Structures"), "data structure")
+        self.assertEqual(canonical_topic("C++"), "c++")
+        self.assertEqual(canonical_topic("the basics"), "")
+        self.assertEqual(canonical_topic("Henry VIII"), "henry 8")
+        self.assertEqual(canonical_topic("Final Fantasy XIV"), "final fantasy 14")
+        self.assertEqual(canonical_topic("Malcolm X"), "malcolm x")
+        self.assertEqual(canonical_topic("Mac OS X"), "mac os x")
+        self.assertEqual(canonical_topic("Star Wars Episode V"), "star war episode 5")
+        self.assertEqual(canonical_topic("I"), "i")
+
+    def test_near_duplicates_map_to_existing_topic(self):
+        for topic in ["python", "Python 3", "python programming", "Python basics"]:
+            self.assertEqual(self.index.match(topic), "python", topic)
+        self.assertEqual(self.index.match("machine-learning"), "machine learning")
+        self.assertEqual(self.index.match("Javascripts"), "javascript")
+
+    def test_unrelated_topics_do_not_match(self):
+        self.assertIsNone(self.index.match("Java"))
+        self.assertIsNone(self.index.match("Ancient Rome"))
+        self.assertIsNone(self.index.match("quiz"))
+
+    def test_conflicting_numbers_do_not_match(self):
+        self.assertIsNone(self.index.match("World War 2"))
+        self.assertEqual(self.index.match("world war 1"), "world war 1")
+        self.assertEqual(self.index.match("World War I"), "world war 1")
+        self.assertIsNone(self.index.match("World War II"))
+        self.index.add("Henry VII")
+        self.assertIsNone(self.index.match("henry viii"))
+        self.assertEqual(self.index.match("Henry 7"), "henry vii")
+
+    def test_add_is_idempotent_and_grows(self):
+        self.index.add("python basics")
+        self.assertEqual(len(self.index), 4)
+        for i in range(100):
+            self.index.add(f"topic{i} zz{i}")
+        self.assertEqual(len(self.index), 104)
+        self.assertEqual(self.index.match("Python"), "python")
+        self.assertEqual(self.index.match("topic57 zz57"), "topic57 zz57")
+
+    def test_max_topics(self):
+        index = TopicIndex(max_topics=1)
+        index.add("python")
+        index.add("rust")
+        self.assertEqual(len(index), 1)
+
+    def test_stats(self):
+        self.index.match("python")
+        self.index.match("history of art")
+        self.assertEqual(self.index.stats(), {"hits": 1, "misses": 1, "topics": 4})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,172 @@
+import re
+import threading
+import zlib
+import logging
+
+import numpy as np
+
+from quiz_cache import normalize_topic
+
+logger = logging.getLogger(__name__)
+
+# Words that don't change which question pool a topic belongs to
+FILLER_WORDS = frozenset({
+    "a", "an", "the", "of", "for", "to", "in", "on", "and", "about", "with",
+    "intro", "introduction", "basic", "basics", "fundamental", "fundamentals",
+    "essential", "essentials", "beginner", "beginners", "overview", "101",
+    "programming", "language", "concept", "concepts", "quiz", "questions", "general",
+})
+
+# Roman numerals ii..xx as digits, so "Henry VIII" and "henry 8" compare as the same number.
+# The one-letter numerals i, v and x are ordinary words ("Malcolm X", "Mac OS X") unless
+# they follow one of SEQUEL_WORDS, as in "World War I" or "Part V".
+ROMAN_NUMERALS = {
+    roman: str(value) for value, roman in enumerate([
+        "i", "ii", "iii", "iv", "v", "vi", "vii", "viii", "ix", "x",
+        "xi", "xii", "xiii", "xiv", "xv", "xvi", "xvii", "xviii", "xix", "xx"
+    ], start=1)
+}
+SEQUEL_WORDS = frozenset({"part", "war", "chapter", "book", "volume", "vol", "episode", "act", "season", "phase", "level"})
+
+
+def _numeral(word, previous):
+    if len(word) == 1 and previous not in SEQUEL_WORDS:
+        return word
+    return ROMAN_NUMERALS.get(word, word)
+
+
+def _singular(word):
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+# Lexical normal form: "Python Programming Basics" -> "python", "Henry VIII" -> "henry 8"
+def canonical_topic(topic):
+    words = re.findall(r"[a-z0-9+#]+", normalize_topic(topic))
+    words = [_numeral(word, previous) for previous, word in zip([None] + words, words)]
+    return " ".join(_singular(word) for word in words if word not in FILLER_WORDS)
+
+
+# Character trigrams plus whole words; numbers are left out and compared separately
+def _features(canonical):
+    features = []
+    for word in canonical.split():
+        if word.isdigit():
+            continue
+        padded = f" {word} "
+        features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+        features.append("w:" + word)
+    return features
+
+
+def _numbers(canonical):
+    return {word for word in canonical.split() if word.isdigit()}
+
+
+class TopicIndex:
+    """Maps incoming topics onto existing question pools.
+
+    Topics are first reduced to a canonical form; an exact canonical match
+    wins outright. Otherwise the topic is compared against every indexed
+    topic by cosine similarity of hashed TF-IDF vectors in one matrix-vector
+    product. Candidates whose numbers disagree ("world war 1" vs "world war
+    2") never match.
+    """
+
+    def __init__(self, threshold=0.8, dim=1024, max_topics=10000):
+        self.threshold = threshold
+        self.dim = dim
+        self.max_topics = max_topics
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._topics = []
+        self._canonicals = []
+        self._by_canonical = {}
+        self._counts = np.zeros((64, dim), dtype=np.float32)
+        self._weighted = None
+        self._idf = None
+
+    def __len__(self):
+        return len(self._topics)
+
+    def _vector(self, canonical):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature in _features(canonical):
+            vector[zlib.crc32(feature.encode("utf-8")) % self.dim] += 1
+        return vector
+
+    # Register a topic that now has a question pool
+    def add(self, topic):
+        canonical = canonical_topic(topic)
+        if not canonical:
+            return
+        with self._lock:
+            if canonical in self._by_canonical:
+                return
+            if len(self._topics) >= self.max_topics:
+                logger.warning(f"Topic index is full ({self.max_topics} topics); not indexing: {topic}")
+                return
+            n = len(self._topics)
+            if n == len(self._counts):
+                grown = np.zeros((n * 2, self.dim), dtype=np.float32)
+                grown[:n] = self._counts
+                self._counts = grown
+            self._counts[n] = self._vector(canonical)
+            self._topics.append(normalize_topic(topic))
+            self._canonicals.append(canonical)
+            self._by_canonical[canonical] = self._topics[-1]
+            self._weighted = None
+
+    def add_many(self, topics):
+        for topic in topics:
+            self.add(topic)
+
+    # Recompute IDF weights and unit-length rows after topics were added
+    def _rebuild(self):
+        n = len(self._topics)
+        counts = self._counts[:n]
+        df = np.count_nonzero(counts, axis=0)
+        self._idf = (np.log((1 + n) / (1 + df)) + 1).astype(np.float32)
+        weighted = counts * self._idf
+        norms = np.linalg.norm(weighted, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        self._weighted = weighted / norms
+
+    # Existing pool topic for `topic`, or None if nothing is similar enough
+    def match(self, topic):
+        canonical = canonical_topic(topic)
+        if not canonical:
+            return None
+        with self._lock:
+            match = self._by_canonical.get(canonical)
+            if match is None and self._topics:
+                match = self._nearest(canonical)
+            if match is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return match
+
+    def _nearest(self, canonical):
+        if self._weighted is None:
+            self._rebuild()
+        query = self._vector(canonical) * self._idf
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return None
+        scores = self._weighted @ (query / norm)
+        numbers = _numbers(canonical)
+        candidates = np.flatnonzero(scores >= self.threshold)
+        for i in candidates[np.argsort(-scores[candidates])]:
+            other = _numbers(self._canonicals[i])
+            if numbers and other and numbers != other:
+                continue
+            logger.debug(f"Topic '{canonical}' matched '{self._topics[i]}' (similarity {scores[i]:.2f})")
+            return self._topics[i]
+        return None
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "topics": len(self._topics)}